@@ -1,15 +1,20 @@
 """Data loading and processing module for Vietnamese NER"""
 
-from .loader import NERDataLoader, load_processed_data
+from .loader import ENTITY_TYPES, NERDataLoader, SpanArrays, load_processed_data
+from .dataset import NERDataset
 from .sampler import create_validation_set, create_few_shot_examples
 from .statistics import analyze_dataset_statistics
-from .utils import save_validation_and_examples
+from .utils import save_validation_and_examples, spans_to_bio
 
 __all__ = [
+    'ENTITY_TYPES',
     'NERDataLoader',
+    'SpanArrays',
     'load_processed_data',
+    'NERDataset',
     'create_validation_set',
     'create_few_shot_examples',
     'analyze_dataset_statistics',
     'save_validation_and_examples',
+    'spans_to_bio',
 ]
@@ -0,0 +1,141 @@
+"""Columnar representation of an NER split
+
+``NERDataset`` is built once from a split and holds per-document NumPy columns
+(text length, per-type entity counts, topic codes, ids) plus an interned pool
+of entity surface strings. Statistics and sampling run as array operations on
+these columns instead of re-walking nested dicts on every call.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .loader import ENTITY_TYPES, NERDataLoader
+
+
+class NERDataset:
+    """Columnar view of a list of NER records
+
+    Attributes:
+        ids: Document ids (int64 when all ids are integers, otherwise object)
+        text_length: Character length of each document's text
+        entity_counts: ``(n, len(ENTITY_TYPES))`` mention counts per type
+        topic_codes: Index into ``topics`` for each document
+        topics: Topic names in order of first appearance
+        surfaces: Interned pool of distinct entity surface strings
+        surface_ids: Flat ``surfaces`` indices of every mention, grouped by document
+        surface_types: Entity type code (index into ``ENTITY_TYPES``) of each mention
+        surface_offsets: Mentions of document ``i`` are ``surface_offsets[i]:surface_offsets[i + 1]``
+    """
+
+    def __init__(self, records: Iterable[Dict], keep_records: bool = True):
+        self._records: Optional[List[Dict]] = [] if keep_records else None
+        self._loader: Optional[NERDataLoader] = None
+        self._split: Optional[str] = None
+
+        ids, lengths, counts, topic_codes = [], [], [], []
+        topic_index: Dict[str, int] = {}
+        surface_index: Dict[str, int] = {}
+        surface_ids, surface_types, surface_offsets = [], [], [0]
+
+        for record in records:
+            if self._records is not None:
+                self._records.append(record)
+            gt = record['ground_truth']
+
+            ids.append(record.get('id'))
+            lengths.append(len(record.get('text', '')))
+            topic = record.get('topic', 'unknown')
+            topic_codes.append(topic_index.setdefault(topic, len(topic_index)))
+
+            row = []
+            for code, entity_type in enumerate(ENTITY_TYPES):
+                values = gt.get(entity_type, [])
+                row.append(len(values))
+                for value in values:
+                    surface_ids.append(surface_index.setdefault(value, len(surface_index)))
+                    surface_types.append(code)
+            counts.append(row)
+            surface_offsets.append(len(surface_ids))
+
+        n = len(ids)
+        self.ids = (
+            np.array(ids, dtype=np.int64)
+            if all(isinstance(i, int) for i in ids) else np.array(ids, dtype=object)
+        )
+        self.text_length = np.array(lengths, dtype=np.int64)
+        self.entity_counts = np.array(counts, dtype=np.int32).reshape(n, len(ENTITY_TYPES))
+        self.topic_codes = np.array(topic_codes, dtype=np.int32)
+        self.topics = list(topic_index)
+        self.surfaces = list(surface_index)
+        self.surface_ids = np.array(surface_ids, dtype=np.int32)
+        self.surface_types = np.array(surface_types, dtype=np.int8)
+        self.surface_offsets = np.array(surface_offsets, dtype=np.int64)
+
+    @classmethod
+    def from_split(cls, split: str, loader: Optional[NERDataLoader] = None) -> 'NERDataset':
+        """Build from a processed split by streaming it; records are fetched on demand"""
+        loader = loader or NERDataLoader()
+        dataset = cls(loader.iter_split(split), keep_records=False)
+        dataset._loader = loader
+        dataset._split = split
+        return dataset
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def record(self, index: int) -> Dict:
+        """Return the original record at ``index``"""
+        if self._records is not None:
+            return self._records[index]
+        return self._loader.get_record(self._split, int(index))
+
+    def take(self, indices: Sequence[int]) -> List[Dict]:
+        """Return the original records at ``indices``, in order"""
+        return [self.record(int(i)) for i in indices]
+
+    @property
+    def total_entities(self) -> np.ndarray:
+        """Mention count per document"""
+        return self.entity_counts.sum(axis=1)
+
+    @property
+    def types_present(self) -> np.ndarray:
+        """Number of entity types with at least one mention, per document"""
+        return (self.entity_counts > 0).sum(axis=1)
+
+    def surface_frequencies(self, entity_type: Optional[str] = None) -> np.ndarray:
+        """Mention count of every pooled surface, optionally for one entity type"""
+        ids = self.surface_ids
+        if entity_type is not None:
+            ids = ids[self.surface_types == ENTITY_TYPES.index(entity_type)]
+        return np.bincount(ids, minlength=len(self.surfaces))
+
+    def most_common_surfaces(self, k: int = 10, entity_type: Optional[str] = None) -> List[tuple]:
+        """Top-``k`` (surface, count) pairs, like ``Counter.most_common``"""
+        freq = self.surface_frequencies(entity_type)
+        top = np.argsort(-freq, kind='stable')[:k]
+        return [(self.surfaces[i], int(freq[i])) for i in top if freq[i] > 0]
+
+    def statistics(self) -> Dict:
+        """Dataset statistics (see ``analyze_dataset_statistics``)"""
+        n = len(self)
+        if n == 0:
+            return {
+                'total_examples': 0,
+                'entity_counts': {},
+                'avg_entities_per_example': 0,
+                'avg_text_length': 0,
+                'examples_with_all_types': 0
+            }
+
+        per_type = self.entity_counts.sum(axis=0)
+        total_entities = int(per_type.sum())
+        return {
+            'total_examples': n,
+            'entity_counts': {t: int(c) for t, c in zip(ENTITY_TYPES, per_type)},
+            'total_entities': total_entities,
+            'avg_entities_per_example': total_entities / n,
+            'avg_text_length': int(self.text_length.sum()) / n,
+            'examples_with_all_types': int((self.types_present == len(ENTITY_TYPES)).sum())
+        }
@@ -1,12 +1,35 @@
 """Data loading utilities for Vietnamese NER dataset"""
 
 import json
+import mmap
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_ROOT / "data" / "vlps_2018_ner" / "processed"
 
+# Entity type codes used in span arrays (index into this tuple)
+ENTITY_TYPES = ("person", "organizations", "address")
+
+
+class SpanArrays(NamedTuple):
+    """Entity spans of a split as flat integer arrays (CSR layout)
+
+    Spans of document ``i`` are rows ``doc_offsets[i]:doc_offsets[i + 1]``;
+    ``starts``/``ends`` are character offsets into the document's ``text`` and
+    ``types`` indexes ``ENTITY_TYPES``.
+    """
+    doc_offsets: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    types: np.ndarray
+
+    def for_doc(self, index: int) -> slice:
+        """Row slice holding the spans of document ``index``"""
+        return slice(int(self.doc_offsets[index]), int(self.doc_offsets[index + 1]))
+
 
 class NERDataLoader:
     """Load and manage NER dataset splits"""
@@ -14,6 +37,7 @@ class NERDataLoader:
     def __init__(self, data_dir: Path = DATA_DIR):
         self.data_dir = Path(data_dir)
         self._cache = {}
+        self._mmaps = {}
 
     def load_split(self, split: str) -> List[Dict]:
         """Load a specific split (train/dev/test)"""
@@ -30,6 +54,95 @@ class NERDataLoader:
         self._cache[split] = data
         return data
 
+    def clear_cache(self):
+        """Drop splits held in memory and close memory-mapped files"""
+        self._cache.clear()
+        for data, offsets in self._mmaps.values():
+            data.close()
+        self._mmaps.clear()
+
+    def _ensure_jsonl(self, split: str) -> Tuple[Path, Path]:
+        """Return (jsonl, index) paths, rebuilding them if missing or stale
+
+        ``process_data.py`` writes both files; this fallback converts
+        ``<split>.json`` when only the JSON array is present.
+        """
+        json_path = self.data_dir / f"{split}.json"
+        jsonl_path = self.data_dir / f"{split}.jsonl"
+        index_path = self.data_dir / f"{split}.jsonl.idx"
+
+        if not jsonl_path.exists() and not json_path.exists():
+            raise FileNotFoundError(f"Split file not found: {jsonl_path}")
+
+        if not jsonl_path.exists() or (
+            json_path.exists() and json_path.stat().st_mtime > jsonl_path.stat().st_mtime
+        ):
+            with open(json_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            write_jsonl(records, jsonl_path)
+        elif not index_path.exists() or index_path.stat().st_mtime < jsonl_path.stat().st_mtime:
+            build_jsonl_index(jsonl_path)
+
+        return jsonl_path, index_path
+
+    def iter_split(self, split: str) -> Iterator[Dict]:
+        """Stream records of a split one at a time from ``<split>.jsonl``"""
+        jsonl_path, _ = self._ensure_jsonl(split)
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _open_mmap(self, split: str) -> Tuple[mmap.mmap, np.ndarray]:
+        if split not in self._mmaps:
+            jsonl_path, index_path = self._ensure_jsonl(split)
+            offsets = np.memmap(index_path, dtype='<i8', mode='r')
+            with open(jsonl_path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps[split] = (data, offsets)
+        return self._mmaps[split]
+
+    def num_records(self, split: str) -> int:
+        """Number of records in a split, read from the offset index"""
+        _, offsets = self._open_mmap(split)
+        return len(offsets) - 1
+
+    def get_record(self, split: str, index: int) -> Dict:
+        """Random access to record ``index`` without parsing the rest of the file"""
+        data, offsets = self._open_mmap(split)
+        count = len(offsets) - 1
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f"Record {index} out of range for '{split}' ({count} records)")
+        return json.loads(data[offsets[index]:offsets[index + 1]])
+
+    def load_spans(self, split: str) -> SpanArrays:
+        """Load the entity spans of a split as compact integer arrays"""
+        data = self.load_split(split)
+        type_codes = {name: code for code, name in enumerate(ENTITY_TYPES)}
+
+        doc_offsets = np.zeros(len(data) + 1, dtype=np.int64)
+        starts, ends, types = [], [], []
+        for i, record in enumerate(data):
+            if "spans" not in record:
+                raise KeyError(
+                    f"Record {record.get('id')} in '{split}' has no spans; "
+                    f"re-run src/tools/process_data.py --force"
+                )
+            for start, end, entity_type in record["spans"]:
+                starts.append(start)
+                ends.append(end)
+                types.append(type_codes[entity_type])
+            doc_offsets[i + 1] = len(starts)
+
+        return SpanArrays(
+            doc_offsets=doc_offsets,
+            starts=np.array(starts, dtype=np.int32),
+            ends=np.array(ends, dtype=np.int32),
+            types=np.array(types, dtype=np.int8),
+        )
+
     def load_all(self) -> Dict[str, List[Dict]]:
         """Load all splits"""
         return {
@@ -39,6 +152,36 @@ class NERDataLoader:
         }
 
 
+def build_jsonl_index(jsonl_path: Path) -> np.ndarray:
+    """Scan a JSONL file and write the byte offset of every record to ``<path>.idx``
+
+    The index holds ``n + 1`` little-endian int64 offsets; record ``i`` spans
+    bytes ``offsets[i]:offsets[i + 1]``.
+    """
+    jsonl_path = Path(jsonl_path)
+    offsets = [0]
+    with open(jsonl_path, 'rb') as f:
+        for line in f:
+            offsets.append(offsets[-1] + len(line))
+    index = np.array(offsets, dtype='<i8')
+    index.tofile(f"{jsonl_path}.idx")
+    return index
+
+
+def write_jsonl(records: List[Dict], jsonl_path: Path) -> np.ndarray:
+    """Write records one per line together with their offset index"""
+    jsonl_path = Path(jsonl_path)
+    offsets = [0]
+    with open(jsonl_path, 'wb') as f:
+        for record in records:
+            line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    index = np.array(offsets, dtype='<i8')
+    index.tofile(f"{jsonl_path}.idx")
+    return index
+
+
 def load_processed_data(data_dir: Path = DATA_DIR) -> Dict[str, List[Dict]]:
     """Convenience function to load all data splits"""
     loader = NERDataLoader(data_dir)
@@ -1,11 +1,15 @@
 """Sampling utilities for creating validation and few-shot examples"""
 
 import random
-from typing import Dict, List
+from typing import Dict, List, Union
+
+import numpy as np
+
+from .dataset import NERDataset
 
 
 def create_validation_set(
-    dev_data: List[Dict],
+    dev_data: Union[List[Dict], NERDataset],
     size: int = 30,
     strategy: str = 'diverse',
     seed: int = 42
@@ -13,49 +17,38 @@ def create_validation_set(
     """Create validation set with various sampling strategies
 
     Args:
-        dev_data: Development set
+        dev_data: Development set, or a prebuilt ``NERDataset``
         size: Number of examples
         strategy: 'random', 'diverse', or 'balanced'
         seed: Random seed for reproducibility
     """
     random.seed(seed)
+    dataset = dev_data if isinstance(dev_data, NERDataset) else NERDataset(dev_data)
 
     if strategy == 'random':
-        return random.sample(dev_data, min(size, len(dev_data)))
+        return dataset.take(random.sample(range(len(dataset)), min(size, len(dataset))))
 
     elif strategy == 'diverse':
-        # Sample based on entity diversity
-        scored = []
-        for item in dev_data:
-            gt = item['ground_truth']
-            entity_count = sum(len(v) for v in gt.values())
-            entity_types = sum(1 for v in gt.values() if len(v) > 0)
-            score = entity_count * entity_types
-            scored.append((score, item))
-
-        scored.sort(reverse=True, key=lambda x: x[0])
-        return [item for _, item in scored[:size]]
+        # Sample based on entity diversity (stable, so ties keep dataset order)
+        score = dataset.total_entities * dataset.types_present
+        return dataset.take(np.argsort(-score, kind='stable')[:size])
 
     elif strategy == 'balanced':
         # Balance across topics
-        by_topic = {}
-        for item in dev_data:
-            topic = item.get('topic', 'unknown')
-            by_topic.setdefault(topic, []).append(item)
-
-        per_topic = size // len(by_topic)
+        per_topic = size // len(dataset.topics)
         result = []
-        for items in by_topic.values():
-            result.extend(random.sample(items, min(per_topic, len(items))))
+        for code in range(len(dataset.topics)):
+            indices = np.flatnonzero(dataset.topic_codes == code).tolist()
+            result.extend(random.sample(indices, min(per_topic, len(indices))))
 
-        return result[:size]
+        return dataset.take(result[:size])
 
     else:
         raise ValueError(f"Unknown strategy: {strategy}")
 
 
 def create_few_shot_examples(
-    train_data: List[Dict],
+    train_data: Union[List[Dict], NERDataset],
     num_examples: int = 3,
     quality_filter: bool = True,
     max_text_length: int = 800,
@@ -64,34 +57,28 @@ def create_few_shot_examples(
     """Create high-quality few-shot examples
 
     Args:
-        train_data: Training set
+        train_data: Training set, or a prebuilt ``NERDataset``
         num_examples: Number of examples to create
         quality_filter: Filter for quality examples
         max_text_length: Maximum text length
         seed: Random seed
     """
     random.seed(seed)
+    dataset = train_data if isinstance(train_data, NERDataset) else NERDataset(train_data)
 
     # Filter candidates
-    candidates = []
-    for item in train_data:
-        text = item['text']
-        gt = item['ground_truth']
-
-        # Quality criteria
-        entity_count = sum(len(v) for v in gt.values())
-        has_all_types = all(len(v) > 0 for v in gt.values())
-        length_ok = len(text) <= max_text_length
-
-        if quality_filter:
-            if entity_count >= 3 and has_all_types and length_ok:
-                candidates.append(item)
-        else:
-            if entity_count > 0 and length_ok:
-                candidates.append(item)
+    entity_count = dataset.total_entities
+    length_ok = dataset.text_length <= max_text_length
+
+    if quality_filter:
+        has_all_types = dataset.types_present == dataset.entity_counts.shape[1]
+        mask = (entity_count >= 3) & has_all_types & length_ok
+    else:
+        mask = (entity_count > 0) & length_ok
+    candidates = np.flatnonzero(mask).tolist()
 
     # Sample from candidates
-    selected = random.sample(candidates, min(num_examples, len(candidates)))
+    selected = dataset.take(random.sample(candidates, min(num_examples, len(candidates))))
 
     # Format as few-shot examples
     examples = []
@@ -1,8 +1,11 @@
 """Utility functions for data handling"""
 
 import json
+from numbers import Integral
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Sequence, Tuple
+
+from .loader import ENTITY_TYPES
 
 
 def save_validation_and_examples(
@@ -34,3 +37,47 @@ def save_validation_and_examples(
         json.dump(few_shot_examples, f, ensure_ascii=False, indent=2)
 
     return val_path, examples_path
+
+
+def spans_to_bio(text: str, spans: Sequence[Sequence]) -> Tuple[List[str], List[str]]:
+    """Convert character spans into whitespace tokens with BIO tags
+
+    Args:
+        text: Cleaned document text (single-space separated)
+        spans: ``[start, end, type]`` entries, as stored in the processed data.
+            ``type`` may also be an ``ENTITY_TYPES`` code (``load_spans``).
+
+    Returns:
+        Tuple of (tokens, tags), e.g. tags ``B-person``, ``I-person``, ``O``.
+        Nested spans keep the outermost one, whatever the input order.
+    """
+    tokens = text.split(' ') if text else []
+    tags = ['O'] * len(tokens)
+
+    # Token index of every character offset that starts a token
+    token_starts = {}
+    offset = 0
+    for index, token in enumerate(tokens):
+        token_starts[offset] = index
+        offset += len(token) + 1
+
+    # Outer spans first, so an enclosed span is the one skipped
+    for start, end, entity_type in sorted(spans, key=lambda span: (span[0], -span[1])):
+        index = token_starts.get(start)
+        if index is None:
+            continue  # span starts mid-token
+        covered = [index]
+        offset = start + len(tokens[index]) + 1
+        while offset < end and offset in token_starts:
+            covered.append(token_starts[offset])
+            offset += len(tokens[token_starts[offset]]) + 1
+        if any(tags[i] != 'O' for i in covered):
+            continue  # overlaps a span already tagged
+
+        if isinstance(entity_type, Integral):
+            entity_type = ENTITY_TYPES[entity_type]
+        tags[index] = f'B-{entity_type}'
+        for i in covered[1:]:
+            tags[i] = f'I-{entity_type}'
+
+    return tokens, tags
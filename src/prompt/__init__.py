@@ -1,17 +1,39 @@
 """Prompt templates for Vietnamese NER extraction"""
 
 from .templates import (
+    PromptParts,
     build_zero_shot_prompt,
     build_few_shot_prompt,
     build_chain_of_thought_prompt,
+    build_zero_shot_parts,
+    build_few_shot_parts,
+    build_chain_of_thought_parts,
     build_custom_prompt,
     build_prompt,
+    build_batched_prompt,
+    build_hinted_prompt,
+    format_entity_hints,
 )
+from .compiled import BatchedPromptTemplate, PromptTemplate, approximate_token_count
+from .chunking import chunk_document, chunk_spans, sentence_spans
 
 __all__ = [
+    'PromptParts',
     'build_zero_shot_prompt',
     'build_few_shot_prompt',
     'build_chain_of_thought_prompt',
+    'build_zero_shot_parts',
+    'build_few_shot_parts',
+    'build_chain_of_thought_parts',
     'build_custom_prompt',
     'build_prompt',
+    'build_batched_prompt',
+    'build_hinted_prompt',
+    'format_entity_hints',
+    'PromptTemplate',
+    'BatchedPromptTemplate',
+    'approximate_token_count',
+    'chunk_document',
+    'chunk_spans',
+    'sentence_spans',
 ]
@@ -0,0 +1,127 @@
+"""Split long documents into prompt-sized chunks on sentence boundaries
+
+Chunks are ``(start, end)`` character ranges of the original text, so every
+chunk is an exact substring. Consecutive chunks share up to
+``overlap_tokens`` of whole sentences, so an entity near a boundary is seen
+in full by at least one chunk. A sentence longer than the budget is split at
+whitespace.
+
+Example:
+    >>> template = PromptTemplate('zero_shot')
+    >>> chunks = template.chunk(text, max_prompt_tokens=1024, overlap_tokens=64)
+    >>> prompts = [template.render(chunk) for chunk in chunks]
+"""
+
+import re
+from typing import Any, Callable, List, Tuple
+
+# Sentence end: . ! ? … (optionally followed by closing quotes/brackets) then
+# whitespace, or a line break
+_SENTENCE_END_RE = re.compile(r'[.!?…]+["”’)\]]*\s+|\n+')
+_WORD_RE = re.compile(r'\S+')
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_token_count(text: str) -> int:
+    """Word and punctuation count, a tokenizer-free stand-in for token counts"""
+    return len(_TOKEN_RE.findall(text))
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """``(start, end)`` of each sentence, trailing whitespace included"""
+    spans = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        spans.append((start, match.end()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def _split_long(text: str,
+                start: int,
+                end: int,
+                max_tokens: int,
+                count_tokens: Callable[[str], int]) -> List[Tuple[int, int, int]]:
+    """Split one oversized sentence into word windows of at most ``max_tokens``"""
+    pieces = []
+    piece_start = start
+    piece_tokens = 0
+    for word in _WORD_RE.finditer(text, start, end):
+        tokens = count_tokens(word.group())
+        if piece_tokens and piece_tokens + tokens > max_tokens:
+            pieces.append((piece_start, word.start(), piece_tokens))
+            piece_start, piece_tokens = word.start(), 0
+        piece_tokens += tokens
+    pieces.append((piece_start, end, piece_tokens))
+    return pieces
+
+
+def chunk_spans(text: str,
+                max_tokens: int,
+                overlap_tokens: int = 0,
+                count_tokens: Callable[[str], int] = approximate_token_count) -> List[Tuple[int, int]]:
+    """Group sentences into chunks of at most ``max_tokens``
+
+    Args:
+        text: Document text
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens of whole sentences repeated from the end of
+            the previous chunk (never the whole previous chunk)
+        count_tokens: Token counter, e.g. ``PromptTemplate.count_tokens``
+
+    Returns:
+        ``(start, end)`` ranges covering the whole text, in order
+    """
+    if max_tokens < 1:
+        raise ValueError(f"max_tokens must be >= 1, got {max_tokens}")
+
+    units = []  # (start, end, tokens)
+    for start, end in sentence_spans(text):
+        tokens = count_tokens(text[start:end])
+        if tokens > max_tokens:
+            units.extend(_split_long(text, start, end, max_tokens, count_tokens))
+        else:
+            units.append((start, end, tokens))
+    if not units:
+        return [(0, len(text))]
+
+    chunks = []
+    i = 0
+    while True:
+        j = i
+        total = 0
+        while j < len(units) and (j == i or total + units[j][2] <= max_tokens):
+            total += units[j][2]
+            j += 1
+        chunks.append((units[i][0], units[j - 1][1]))
+        if j == len(units):
+            return chunks
+
+        # Start the next chunk a few sentences back, but always move forward
+        k = j
+        overlap = 0
+        while k - 1 > i and overlap + units[k - 1][2] <= overlap_tokens:
+            k -= 1
+            overlap += units[k][2]
+        i = k
+
+
+def chunk_document(text: str,
+                   template: Any,
+                   max_prompt_tokens: int,
+                   overlap_tokens: int = 64) -> List[str]:
+    """Split ``text`` so every ``template.render(chunk)`` fits ``max_prompt_tokens``
+
+    ``template`` is a ``PromptTemplate`` (its static token count and tokenizer
+    set the budget).
+    """
+    budget = max_prompt_tokens - template.static_tokens
+    if budget < 1:
+        raise ValueError(
+            f"max_prompt_tokens={max_prompt_tokens} leaves no room for text "
+            f"(template uses {template.static_tokens} tokens)"
+        )
+    return [text[start:end] for start, end in
+            chunk_spans(text, budget, overlap_tokens, template.count_tokens)]
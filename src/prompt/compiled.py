@@ -0,0 +1,222 @@
+"""Prompt templates compiled once per strategy and example set
+
+``build_few_shot_prompt`` re-renders its examples (``json.dumps`` and string
+concatenation) on every call. ``PromptTemplate`` renders the whole prompt once
+around a placeholder and keeps the text before and after it, so a
+per-document prompt is a single join:
+
+    template = PromptTemplate('few_shot', examples=examples)
+    prompts = [template.render(text) for text in texts]  # == build_few_shot_prompt(text, examples)
+
+The static token counts are computed at compile time as well, so batch
+schedulers can budget context length by tokenizing only the documents.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .chunking import approximate_token_count, chunk_document
+from .templates import (
+    _BATCH_HEAD,
+    _batch_entry,
+    _batch_tail,
+    PromptParts,
+    build_chain_of_thought_parts,
+    build_chain_of_thought_prompt,
+    build_custom_prompt,
+    build_few_shot_parts,
+    build_few_shot_prompt,
+    build_prompt,
+    build_zero_shot_parts,
+    build_zero_shot_prompt,
+)
+
+# Stands in for the document text while compiling
+_PLACEHOLDER = "\x00DOCUMENT\x00"
+
+# strategy -> (legacy builder, static-first builder); builders take (text, **options)
+STRATEGIES: Dict[str, tuple] = {
+    'zero_shot': (build_zero_shot_prompt, build_zero_shot_parts),
+    'few_shot': (build_few_shot_prompt, build_few_shot_parts),
+    'chain_of_thought': (build_chain_of_thought_prompt, build_chain_of_thought_parts),
+    'custom': (build_custom_prompt, None),
+    'instruct': (build_prompt, None),
+}
+
+
+def _token_counter(tokenizer: Any) -> Callable[[str], int]:
+    if tokenizer is None:
+        return approximate_token_count
+    if hasattr(tokenizer, 'encode'):
+        # transformers tokenizers: count without BOS/EOS, the prompt has them once
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    return lambda text: len(tokenizer(text))
+
+
+class PromptTemplate:
+    """One prompt strategy compiled for a fixed example set
+
+    Args:
+        strategy: 'zero_shot', 'few_shot', 'chain_of_thought', 'custom' or 'instruct'
+        examples: Few-shot examples (``few_shot`` and ``custom``)
+        layout: 'legacy' renders exactly what ``build_*_prompt`` returns;
+            'static_first' renders ``build_*_parts`` (zero_shot, few_shot,
+            chain_of_thought only)
+        tokenizer: Object with ``encode`` (transformers) or a callable returning
+            tokens; defaults to ``approximate_token_count``
+        **options: Extra builder arguments (``instruction``, ``rules``)
+
+    Attributes:
+        head, tail: Rendered text before and after the document
+        static_tokens: Tokens of ``head`` + ``tail``
+    """
+
+    def __init__(self,
+                 strategy: str,
+                 examples: Optional[List[Dict]] = None,
+                 layout: str = 'legacy',
+                 tokenizer: Any = None,
+                 **options):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}. Choose from {list(STRATEGIES)}")
+        if layout not in ('legacy', 'static_first'):
+            raise ValueError(f"Unknown layout: {layout}")
+        legacy, static_first = STRATEGIES[strategy]
+        if layout == 'static_first' and static_first is None:
+            raise ValueError(f"Strategy '{strategy}' has no static-first layout")
+
+        self.strategy = strategy
+        self.layout = layout
+        self.examples = list(examples or [])
+
+        if strategy in ('few_shot', 'custom'):
+            options['examples'] = self.examples
+        builder = legacy if layout == 'legacy' else lambda text, **kw: static_first(text, **kw).text
+        rendered = builder(_PLACEHOLDER, **options)
+        if rendered.count(_PLACEHOLDER) != 1:
+            raise ValueError(f"Template '{strategy}' must embed the document exactly once")
+        self.head, self.tail = rendered.split(_PLACEHOLDER)
+
+        self._count_tokens = _token_counter(tokenizer)
+        self.head_tokens = self._count_tokens(self.head)
+        self.tail_tokens = self._count_tokens(self.tail)
+
+    @property
+    def static_tokens(self) -> int:
+        return self.head_tokens + self.tail_tokens
+
+    @property
+    def prefix_hash(self) -> str:
+        return PromptParts(self.head, '').prefix_hash
+
+    def render(self, text: str) -> str:
+        """Prompt for one document"""
+        return ''.join((self.head, text, self.tail))
+
+    def parts(self, text: str) -> PromptParts:
+        """(static prefix, document suffix) for prefix-cache backends"""
+        return PromptParts(self.head, ''.join((text, self.tail)))
+
+    def token_count(self, text: str, text_tokens: Optional[int] = None) -> int:
+        """Prompt tokens for ``text``; pass ``text_tokens`` if already counted
+
+        Counts are per piece, so they can differ from tokenizing the whole
+        prompt by a token or two at the document boundaries.
+        """
+        if text_tokens is None:
+            text_tokens = self._count_tokens(text)
+        return self.static_tokens + text_tokens
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens of arbitrary text with this template's tokenizer"""
+        return self._count_tokens(text)
+
+    def documents(self, prompt: str) -> List[str]:
+        """Inverse of ``render``: the document text embedded in ``prompt``"""
+        if prompt.startswith(self.head) and prompt.endswith(self.tail):
+            return [prompt[len(self.head):len(prompt) - len(self.tail)]]
+        raise ValueError("Prompt was not rendered by this template")
+
+    def chunk(self, text: str, max_prompt_tokens: int, overlap_tokens: int = 64) -> List[str]:
+        """Split ``text`` on sentences so every rendered chunk fits ``max_prompt_tokens``"""
+        return chunk_document(text, self, max_prompt_tokens, overlap_tokens)
+
+    def __repr__(self) -> str:
+        return (f"PromptTemplate({self.strategy!r}, examples={len(self.examples)}, "
+                f"layout={self.layout!r}, static_tokens={self.static_tokens})")
+
+
+_BATCH_ENTRY_RE = re.compile(r'### TEXT (\d+)\n')
+
+
+class BatchedPromptTemplate:
+    """``build_batched_prompt`` compiled once, with token-budget batching
+
+    Args:
+        tokenizer: As for ``PromptTemplate``
+        output_tokens_per_doc: Answer tokens reserved per document when
+            packing (the JSON object with its entities)
+    """
+
+    batched = True
+
+    def __init__(self, tokenizer: Any = None, output_tokens_per_doc: int = 96):
+        self.output_tokens_per_doc = output_tokens_per_doc
+        self._count_tokens = _token_counter(tokenizer)
+        self.head = _BATCH_HEAD
+        self.head_tokens = self._count_tokens(self.head)
+        # Per-document markup and the tail differ only in digits
+        self.entry_tokens = self._count_tokens(_batch_entry(10, ''))
+        self.tail_tokens = self._count_tokens(_batch_tail(10))
+
+    def render(self, texts: Sequence[str]) -> str:
+        """Prompt for a batch of documents (== ``build_batched_prompt(texts)``)"""
+        pieces = [self.head]
+        pieces.extend(_batch_entry(i, text) for i, text in enumerate(texts, 1))
+        pieces.append(_batch_tail(len(texts)))
+        return ''.join(pieces)
+
+    def documents(self, prompt: str) -> List[str]:
+        """Inverse of ``render``: the documents embedded in ``prompt``, in order"""
+        if not prompt.startswith(self.head):
+            raise ValueError("Prompt was not rendered by this template")
+        body = prompt[len(self.head):prompt.rindex('JSON ARRAY (')]
+        entries = _BATCH_ENTRY_RE.split(body)[1:]
+        return [text[:-2] if text.endswith('\n\n') else text for text in entries[1::2]]
+
+    def count_tokens(self, text: str) -> int:
+        return self._count_tokens(text)
+
+    def budget(self, doc_tokens: Sequence[int]) -> int:
+        """Prompt plus reserved answer tokens for a batch of documents"""
+        return (self.head_tokens + self.tail_tokens
+                + sum(doc_tokens) + len(doc_tokens) * (self.entry_tokens + self.output_tokens_per_doc))
+
+    def pack(self,
+             doc_tokens: Sequence[int],
+             max_tokens: int,
+             max_docs: Optional[int] = None) -> List[List[int]]:
+        """Group consecutive documents into batches that fit ``max_tokens``
+
+        ``max_tokens`` bounds prompt plus reserved answer tokens, i.e. the
+        context (``num_ctx``) each request needs. A document too large to
+        share a batch gets one of its own.
+
+        Returns:
+            Lists of document indices, in input order
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = self.head_tokens + self.tail_tokens
+        per_doc = self.entry_tokens + self.output_tokens_per_doc
+        for i, tokens in enumerate(doc_tokens):
+            full = max_docs is not None and len(current) >= max_docs
+            if current and (full or used + tokens + per_doc > max_tokens):
+                batches.append(current)
+                current = []
+                used = self.head_tokens + self.tail_tokens
+            current.append(i)
+            used += tokens + per_doc
+        if current:
+            batches.append(current)
+        return batches
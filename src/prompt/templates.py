@@ -4,8 +4,10 @@ Optimized based on VLSP 2018 dataset patterns and reference implementation.
 Uses English instructions for better LLM understanding.
 """
 
+import hashlib
 import json
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Sequence
 
 
 # -------------------------------------------------------
@@ -15,26 +17,44 @@ from typing import List, Dict
 SYSTEM_ROLE = "You are an expert in Named Entity Recognition (NER) for Vietnamese text."
 
 
-# -------------------------------------------------------
-# 1. ZERO-SHOT PROMPT
-# -------------------------------------------------------
+class PromptParts(NamedTuple):
+    """
+    Prompt split into a static prefix and a per-document suffix.
 
-def build_zero_shot_prompt(text: str) -> str:
+    The prefix (instructions, examples, output schema) is identical for every
+    document, so a server that keeps the KV cache of the previous prompt
+    (Ollama with keep_alive, or a transformers past_key_values cache) only
+    has to prefill the suffix.
     """
-    Zero-shot prompt optimized for Vietnamese NER.
+    prefix: str
+    suffix: str
 
-    Based on reference implementation with proven accuracy on VLSP 2018 dataset.
-    Uses comprehensive entity definitions and strict extraction rules.
+    @property
+    def text(self) -> str:
+        """Full prompt"""
+        return self.prefix + self.suffix
 
-    Args:
-        text: Input Vietnamese text
+    @property
+    def prefix_hash(self) -> str:
+        """Stable id of the prefix (first 16 hex digits of its SHA-256)"""
+        return _prefix_hash(self.prefix)
 
-    Returns:
-        Formatted prompt string
-    """
-    return f"""{SYSTEM_ROLE}
 
-TASK: Extract ALL named entities that appear DIRECTLY in the text. Categorize them into 3 types:
+@lru_cache(maxsize=64)
+def _prefix_hash(prefix: str) -> str:
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+
+
+def _document_suffix(text: str) -> str:
+    """Dynamic part of every static-first prompt"""
+    return f"{text}\n\nJSON:\n"
+
+
+# -------------------------------------------------------
+# 1. ZERO-SHOT PROMPT
+# -------------------------------------------------------
+
+_ZERO_SHOT_INSTRUCTIONS = """TASK: Extract ALL named entities that appear DIRECTLY in the text. Categorize them into 3 types:
 
 1. PERSON (People names):
    - Full names: "Nguyễn Văn A", "Đỗ Tất Lợi", "Angelina Jolie"
@@ -69,60 +89,69 @@ CRITICAL RULES:
 ✓ Each entity appears ONCE per category (remove duplicates)
 ✓ If no entities found → return empty array []
 ✓ Remove trailing punctuation: "ông A." → "ông A"
-✓ Include ALL alternate names for same entity
-
-VIETNAMESE TEXT TO ANALYZE:
-{text}
+✓ Include ALL alternate names for same entity"""
 
-RETURN ONLY THIS JSON (no explanations, no markdown):
-{{
+_ZERO_SHOT_SCHEMA = """RETURN ONLY THIS JSON (no explanations, no markdown):
+{
   "person": [],
   "organizations": [],
   "address": []
-}}
-"""
-
+}"""
 
-# -------------------------------------------------------
-# 2. FEW-SHOT PROMPT
-# -------------------------------------------------------
 
-def build_few_shot_prompt(text: str, examples: List[Dict]) -> str:
+def build_zero_shot_prompt(text: str) -> str:
     """
-    Few-shot prompt with examples for Vietnamese NER.
+    Zero-shot prompt optimized for Vietnamese NER.
 
-    Demonstrates correct extraction patterns using real examples from VLSP 2018.
+    Based on reference implementation with proven accuracy on VLSP 2018 dataset.
+    Uses comprehensive entity definitions and strict extraction rules.
 
     Args:
         text: Input Vietnamese text
-        examples: List of example dicts with 'input' and 'output' keys
 
     Returns:
         Formatted prompt string
     """
-    if not examples:
-        return build_zero_shot_prompt(text)
+    return f"""{SYSTEM_ROLE}
 
-    # Format examples properly
-    examples_text = ""
-    for i, ex in enumerate(examples[:3], 1):
-        ex_text = ex['input'][:500]
-        ex_output = json.dumps(ex['output'], ensure_ascii=False, indent=2)
-        examples_text += f"""
-EXAMPLE {i}:
-Vietnamese Text: {ex_text}
-Extracted Entities:
-{ex_output}
----
+{_ZERO_SHOT_INSTRUCTIONS}
+
+VIETNAMESE TEXT TO ANALYZE:
+{text}
+
+{_ZERO_SHOT_SCHEMA}
 """
 
-    return f"""{SYSTEM_ROLE}
 
-LEARN FROM THESE EXAMPLES showing correct Vietnamese entity extraction:
+def build_zero_shot_parts(text: str) -> PromptParts:
+    """
+    Zero-shot prompt in static-first layout.
+
+    Same instructions as ``build_zero_shot_prompt``, with the output schema
+    moved before the text so the whole prefix is shared across documents.
+
+    Args:
+        text: Input Vietnamese text
+
+    Returns:
+        PromptParts (static prefix, text suffix)
+    """
+    prefix = f"""{SYSTEM_ROLE}
+
+{_ZERO_SHOT_INSTRUCTIONS}
+
+{_ZERO_SHOT_SCHEMA}
+
+VIETNAMESE TEXT TO ANALYZE:
+"""
+    return PromptParts(prefix, _document_suffix(text))
 
-{examples_text}
 
-KEY PATTERNS TO RECOGNIZE:
+# -------------------------------------------------------
+# 2. FEW-SHOT PROMPT
+# -------------------------------------------------------
+
+_FEW_SHOT_GUIDELINES = """KEY PATTERNS TO RECOGNIZE:
 1. PERSON: Vietnamese names (3+ words), foreign names, titles (ông/bà/anh/chị), stage names, character names
 2. ORGANIZATIONS:
    - Vietnamese gov agencies start with "Bộ", "UBND", "CTCP"
@@ -137,40 +166,96 @@ EXTRACTION RULES:
 ✓ PRESERVE original Vietnamese spelling with accents (dấu)
 ✓ List ALL alternate mentions of same entity separately
 ✓ Remove duplicates within each category
-✓ Keep original capitalization from text
+✓ Keep original capitalization from text"""
 
-NOW EXTRACT ENTITIES FROM THIS NEW TEXT:
-{text}
+_FEW_SHOT_SCHEMA = """RETURN ONLY JSON (no explanations, no markdown):
+{"person": [], "organizations": [], "address": []}"""
 
-RETURN ONLY JSON (no explanations, no markdown):
-{{"person": [], "organizations": [], "address": []}}
-"""
 
+def _format_examples(examples: List[Dict]) -> str:
+    """Render up to 3 examples as the few-shot block"""
+    examples_text = ""
+    for i, ex in enumerate(examples[:3], 1):
+        ex_text = ex['input'][:500]
+        ex_output = json.dumps(ex['output'], ensure_ascii=False, indent=2)
+        examples_text += f"""
+EXAMPLE {i}:
+Vietnamese Text: {ex_text}
+Extracted Entities:
+{ex_output}
+---
+"""
+    return examples_text
 
-# -------------------------------------------------------
-# 3. CHAIN-OF-THOUGHT PROMPT
-# -------------------------------------------------------
 
-def build_chain_of_thought_prompt(text: str) -> str:
+def build_few_shot_prompt(text: str, examples: List[Dict]) -> str:
     """
-    Chain-of-Thought prompt for Vietnamese NER.
+    Few-shot prompt with examples for Vietnamese NER.
 
-    Guides the model through systematic step-by-step entity extraction.
-    Based on reference implementation with detailed reasoning steps.
+    Demonstrates correct extraction patterns using real examples from VLSP 2018.
 
     Args:
         text: Input Vietnamese text
+        examples: List of example dicts with 'input' and 'output' keys
 
     Returns:
         Formatted prompt string
     """
+    if not examples:
+        return build_zero_shot_prompt(text)
+
     return f"""{SYSTEM_ROLE}
-Analyze this Vietnamese text step by step to extract all named entities.
 
-VIETNAMESE TEXT:
+LEARN FROM THESE EXAMPLES showing correct Vietnamese entity extraction:
+
+{_format_examples(examples)}
+
+{_FEW_SHOT_GUIDELINES}
+
+NOW EXTRACT ENTITIES FROM THIS NEW TEXT:
 {text}
 
-STEP 1: Understand the context
+{_FEW_SHOT_SCHEMA}
+"""
+
+
+def build_few_shot_parts(text: str, examples: List[Dict]) -> PromptParts:
+    """
+    Few-shot prompt in static-first layout.
+
+    The examples are part of the prefix, so the prefix hash stays stable as
+    long as the same examples are used.
+
+    Args:
+        text: Input Vietnamese text
+        examples: List of example dicts with 'input' and 'output' keys
+
+    Returns:
+        PromptParts (static prefix, text suffix)
+    """
+    if not examples:
+        return build_zero_shot_parts(text)
+
+    prefix = f"""{SYSTEM_ROLE}
+
+LEARN FROM THESE EXAMPLES showing correct Vietnamese entity extraction:
+
+{_format_examples(examples)}
+
+{_FEW_SHOT_GUIDELINES}
+
+{_FEW_SHOT_SCHEMA}
+
+NOW EXTRACT ENTITIES FROM THIS NEW TEXT:
+"""
+    return PromptParts(prefix, _document_suffix(text))
+
+
+# -------------------------------------------------------
+# 3. CHAIN-OF-THOUGHT PROMPT
+# -------------------------------------------------------
+
+_COT_STEPS = """STEP 1: Understand the context
 - What is this text about? (news, sports, entertainment, politics, etc.)
 - This helps identify entity types (athletes vs actors vs politicians)
 
@@ -207,11 +292,60 @@ STEP 5: Clean and deduplicate
 - Keep original spelling/capitalization from source text
 - Remove trailing punctuation (. , ; :)
 - Do NOT guess or infer entities not in text
-- Do NOT translate entities
+- Do NOT translate entities"""
+
+_COT_SCHEMA = """RETURN ONLY THE FINAL JSON RESULT (no explanations, no markdown):
+{"person": [], "organizations": [], "address": []}"""
+
+
+def build_chain_of_thought_prompt(text: str) -> str:
+    """
+    Chain-of-Thought prompt for Vietnamese NER.
+
+    Guides the model through systematic step-by-step entity extraction.
+    Based on reference implementation with detailed reasoning steps.
+
+    Args:
+        text: Input Vietnamese text
+
+    Returns:
+        Formatted prompt string
+    """
+    return f"""{SYSTEM_ROLE}
+Analyze this Vietnamese text step by step to extract all named entities.
+
+VIETNAMESE TEXT:
+{text}
+
+{_COT_STEPS}
+
+{_COT_SCHEMA}
+"""
+
+
+def build_chain_of_thought_parts(text: str) -> PromptParts:
+    """
+    Chain-of-Thought prompt in static-first layout.
+
+    The reasoning steps refer to "the text below", which follows them in the
+    per-document suffix.
+
+    Args:
+        text: Input Vietnamese text
 
-RETURN ONLY THE FINAL JSON RESULT (no explanations, no markdown):
-{{"person": [], "organizations": [], "address": []}}
+    Returns:
+        PromptParts (static prefix, text suffix)
+    """
+    prefix = f"""{SYSTEM_ROLE}
+Analyze the Vietnamese text below step by step to extract all named entities.
+
+{_COT_STEPS}
+
+{_COT_SCHEMA}
+
+VIETNAMESE TEXT:
 """
+    return PromptParts(prefix, _document_suffix(text))
 
 
 # -------------------------------------------------------
@@ -304,3 +438,95 @@ def build_prompt(text: str, instruction: str = None) -> str:
         )
     
     return f"### Instruction:\n{instruction}\n\n### Input:\n{text}\n\n### Response:"
+
+
+# -------------------------------------------------------
+# 6. BATCHED PROMPT (several documents per request)
+# -------------------------------------------------------
+
+_BATCH_FORMAT = """Several Vietnamese texts follow, each starting with a line "### TEXT <id>".
+Extract the entities of each text separately. Never move an entity from one text to another.
+
+RETURN ONLY A JSON ARRAY with one object per text, in order (no explanations, no markdown):
+[
+  {"id": 1, "person": [], "organizations": [], "address": []},
+  {"id": 2, "person": [], "organizations": [], "address": []}
+]"""
+
+_BATCH_HEAD = f"""{SYSTEM_ROLE}
+
+{_ZERO_SHOT_INSTRUCTIONS}
+
+{_BATCH_FORMAT}
+
+"""
+
+
+def _batch_entry(index: int, text: str) -> str:
+    return f"### TEXT {index}\n{text}\n\n"
+
+
+def _batch_tail(count: int) -> str:
+    return f"JSON ARRAY ({count} objects, ids 1-{count}):\n"
+
+
+def build_batched_prompt(texts: Sequence[str]) -> str:
+    """
+    Zero-shot prompt for several documents at once.
+
+    The instruction block is sent once for the whole batch. Documents are
+    numbered from 1, and the model answers with a JSON array of objects
+    carrying the same ids (parse with ``parse_batched_response``).
+
+    Args:
+        texts: Input Vietnamese texts
+
+    Returns:
+        Formatted prompt string
+    """
+    documents = "".join(_batch_entry(i, text) for i, text in enumerate(texts, 1))
+    return f"{_BATCH_HEAD}{documents}{_batch_tail(len(texts))}"
+
+
+# -------------------------------------------------------
+# 7. GAZETTEER-HINTED PROMPT
+# -------------------------------------------------------
+
+def format_entity_hints(hints: Dict[str, List[str]]) -> str:
+    """Render known-entity hints as a prompt block ('' when there are none)"""
+    lines = [f"- {entity_type}: {json.dumps(values, ensure_ascii=False)}"
+             for entity_type, values in hints.items() if values]
+    if not lines:
+        return ""
+    return ("KNOWN ENTITIES (dictionary matches from the training data; they may be "
+            "incomplete or wrong in this context - verify each against the text):\n"
+            + "\n".join(lines))
+
+
+def build_hinted_prompt(text: str, hints: Dict[str, List[str]]) -> str:
+    """
+    Zero-shot prompt with a block of gazetteer matches before the text.
+
+    Same as ``build_zero_shot_prompt`` when ``hints`` is empty.
+
+    Args:
+        text: Input Vietnamese text
+        hints: ``{entity_type: [surface, ...]}`` (``GazetteerExtractor.hints``)
+
+    Returns:
+        Formatted prompt string
+    """
+    block = format_entity_hints(hints)
+    if not block:
+        return build_zero_shot_prompt(text)
+    return f"""{SYSTEM_ROLE}
+
+{_ZERO_SHOT_INSTRUCTIONS}
+
+{block}
+
+VIETNAMESE TEXT TO ANALYZE:
+{text}
+
+{_ZERO_SHOT_SCHEMA}
+"""
@@ -0,0 +1,132 @@
+"""Benchmark: multi-document batched prompts vs one document per call
+
+Extracts a split once with one zero-shot prompt per document and once with
+``BatchedExtractor`` at several token budgets (``--budgets``). The batch
+size K follows from each budget. Reports, for each mode:
+
+- wall time and documents per second, with ``--concurrency`` requests in flight
+- LLM calls (fallback calls included) and prompt tokens
+- mean batch size and documents re-extracted on their own
+- precision/recall/F1 against the ground truth
+
+By default the model is ``FakeExtractionLLM``. It takes time per prompt and
+answer token (scaled by ``--time-scale``), misses a little more per extra
+document in a batch, and cuts off ``--malformed-rate`` of the batched answers.
+With ``--model`` the prompts go to a real Ollama server instead.
+
+Usage:
+    python src/tools/bench_batched_extraction.py --documents 200
+    python src/tools/bench_batched_extraction.py --model qwen2.5:7b --budgets 2048,4096
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from prompt import BatchedPromptTemplate, PromptTemplate
+from utils.batched_extraction import BatchedExtractor
+from utils.chunked_extraction import ChunkedExtractor
+from utils.evaluation import compute_comprehensive_metrics
+from utils.fakes import FakeExtractionLLM
+from utils.streaming import ollama_generate_stream
+
+
+class OllamaLLM:
+    """Minimal ``invoke`` adapter over Ollama's streaming endpoint"""
+
+    def __init__(self, model: str, host: str, options: dict):
+        self.model = model
+        self.host = host
+        self.options = options
+        self.calls = 0
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        self.calls += 1
+        return "".join(ollama_generate_stream(prompt, self.model, self.host, self.options))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="dev")
+    parser.add_argument("--documents", type=int, default=200, help="First N documents (0 for all)")
+    parser.add_argument("--budgets", default="2048,4096,8192",
+                        help="Comma-separated per-request token budgets for batching")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--model", help="Ollama model (default: FakeExtractionLLM)")
+    parser.add_argument("--host", default="http://127.0.0.1:11434")
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Multiplier on FakeExtractionLLM's per-token times")
+    args = parser.parse_args()
+
+    records = NERDataLoader().load_split(args.split)
+    if args.documents:
+        records = records[:args.documents]
+    texts = [r["text"] for r in records]
+    ground_truths = [r["ground_truth"] for r in records]
+    budgets = [int(b) for b in args.budgets.split(",")]
+
+    template = PromptTemplate("zero_shot")
+    batch_template = BatchedPromptTemplate()
+
+    def make_llm(num_ctx: int):
+        if args.model:
+            return OllamaLLM(args.model, args.host, {"temperature": 0, "num_ctx": num_ctx})
+        gazetteer = {key: [e for gt in ground_truths for e in gt[key]] for key in ground_truths[0]}
+        return FakeExtractionLLM(gazetteer, template, num_ctx=num_ctx,
+                                 prefill_per_token=0.0002 * args.time_scale,
+                                 decode_per_token=0.02 * args.time_scale,
+                                 batch_template=batch_template,
+                                 malformed_rate=args.malformed_rate)
+
+    doc_tokens = [template.count_tokens(t) for t in texts]
+    print(f"{len(texts)} '{args.split}' documents, {sum(doc_tokens) / len(texts):.0f} tokens on "
+          f"average; instructions: {template.static_tokens} tokens single, "
+          f"{batch_template.head_tokens} batched; concurrency={args.concurrency}\n")
+
+    print(f"{'Mode':<18} {'Wall (s)':>9} {'Docs/s':>7} {'Calls':>6} {'Prompt tok':>11} "
+          f"{'Mean K':>7} {'Fallback':>9} {'Precision':>10} {'Recall':>7} {'F1':>6}")
+    print("-" * 98)
+
+    # One document per call
+    llm = make_llm(max(budgets))
+    single = ChunkedExtractor(llm, template, max_prompt_tokens=10 ** 9, max_concurrency=args.concurrency)
+    start = time.perf_counter()
+    results = single.extract_many(texts)
+    wall = time.perf_counter() - start
+    prompt_tokens = sum(template.token_count(t, n) for t, n in zip(texts, doc_tokens))
+    overall = compute_comprehensive_metrics([r["entities"] for r in results],
+                                            ground_truths)["overall_entity_metrics"]
+    print(f"{'1 doc / call':<18} {wall:>9.2f} {len(texts) / wall:>7.1f} {llm.calls:>6} "
+          f"{prompt_tokens:>11} {1:>7.1f} {0:>9} "
+          f"{overall['precision']:>10.1f} {overall['recall']:>7.1f} {overall['f1']:>6.1f}")
+
+    for budget in budgets:
+        llm = make_llm(budget)
+        extractor = BatchedExtractor(llm, batch_template, template, max_prompt_tokens=budget,
+                                     max_concurrency=args.concurrency)
+        batches = extractor.batches(texts)
+        start = time.perf_counter()
+        results = extractor.extract_many(texts)
+        wall = time.perf_counter() - start
+
+        fallbacks = [i for i, r in enumerate(results) if r["fallback"]]
+        prompt_tokens = sum(batch_template.budget([doc_tokens[i] for i in indices])
+                            - len(indices) * batch_template.output_tokens_per_doc
+                            for indices in batches)
+        prompt_tokens += sum(template.token_count(texts[i], doc_tokens[i]) for i in fallbacks)
+        overall = compute_comprehensive_metrics([r["entities"] for r in results],
+                                                ground_truths)["overall_entity_metrics"]
+        print(f"{f'batched ({budget})':<18} {wall:>9.2f} {len(texts) / wall:>7.1f} {llm.calls:>6} "
+              f"{prompt_tokens:>11} {len(texts) / len(batches):>7.1f} {len(fallbacks):>9} "
+              f"{overall['precision']:>10.1f} {overall['recall']:>7.1f} {overall['f1']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark: cascade extraction, throughput vs F1 by escalation rate
+
+Builds the ``Gazetteer`` from the train split and runs ``CascadeExtractor``
+over a split at several escalation rates (``--rates``). Rate 0 is the
+gazetteer alone. At rate 1 every document also goes to the LLM. The
+least confident documents are escalated first, scored by
+``gazetteer_confidence``. The last row is the LLM alone, without the
+gazetteer's matches merged in. Reports docs/second, LLM calls and
+precision/recall/F1: the trade-off curve.
+
+By default the LLM is ``FakeExtractionLLM``. It answers from the split's
+ground truth, missing ``--miss-per-1k`` of the entities per 1k document
+tokens, and takes time per token (scaled by ``--time-scale``). Its F1 is
+far above the zero-shot numbers in the README. The curve's shape is what
+the fake shows, not the absolute numbers. With ``--model`` the escalated
+documents go to a real Ollama server instead.
+
+Usage:
+    python src/tools/bench_cascade.py --documents 200
+    python src/tools/bench_cascade.py --model qwen2.5:7b --documents 50 --rates 0,0.25,0.5,1
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from prompt import PromptTemplate
+from utils.cascade import CascadeExtractor, llm_escalation
+from utils.evaluation import compute_comprehensive_metrics
+from utils.fakes import FakeExtractionLLM
+from utils.gazetteer import Gazetteer, GazetteerExtractor
+from utils.streaming import ollama_generate_stream
+
+
+class OllamaLLM:
+    """Minimal ``invoke`` adapter over Ollama's streaming endpoint"""
+
+    def __init__(self, model: str, host: str, options: dict):
+        self.model = model
+        self.host = host
+        self.options = options
+        self.calls = 0
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        self.calls += 1
+        return "".join(ollama_generate_stream(prompt, self.model, self.host, self.options))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="dev")
+    parser.add_argument("--documents", type=int, default=200, help="First N documents (0 for all)")
+    parser.add_argument("--rates", default="0,0.1,0.25,0.5,0.75,1",
+                        help="Comma-separated escalation rates")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--min-precision", type=float, default=0.5)
+    parser.add_argument("--miss-per-1k", type=float, default=0.5,
+                        help="FakeExtractionLLM miss probability per 1k document tokens")
+    parser.add_argument("--model", help="Ollama model (default: FakeExtractionLLM)")
+    parser.add_argument("--host", default="http://127.0.0.1:11434")
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Multiplier on FakeExtractionLLM's per-token times")
+    args = parser.parse_args()
+
+    loader = NERDataLoader()
+    gazetteer = Gazetteer.from_records(loader.load_split("train"), min_precision=args.min_precision)
+    records = loader.load_split(args.split)
+    if args.documents:
+        records = records[:args.documents]
+    texts = [r["text"] for r in records]
+    ground_truths = [r["ground_truth"] for r in records]
+
+    template = PromptTemplate("zero_shot")
+    if args.model:
+        llm = OllamaLLM(args.model, args.host, {"temperature": 0, "num_ctx": 4096})
+    else:
+        surfaces = {key: [e for gt in ground_truths for e in gt[key]] for key in ground_truths[0]}
+        llm = FakeExtractionLLM(surfaces, template, num_ctx=4096, miss_per_1k=args.miss_per_1k,
+                                prefill_per_token=0.0002 * args.time_scale,
+                                decode_per_token=0.02 * args.time_scale)
+    escalate = llm_escalation(llm, template.render, max_concurrency=args.concurrency)
+    fast = GazetteerExtractor(gazetteer)
+
+    cascade = CascadeExtractor(fast, escalate)
+    confidences = [cascade.score(text)[1] for text in texts]
+    certain = sum(c == 1.0 for c in confidences)
+    print(f"{len(texts)} '{args.split}' documents, gazetteer of {len(gazetteer)} train surfaces; "
+          f"{certain} documents fully covered (confidence 1.0); concurrency={args.concurrency}\n")
+
+    print(f"{'Mode':<18} {'Escalated':>10} {'LLM calls':>10} {'Wall (s)':>9} {'Docs/s':>8} "
+          f"{'Precision':>10} {'Recall':>7} {'F1':>6}")
+    print("-" * 84)
+    runs = [(f"cascade ({rate:g})", CascadeExtractor(fast, escalate, escalation_rate=rate))
+            for rate in (float(r) for r in args.rates.split(","))]
+    runs.append(("LLM only", CascadeExtractor(fast, escalate, escalation_rate=1.0, merge=False)))
+    for label, extractor in runs:
+        calls_before = llm.calls
+        start = time.perf_counter()
+        results = extractor.extract_many(texts)
+        wall = time.perf_counter() - start
+        overall = compute_comprehensive_metrics([r["entities"] for r in results],
+                                                ground_truths)["overall_entity_metrics"]
+        escalated = sum(r["escalated"] for r in results)
+        print(f"{label:<18} {escalated:>10} {llm.calls - calls_before:>10} {wall:>9.2f} "
+              f"{len(texts) / wall:>8.1f} {overall['precision']:>10.1f} {overall['recall']:>7.1f} "
+              f"{overall['f1']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: chunked vs whole-document extraction on the longest articles
+
+Extracts the longest test articles twice: whole-document prompts, and
+sentence chunks of at most ``--max-prompt-tokens`` extracted concurrently and
+merged (``ChunkedExtractor``). Reports, for each mode:
+
+- batch wall time, with all documents sharing ``--concurrency`` slots
+- mean latency of one document extracted on its own, where chunks run in
+  parallel
+- prompt tokens
+- precision/recall/F1 against the ground truth
+
+By default the model is ``FakeExtractionLLM``. It finds gazetteer entities in
+the part of the document that fits ``--num-ctx``, misses more of them on long
+inputs, and takes time per prompt and answer token (scaled by
+``--time-scale`` to keep the run short). With ``--model`` the
+prompts go to a real Ollama server instead.
+
+Usage:
+    python src/tools/bench_chunked_extraction.py --documents 20
+    python src/tools/bench_chunked_extraction.py --model qwen2.5:7b --num-ctx 4096
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from prompt import PromptTemplate
+from utils.chunked_extraction import ChunkedExtractor
+from utils.evaluation import compute_comprehensive_metrics
+from utils.fakes import FakeExtractionLLM
+from utils.streaming import ollama_generate_stream
+
+
+class OllamaLLM:
+    """Minimal ``invoke`` adapter over Ollama's streaming endpoint"""
+
+    def __init__(self, model: str, host: str, options: dict):
+        self.model = model
+        self.host = host
+        self.options = options
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        return "".join(ollama_generate_stream(prompt, self.model, self.host, self.options))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--documents", type=int, default=20, help="Longest N articles")
+    parser.add_argument("--max-prompt-tokens", type=int, default=1024)
+    parser.add_argument("--overlap-tokens", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--num-ctx", type=int, default=2048)
+    parser.add_argument("--model", help="Ollama model (default: FakeExtractionLLM)")
+    parser.add_argument("--host", default="http://127.0.0.1:11434")
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Multiplier on FakeExtractionLLM's per-token times")
+    args = parser.parse_args()
+
+    records = sorted(NERDataLoader().load_split(args.split), key=lambda r: len(r["text"]), reverse=True)
+    records = records[:args.documents]
+    texts = [r["text"] for r in records]
+    ground_truths = [r["ground_truth"] for r in records]
+
+    template = PromptTemplate("zero_shot")
+    if args.model:
+        llm = OllamaLLM(args.model, args.host, {"temperature": 0, "num_ctx": args.num_ctx})
+    else:
+        gazetteer = {key: [e for gt in ground_truths for e in gt[key]] for key in ground_truths[0]}
+        llm = FakeExtractionLLM(gazetteer, template, num_ctx=args.num_ctx,
+                                prefill_per_token=0.0002 * args.time_scale,
+                                decode_per_token=0.02 * args.time_scale)
+
+    doc_tokens = [template.count_tokens(t) for t in texts]
+    print(f"{len(texts)} longest '{args.split}' articles: {min(doc_tokens)}-{max(doc_tokens)} tokens, "
+          f"num_ctx={args.num_ctx}, concurrency={args.concurrency}\n")
+
+    modes = [
+        ("whole document", ChunkedExtractor(llm, template, max_prompt_tokens=10 ** 9,
+                                            max_concurrency=args.concurrency)),
+        (f"chunked ({args.max_prompt_tokens} tok)",
+         ChunkedExtractor(llm, template, args.max_prompt_tokens, args.overlap_tokens,
+                          max_concurrency=args.concurrency)),
+    ]
+    print(f"{'Mode':<22} {'Batch (s)':>10} {'1 doc (s)':>10} {'Calls':>6} {'Prompt tok':>11} "
+          f"{'Precision':>10} {'Recall':>7} {'F1':>6}")
+    print("-" * 88)
+    for label, extractor in modes:
+        start = time.perf_counter()
+        results = extractor.extract_many(texts)
+        wall = time.perf_counter() - start
+        single = sum(extractor.extract(t)["elapsed"] for t in texts) / len(texts)
+
+        chunks = [c for t in texts for c in extractor.chunks(t)]
+        prompt_tokens = sum(template.token_count(c) for c in chunks)
+        metrics = compute_comprehensive_metrics([r["entities"] for r in results], ground_truths)
+        overall = metrics["overall_entity_metrics"]
+        print(f"{label:<22} {wall:>10.2f} {single:>10.2f} {len(chunks):>6} {prompt_tokens:>11} "
+              f"{overall['precision']:>10.1f} {overall['recall']:>7.1f} {overall['f1']:>6.1f}")
+        failed = sum(r["failed_chunks"] for r in results)
+        if failed:
+            print(f"  {failed} chunk requests failed")
+
+
+if __name__ == "__main__":
+    main()
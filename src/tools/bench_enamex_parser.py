@@ -0,0 +1,149 @@
+"""Micro-benchmark: single-scan ENAMEX parser vs the iterative regex peel
+
+Parses every raw .muc/.txt file with both implementations, checks that the
+outputs (clean text, ground truth and title) are byte-identical, and reports
+the time per corpus pass.
+
+Usage:
+    python src/tools/bench_enamex_parser.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from process_data import (
+    ENAMEX_PATTERN,
+    ENTITY_KEY_MAP,
+    RAW_DIR,
+    SPLITS,
+    clean_text,
+    list_split_files,
+    parse_enamex,
+    strip_tags_and_collect_entities,
+)
+
+
+def regex_clean_text(text: str) -> str:
+    """Reference implementation: the original regex-based whitespace normalization."""
+    text = text.replace('\n', ' ')
+    text = text.replace('"', '')
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def iterative_strip_tags_and_collect_entities(text: str) -> Tuple[str, Dict[str, List[str]]]:
+    """Reference implementation: the original layer-by-layer regex peel."""
+    ground_truth = {"person": [], "organizations": [], "address": []}
+
+    current_text = text
+    while ENAMEX_PATTERN.search(current_text):
+        matches = list(ENAMEX_PATTERN.finditer(current_text))
+
+        for match in matches:
+            entity_type = match.group(1).strip().upper()
+            value = match.group(2).strip()
+
+            if '<' not in value:
+                key = ENTITY_KEY_MAP.get(entity_type)
+                if key and value and value not in ground_truth[key]:
+                    cleaned_value = regex_clean_text(value)
+                    if cleaned_value:
+                        ground_truth[key].append(cleaned_value)
+
+        current_text = ENAMEX_PATTERN.sub(lambda m: m.group(2), current_text)
+
+    return regex_clean_text(current_text), ground_truth
+
+
+def iterative_strip_title(title: str) -> str:
+    """Reference implementation of the original title tag removal."""
+    while ENAMEX_PATTERN.search(title):
+        title = ENAMEX_PATTERN.sub(lambda m: m.group(2).strip(), title)
+    return regex_clean_text(title)
+
+
+def load_corpus() -> List[Tuple[str, str]]:
+    """Read (title, body) for every raw file in all splits."""
+    corpus = []
+    for split in SPLITS:
+        for _, path in list_split_files(split):
+            lines = path.read_text(encoding="utf-8").split('\n', 1)
+            title = lines[0].strip() if lines else ""
+            body = lines[1].strip() if len(lines) > 1 else ""
+            corpus.append((title, body))
+    return corpus
+
+
+def nest_corpus(corpus: List[Tuple[str, str]], depth: int) -> List[Tuple[str, str]]:
+    """Wrap every tagged mention in ``depth - 1`` extra ORGANIZATION layers."""
+    wrap_open = '<ENAMEX TYPE="ORGANIZATION">' * (depth - 1)
+    wrap_close = '</ENAMEX>' * (depth - 1)
+    pattern = re.compile(r'<ENAMEX\s+TYPE="[^"]+">.*?</ENAMEX>', re.IGNORECASE | re.DOTALL)
+    return [
+        (title, pattern.sub(lambda m: wrap_open + m.group(0) + wrap_close, body))
+        for title, body in corpus
+    ]
+
+
+def check_parity(corpus: List[Tuple[str, str]]) -> int:
+    """Return the number of documents whose outputs differ."""
+    mismatches = 0
+    for title, body in corpus:
+        if strip_tags_and_collect_entities(body) != iterative_strip_tags_and_collect_entities(body):
+            mismatches += 1
+        elif clean_text(parse_enamex(title, strip_content=True)[0]) != iterative_strip_title(title):
+            mismatches += 1
+    return mismatches
+
+
+def time_pass(parse, corpus: List[Tuple[str, str]], repeat: int) -> float:
+    """Best-of-``repeat`` seconds for one pass over all bodies."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, body in corpus:
+            parse(body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes per implementation")
+    parser.add_argument("--depth", type=int, nargs="*", default=[4, 8],
+                        help="Also time a synthetic copy of the corpus nested this deep")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    size_mb = sum(len(t.encode("utf-8")) + len(b.encode("utf-8")) for t, b in corpus) / 1e6
+    print(f"Corpus: {len(corpus)} documents, {size_mb:.1f} MB from {RAW_DIR}")
+
+    mismatches = 0
+    for label, docs in [("raw corpus", corpus)] + [
+        (f"synthetic depth {depth}", nest_corpus(corpus, depth)) for depth in args.depth
+    ]:
+        print(f"\n[{label}]")
+        bad = check_parity(docs)
+        mismatches += bad
+        print(f"Parity:               {len(docs) - bad}/{len(docs)} documents identical")
+
+        iterative = time_pass(iterative_strip_tags_and_collect_entities, docs, args.repeat)
+        single = time_pass(strip_tags_and_collect_entities, docs, args.repeat)
+        print(f"Iterative regex peel: {iterative * 1000:8.1f} ms/pass")
+        print(f"Single-scan parser:   {single * 1000:8.1f} ms/pass")
+        print(f"Speedup:              {iterative / single:8.2f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
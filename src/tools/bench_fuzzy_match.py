@@ -0,0 +1,163 @@
+"""Benchmark: pruned fuzzy matcher vs the pairwise SequenceMatcher loop
+
+Builds noisy predictions for the dev split, checks that the matched sets are
+identical to the original nested loop for every (document, entity type) at
+several thresholds, and times one matching pass with a cold and a warm pair
+cache.
+
+``--check`` runs only the parity check, on the dev pairs plus hand-written
+edge cases, and exits non-zero on the first set that differs from the
+reference.
+
+Usage:
+    python src/tools/bench_fuzzy_match.py --merge 1 4
+    python src/tools/bench_fuzzy_match.py --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Callable, Dict, List, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import ENTITY_TYPES, NERDataLoader
+from utils.fakes import make_noisy_predictions
+from utils.fuzzy import _char_counts, fuzzy_match_entities, sequence_ratio
+
+THRESHOLDS = (0.5, 0.8, 0.9)
+
+# Sets where pruning bounds are tight or degenerate
+EDGE_CASES = [
+    (set(), set()),
+    ({"Hà Nội"}, set()),
+    (set(), {"Hà Nội"}),
+    ({"Hà Nội"}, {"Hà Nội"}),
+    ({"a"}, {"b"}),
+    ({"ab"}, {"ba"}),
+    ({"Nguyễn Văn A"}, {"Nguyễn Văn An", "Văn A", "nguyễn văn a"}),
+    ({"UBND tỉnh Quảng Nam", "Quảng Nam"}, {"UBND Quảng Nam", "Quảng Nam"}),
+    ({"x" * 40}, {"x" * 10, "x" * 36}),
+]
+
+
+def pairwise_fuzzy_match(pred_set: set, gt_set: set, similarity_threshold: float = 0.8) -> set:
+    """Reference implementation: the original nested SequenceMatcher loop"""
+    matched = set()
+    for pred_entity in pred_set:
+        for gt_entity in gt_set:
+            if SequenceMatcher(None, pred_entity, gt_entity).ratio() > similarity_threshold:
+                matched.add(gt_entity)
+                break
+    return matched
+
+
+def build_pairs(split: str, merge: int, seed: int) -> List[Tuple[set, set]]:
+    """(pred_set, gt_set) for every document and type
+
+    ``merge > 1`` pools the entities of ``merge`` consecutive documents to
+    simulate longer articles with more mentions per type.
+    """
+    gts = [record['ground_truth'] for record in NERDataLoader().load_split(split)]
+    preds = make_noisy_predictions(gts, seed=seed)
+
+    pairs = []
+    for start in range(0, len(gts), merge):
+        for entity_type in ENTITY_TYPES:
+            pred_set = {e for p in preds[start:start + merge] for e in p[entity_type]}
+            gt_set = {e for g in gts[start:start + merge] for e in g[entity_type]}
+            pairs.append((pred_set, gt_set))
+    return pairs
+
+
+def check_parity(pairs: List[Tuple[set, set]], thresholds=THRESHOLDS) -> int:
+    """Raise AssertionError unless the pruned matcher equals the reference on every pair
+
+    Returns:
+        Number of (pair, threshold) comparisons checked
+    """
+    for threshold in thresholds:
+        for pred_set, gt_set in pairs:
+            expected = pairwise_fuzzy_match(pred_set, gt_set, threshold)
+            actual = fuzzy_match_entities(pred_set, gt_set, threshold)
+            if actual != expected:
+                raise AssertionError(
+                    f"threshold {threshold}: pred={sorted(pred_set)} gt={sorted(gt_set)} "
+                    f"matched {sorted(actual)}, reference {sorted(expected)}"
+                )
+    return len(pairs) * len(thresholds)
+
+
+def time_pass(match: Callable[[set, set, float], Set[str]],
+              pairs: List[Tuple[set, set]],
+              threshold: float) -> float:
+    start = time.perf_counter()
+    for pred_set, gt_set in pairs:
+        match(pred_set, gt_set, threshold)
+    return time.perf_counter() - start
+
+
+def clear_caches() -> None:
+    sequence_ratio.cache_clear()
+    _char_counts.cache_clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="dev")
+    parser.add_argument("--merge", type=int, nargs="+", default=[1, 4],
+                        help="Pool entities of this many documents per comparison")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check", action="store_true",
+                        help="Only check parity with the reference; exit 1 on a mismatch")
+    args = parser.parse_args()
+
+    if args.check:
+        try:
+            checked = check_parity(EDGE_CASES)
+            for merge in args.merge:
+                checked += check_parity(build_pairs(args.split, merge, args.seed))
+        except AssertionError as error:
+            print(f"Parity check FAILED: {error}")
+            sys.exit(1)
+        print(f"Parity check passed: {checked} comparisons identical to the reference")
+        return
+
+    mismatches = 0
+    for merge in args.merge:
+        pairs = build_pairs(args.split, merge, args.seed)
+        comparisons = sum(len(p) * len(g) for p, g in pairs)
+        print(f"\n[{args.split}, {merge} doc(s) per comparison] "
+              f"{len(pairs)} set pairs, {comparisons} entity pairs")
+
+        results: Dict[float, Tuple[float, float, float]] = {}
+        for threshold in THRESHOLDS:
+            bad = sum(
+                fuzzy_match_entities(p, g, threshold) != pairwise_fuzzy_match(p, g, threshold)
+                for p, g in pairs
+            )
+            mismatches += bad
+            print(f"Parity @ {threshold}: {len(pairs) - bad}/{len(pairs)} identical")
+
+            clear_caches()
+            reference = time_pass(pairwise_fuzzy_match, pairs, threshold)
+            cold = time_pass(fuzzy_match_entities, pairs, threshold)
+            warm = time_pass(fuzzy_match_entities, pairs, threshold)
+            results[threshold] = (reference, cold, warm)
+
+        print(f"{'Threshold':<10} {'Pairwise (ms)':>14} {'Pruned cold (ms)':>17} "
+              f"{'Pruned warm (ms)':>17} {'Speedup (cold)':>15}")
+        for threshold, (reference, cold, warm) in results.items():
+            print(f"{threshold:<10} {reference * 1000:>14.1f} {cold * 1000:>17.1f} "
+                  f"{warm * 1000:>17.1f} {reference / cold:>14.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: gazetteer pre-tagger as a zero-LLM extractor
+
+Builds the ``Gazetteer`` from the train split, pickles and reloads it, and
+tags the dev split with ``GazetteerExtractor`` at several ``min_precision``
+values. Reports build/load time, docs/second and precision/recall/F1. It
+prints the LLM results recorded in the README (dev subsets, mistral:7b) for
+reference. Those were measured on 30-50 documents, not the full split.
+
+Usage:
+    python src/tools/bench_gazetteer.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.evaluation import compute_comprehensive_metrics
+from utils.gazetteer import Gazetteer, GazetteerExtractor
+
+# README tables: (F1, seconds per document)
+README_RESULTS = {
+    "Zero-shot (README)": (27.1, 2.18),
+    "Few-shot (README)": (33.8, 2.81),
+    "Chain-of-thought (README)": (33.3, 7.21),
+    "RAG (README)": (63.1, 2.18),
+    "Fine-tuned QLoRA (README)": (47.5, 2.18),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-precision", default="0,0.3,0.5,0.7",
+                        help="Comma-separated min_precision values")
+    args = parser.parse_args()
+
+    loader = NERDataLoader()
+    train = loader.load_split("train")
+    dev = loader.load_split("dev")
+    texts = [r["text"] for r in dev]
+    ground_truths = [r["ground_truth"] for r in dev]
+
+    print(f"Gazetteer from {len(train)} train articles, tagging {len(dev)} dev documents\n")
+    print(f"{'Method':<28} {'Surfaces':>9} {'Build (s)':>10} {'Load (ms)':>10} {'Docs/s':>9} "
+          f"{'P':>6} {'R':>6} {'F1':>6} {'PER':>6} {'ORG':>6} {'LOC':>6}")
+    print("-" * 112)
+    for min_precision in (float(p) for p in args.min_precision.split(",")):
+        start = time.perf_counter()
+        gazetteer = Gazetteer.from_records(train, min_precision=min_precision)
+        build = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as path:
+            gazetteer.save(f"{path}/gazetteer.pkl")
+            start = time.perf_counter()
+            gazetteer = Gazetteer.load(f"{path}/gazetteer.pkl")
+            load_ms = (time.perf_counter() - start) * 1000
+
+        extractor = GazetteerExtractor(gazetteer)
+        start = time.perf_counter()
+        predictions = extractor.extract_many(texts)
+        elapsed = time.perf_counter() - start
+
+        metrics = compute_comprehensive_metrics(predictions, ground_truths)
+        overall = metrics["overall_entity_metrics"]
+        per_type = [metrics["per_entity_type"][t]["f1"] for t in ("person", "organizations", "address")]
+        print(f"{f'gazetteer (p>={min_precision:g})':<28} {len(gazetteer):>9} {build:>10.2f} {load_ms:>10.1f} "
+              f"{len(texts) / elapsed:>9.0f} {overall['precision']:>6.1f} {overall['recall']:>6.1f} "
+              f"{overall['f1']:>6.1f} " + " ".join(f"{f:>6.1f}" for f in per_type))
+
+    for label, (f1, seconds) in README_RESULTS.items():
+        print(f"{label:<28} {'':>9} {'':>10} {'':>10} {1 / seconds:>9.2f} {'':>6} {'':>6} {f1:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark: dense vs lexical vs hybrid (RRF) retrieval of RAG examples
+
+The knowledge base is the train split: chunks in a ``NumpyVectorIndex``
+(``FakeEmbedder``), and a ``LexicalIndex`` over the same chunks and their
+ground-truth entity surfaces. For every dev query it retrieves ``--k``
+chunks (one per article) with each ``HybridRetriever`` mode and reports:
+
+- entity coverage per type: the share of the query's ground-truth entities
+  that occur in the retrieved examples (the examples the LLM gets to see)
+- latency per query, including the query embedding call (``--embed-ms``,
+  the round-trip to Ollama) where the mode needs one
+- lexical index size on disk, load time and first-query time
+
+FakeEmbedder is a hashed bag of words, so its "dense" ranking is itself
+close to lexical. The coverage gap to a real embedding model is larger.
+
+Usage:
+    python src/tools/bench_hybrid_retrieval.py --k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.fakes import FakeEmbedder
+from utils.lexical_index import HybridRetriever, LexicalIndex, chunk_entity_surfaces
+from utils.rag_ingestion import KnowledgeBaseIngestor
+from utils.vector_index import NumpyVectorIndex
+
+ENTITY_TYPES = ("person", "organizations", "address")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--embed-ms", type=float, default=30.0, help="Query embedding round-trip")
+    parser.add_argument("--rrf-k", type=int, default=60)
+    args = parser.parse_args()
+
+    loader = NERDataLoader()
+    train = loader.load_split("train")
+    articles = [{"id": str(r["id"]), "text": r["text"]} for r in train]
+    ground_truth = {str(r["id"]): r["ground_truth"] for r in train}
+
+    dense = NumpyVectorIndex()
+    KnowledgeBaseIngestor(dense, FakeEmbedder(), workers=1, progress=lambda *a: None).ingest(articles)
+    meta = dense.meta
+    entities = [chunk_entity_surfaces(text, ground_truth[m["doc_id"]])
+                for text, m in zip(meta["texts"], meta["metadatas"])]
+
+    dev = loader.load_split("dev")
+    queries = [r["text"][:1500] for r in dev]
+
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        LexicalIndex.build(meta["ids"], meta["texts"], meta["metadatas"], entities).save(path)
+        build_s = time.perf_counter() - start
+        size_mb = sum(f.stat().st_size for f in Path(path).iterdir()) / 2 ** 20
+
+        start = time.perf_counter()
+        lexical = LexicalIndex.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        lexical.ranked_rows(queries[0], 50)
+        first_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{len(dense)} train chunks, {len(queries)} dev queries, k={args.k}, one chunk per article")
+        print(f"Lexical index: built in {build_s:.1f} s, {size_mb:.1f} MB on disk, "
+              f"load {load_ms:.2f} ms, first query {first_ms:.0f} ms (reads on demand)\n")
+
+        embedder = FakeEmbedder(delay_per_call=args.embed_ms / 1000)
+        dense.embedder = embedder
+        print(f"{'Mode':<9} {'Mean (ms)':>10} {'p95 (ms)':>9} {'Embeds':>7} "
+              + " ".join(f"{t:>13}" for t in ENTITY_TYPES) + f" {'all':>6}")
+        print("-" * 90)
+        for mode in ("dense", "lexical", "hybrid"):
+            retriever = HybridRetriever(lexical, dense, embedder, mode=mode, rrf_k=args.rrf_k)
+            calls_before = embedder.calls
+            times = []
+            found = {t: 0 for t in ENTITY_TYPES}
+            total = {t: 0 for t in ENTITY_TYPES}
+            for query, record in zip(queries, dev):
+                start = time.perf_counter()
+                chunks = retriever.similarity_search(query, k=args.k, max_per_doc=1)
+                times.append(time.perf_counter() - start)
+                context = "\n".join(chunk.page_content for chunk in chunks)
+                for entity_type in ENTITY_TYPES:
+                    surfaces = set(record["ground_truth"].get(entity_type, []))
+                    total[entity_type] += len(surfaces)
+                    found[entity_type] += sum(surface in context for surface in surfaces)
+            coverage = [100 * found[t] / max(total[t], 1) for t in ENTITY_TYPES]
+            overall = 100 * sum(found.values()) / max(sum(total.values()), 1)
+            p95 = sorted(times)[int(len(times) * 0.95)]
+            print(f"{mode:<9} {statistics.mean(times) * 1000:>10.2f} {p95 * 1000:>9.2f} "
+                  f"{embedder.calls - calls_before:>7} " + " ".join(f"{c:>12.1f}%" for c in coverage)
+                  + f" {overall:>5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Check: LLM calls in flight never exceed the semaphore, even on timeouts
+
+Sends ``--requests`` prompts through ``invoke_llm`` under a
+``Semaphore(--concurrency)`` with a ``--timeout`` far shorter than the
+model's ``--delay``, the way the extractors and the rewrite engine call it.
+The model is sync-only (``invoke``), so every call runs in a worker thread
+that cannot be cancelled. It counts how many ``invoke`` calls run at once:
+
+- the bare model (``invoke_llm``'s thread fallback)
+- the model wrapped in ``CachedLLM`` (its ``ainvoke`` sync fallback)
+
+Exits 1 if either peak exceeds ``--concurrency``.
+
+Usage:
+    python src/tools/bench_llm_concurrency.py --concurrency 2 --requests 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.llm_cache import CachedLLM, LLMResponseCache
+from utils.llm_calls import invoke_llm
+
+
+class SlowSyncLLM:
+    """Sync-only model that records how many calls run at once"""
+
+    def __init__(self, delay: float):
+        self.model = "slow-sync"
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return '{"person": [], "organizations": [], "address": []}'
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+async def run(llm: Any, requests: int, concurrency: int, timeout: float) -> int:
+    """Number of requests that timed out"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i: int) -> bool:
+        async with semaphore:
+            try:
+                await invoke_llm(llm, f"prompt {i}", timeout)
+                return False
+            except asyncio.TimeoutError:
+                return True
+
+    return sum(await asyncio.gather(*(call(i) for i in range(requests))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds per invoke call")
+    parser.add_argument("--timeout", type=float, default=0.05, help="Seconds per request")
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, Semaphore({args.concurrency}), "
+          f"{args.delay:g} s calls, {args.timeout:g} s timeout\n")
+    print(f"{'Model':<12} {'Timed out':>10} {'Peak in flight':>15} {'Wall (s)':>9}")
+    print("-" * 50)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as cache_dir:
+        bare = SlowSyncLLM(args.delay)
+        cached_model = SlowSyncLLM(args.delay)
+        for label, llm, model in (("bare", bare, bare),
+                                  ("CachedLLM", CachedLLM(cached_model, LLMResponseCache(cache_dir)),
+                                   cached_model)):
+            start = time.perf_counter()
+            timed_out = asyncio.run(run(llm, args.requests, args.concurrency, args.timeout))
+            wall = time.perf_counter() - start
+            print(f"{label:<12} {timed_out:>10} {model.peak:>15} {wall:>9.2f}")
+            failed |= model.peak > args.concurrency
+
+    if failed:
+        print(f"\nFAILED: more than {args.concurrency} calls in flight")
+        sys.exit(1)
+    print(f"\nOK: at most {args.concurrency} calls in flight")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Benchmark: json.load of a whole split vs the streaming JSONL loader
+
+Each mode runs in a fresh subprocess so peak RSS is measured in isolation.
+Reports time-to-first-record, full-pass time, peak RSS growth and the cost of
+random access through the offset index.
+
+Usage:
+    python src/tools/bench_loader.py --split train --scale 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data.loader import DATA_DIR, NERDataLoader
+
+MODES = ("load_split", "iter_split", "get_record")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB
+
+    Prefers VmHWM: Linux carries ru_maxrss over from the parent across exec,
+    which would hide the child's own peak.
+    """
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def run_mode(mode: str, data_dir: Path, split: str, samples: int) -> Dict[str, float]:
+    """Time one access pattern; called inside a dedicated subprocess"""
+    loader = NERDataLoader(data_dir)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    result = {}
+
+    if mode == "load_split":
+        records = loader.load_split(split)
+        result["first_record_s"] = time.perf_counter() - start
+        entities = sum(len(v) for r in records for v in r["ground_truth"].values())
+        result["records"] = len(records)
+    elif mode == "iter_split":
+        entities = 0
+        count = 0
+        for record in loader.iter_split(split):
+            if count == 0:
+                result["first_record_s"] = time.perf_counter() - start
+            entities += sum(len(v) for v in record["ground_truth"].values())
+            count += 1
+        result["records"] = count
+    else:
+        count = loader.num_records(split)
+        indices = random.Random(0).sample(range(count), min(samples, count))
+        entities = 0
+        for i, index in enumerate(indices):
+            record = loader.get_record(split, index)
+            if i == 0:
+                result["first_record_s"] = time.perf_counter() - start
+            entities += sum(len(v) for v in record["ground_truth"].values())
+        result["records"] = len(indices)
+
+    result["total_s"] = time.perf_counter() - start
+    result["entities"] = entities
+    result["peak_rss_mb"] = peak_rss_mb() - baseline
+    return result
+
+
+def prepare_scaled_split(split: str, scale: int, workdir: Path) -> Path:
+    """Write ``scale`` concatenated copies of a split (JSON and JSONL) to ``workdir``"""
+    records = NERDataLoader(DATA_DIR).load_split(split)
+    scaled = [dict(r, id=f"{r['id']}-{copy}") for copy in range(scale) for r in records]
+    (workdir / f"{split}.json").write_text(
+        json.dumps(scaled, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    # Build the JSONL copy and index up front so it is not timed
+    NERDataLoader(workdir).num_records(split)
+    return workdir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Concatenate this many copies of the split to simulate a larger corpus")
+    parser.add_argument("--samples", type=int, default=1000,
+                        help="Random records fetched in get_record mode")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.data_dir, args.split, args.samples)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = prepare_scaled_split(args.split, args.scale, Path(tmp))
+        size_mb = (data_dir / f"{args.split}.json").stat().st_size / 1e6
+        print(f"Split '{args.split}' x{args.scale}: {size_mb:.1f} MB JSON")
+
+        results = {}
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--data-dir", str(data_dir),
+                 "--split", args.split, "--samples", str(args.samples)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"\n{'Mode':<12} {'Records':>8} {'First (ms)':>11} {'Total (s)':>10} {'Peak RSS (MB)':>14}")
+    print("-" * 59)
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['records']:>8} {r['first_record_s'] * 1000:>11.1f} "
+              f"{r['total_s']:>10.3f} {r['peak_rss_mb']:>14.1f}")
+
+    if results["load_split"]["entities"] != results["iter_split"]["entities"]:
+        print("Entity counts differ between load_split and iter_split")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
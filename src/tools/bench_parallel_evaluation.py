@@ -0,0 +1,82 @@
+"""Benchmark: sharded process-pool evaluation vs the serial metrics path
+
+Scores noisy predictions for a (replicated) split with
+``compute_comprehensive_metrics`` and with ``evaluate_parallel`` at several
+worker counts, streaming the latter from a JSONL file. Fails if any result
+differs from the serial one.
+
+Usage:
+    python src/tools/bench_parallel_evaluation.py --scale 10 --workers 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.evaluation import compute_comprehensive_metrics
+from utils.fakes import make_noisy_predictions
+from utils.fuzzy import _char_counts, sequence_ratio
+from utils.parallel_evaluation import evaluate_parallel, iter_jsonl
+
+
+def clear_caches() -> None:
+    """Start every run cold (forked workers would otherwise inherit the parent's cache)"""
+    sequence_ratio.cache_clear()
+    _char_counts.cache_clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--scale", type=int, default=10,
+                        help="Replicate the split this many times (distinct noise per copy)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    gts = [r["ground_truth"] for r in NERDataLoader().load_split(args.split)]
+    ground_truths = gts * args.scale
+    predictions = [p for copy in range(args.scale) for p in make_noisy_predictions(gts, seed=copy)]
+    print(f"Split '{args.split}' x{args.scale}: {len(ground_truths)} documents")
+
+    clear_caches()
+    start = time.perf_counter()
+    serial = compute_comprehensive_metrics(predictions, ground_truths,
+                                           similarity_threshold=args.threshold)
+    serial_time = time.perf_counter() - start
+    print(f"\n{'Mode':<20} {'Time (s)':>9} {'Speedup':>8} {'Identical':>10}")
+    print("-" * 50)
+    print(f"{'serial':<20} {serial_time:>9.2f} {1:>7.1f}x {'-':>10}")
+
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "predictions.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for pred in predictions:
+                f.write(json.dumps(pred, ensure_ascii=False) + "\n")
+
+        for workers in args.workers:
+            clear_caches()
+            start = time.perf_counter()
+            result = evaluate_parallel(iter_jsonl(path), iter(ground_truths),
+                                       similarity_threshold=args.threshold, workers=workers)
+            elapsed = time.perf_counter() - start
+            same = result == serial
+            mismatches += not same
+            print(f"{f'{workers} workers (jsonl)':<20} {elapsed:>9.2f} "
+                  f"{serial_time / elapsed:>7.1f}x {str(same):>10}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
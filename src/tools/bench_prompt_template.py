@@ -0,0 +1,84 @@
+"""Benchmark: compiled PromptTemplate vs calling the build_* functions
+
+Renders a prompt for every document with each strategy, once through the
+builder functions and once through a ``PromptTemplate`` compiled for the same
+examples. Fails if any prompt differs.
+
+Usage:
+    python src/tools/bench_prompt_template.py --documents 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from prompt import (
+    PromptTemplate,
+    build_chain_of_thought_prompt,
+    build_custom_prompt,
+    build_few_shot_prompt,
+    build_zero_shot_prompt,
+)
+
+
+def best_time(render, texts, repeat: int):
+    """Best-of-``repeat`` seconds to render every text, plus the last output"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        prompts = [render(t) for t in texts]
+        best = min(best, time.perf_counter() - start)
+    return best, prompts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    loader = NERDataLoader()
+    dev = [r["text"] for r in loader.load_split("dev")]
+    texts = [dev[i % len(dev)] for i in range(args.documents)]
+    examples = [{"input": r["text"], "output": r["ground_truth"]} for r in loader.load_split("train")[:3]]
+    rules = ["Keep Vietnamese accents", "Do not translate entities"]
+
+    strategies = [
+        ("zero_shot", lambda t: build_zero_shot_prompt(t), {}),
+        ("few_shot", lambda t: build_few_shot_prompt(t, examples), {"examples": examples}),
+        ("chain_of_thought", lambda t: build_chain_of_thought_prompt(t), {}),
+        ("custom", lambda t: build_custom_prompt(t, "Extract entities.", examples, rules),
+         {"examples": examples, "instruction": "Extract entities.", "rules": rules}),
+    ]
+
+    print(f"{len(texts)} documents\n")
+    print(f"{'Strategy':<18} {'Builder (ms)':>13} {'Template (ms)':>14} {'Compile (ms)':>13} "
+          f"{'Speedup':>8} {'Static tok':>11} {'Identical':>10}")
+    print("-" * 93)
+    mismatches = 0
+    for name, build, options in strategies:
+        builder_time, built = best_time(build, texts, args.repeat)
+
+        start = time.perf_counter()
+        template = PromptTemplate(name, **options)
+        compile_time = time.perf_counter() - start
+        render_time, rendered = best_time(template.render, texts, args.repeat)
+
+        same = built == rendered
+        mismatches += not same
+        print(f"{name:<18} {builder_time * 1000:>13.1f} {render_time * 1000:>14.1f} "
+              f"{compile_time * 1000:>13.2f} {builder_time / render_time:>7.1f}x "
+              f"{template.static_tokens:>11} {str(same):>10}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
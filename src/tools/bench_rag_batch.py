@@ -0,0 +1,95 @@
+"""Benchmark: per-document RAG extraction vs batch_extract_with_rag
+
+Runs the dev split through ``RAGNERExtractor`` twice: ``extract_with_rag``
+one document at a time (one embedding round-trip, one search and one LLM
+call each), and ``batch_extract_with_rag`` (batched embedding, one batched
+search, concurrent LLM calls). The knowledge base is the train split in a
+``NumpyVectorIndex``. ``FakeEmbedder`` and ``FakeLLM`` take ``--embed-call-ms``
++ ``--embed-text-ms`` per text and ``--llm-ms`` per call (times
+``--time-scale``). The prompts of both paths are checked to be identical.
+Prints the ``PerformanceMonitor`` stage summary of the batched run.
+
+Usage:
+    python src/tools/bench_rag_batch.py --documents 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.fakes import FakeEmbedder, FakeLLM
+from utils.rag import PerformanceMonitor, RAGNERExtractor
+from utils.rag_ingestion import KnowledgeBaseIngestor
+from utils.vector_index import NumpyVectorIndex
+
+EMPTY_ANSWER = '{"person": [], "organizations": [], "address": []}'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100, help="First N dev documents (0 for all)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--embed-call-ms", type=float, default=20.0)
+    parser.add_argument("--embed-text-ms", type=float, default=4.0)
+    parser.add_argument("--llm-ms", type=float, default=2000.0)
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    args = parser.parse_args()
+
+    loader = NERDataLoader()
+    articles = [{"id": str(r["id"]), "text": r["text"]} for r in loader.load_split("train")]
+    index = NumpyVectorIndex()
+    KnowledgeBaseIngestor(index, FakeEmbedder(), workers=1, progress=lambda *a: None).ingest(articles)
+
+    texts = [r["text"] for r in loader.load_split("dev")]
+    if args.documents:
+        texts = texts[:args.documents]
+
+    def run(batched: bool):
+        prompts = []
+        lock = threading.Lock()
+
+        def answer(prompt):
+            with lock:
+                prompts.append(prompt)
+            return EMPTY_ANSWER
+
+        embedder = FakeEmbedder(delay_per_call=args.embed_call_ms / 1000 * args.time_scale,
+                                delay_per_text=args.embed_text_ms / 1000 * args.time_scale)
+        index.embedder = embedder
+        monitor = PerformanceMonitor()
+        extractor = RAGNERExtractor(embedder, index, top_k_retrieval=args.top_k, monitor=monitor,
+                                    llm=FakeLLM(answer, delay=args.llm_ms / 1000 * args.time_scale))
+        start = time.perf_counter()
+        if batched:
+            extractor.batch_extract_with_rag(texts, max_concurrency=args.concurrency)
+        else:
+            for text in texts:
+                extractor.extract_with_rag(text)
+        return time.perf_counter() - start, embedder.calls, sorted(prompts), monitor
+
+    serial_time, serial_calls, serial_prompts, _ = run(batched=False)
+    batch_time, batch_calls, batch_prompts, monitor = run(batched=True)
+
+    print(f"{len(texts)} dev documents, {len(index)} train chunks, top_k={args.top_k}, "
+          f"LLM {args.llm_ms * args.time_scale:g} ms/call\n")
+    print(f"{'Mode':<26} {'Time (s)':>9} {'Docs/s':>8} {'Embed calls':>12}")
+    print("-" * 58)
+    print(f"{'extract_with_rag loop':<26} {serial_time:>9.2f} {len(texts) / serial_time:>8.1f} {serial_calls:>12}")
+    print(f"{'batch_extract_with_rag':<26} {batch_time:>9.2f} {len(texts) / batch_time:>8.1f} {batch_calls:>12}")
+    print(f"\nPrompts identical: {serial_prompts == batch_prompts}\n")
+
+    print(f"{'Stage':<16} {'Count':>6} {'Mean (ms)':>10} {'Max (ms)':>9}")
+    for row in monitor.summary():
+        print(f"{row['Operation']:<16} {row['Count']:>6} {row['Mean (ms)']:>10.2f} {row['Max (ms)']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
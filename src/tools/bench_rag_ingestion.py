@@ -0,0 +1,103 @@
+"""Benchmark: knowledge-base ingestion, one chunk per call vs batched with a cache
+
+Ingests train articles into an in-memory store four ways:
+
+- one chunk per embedder call, chunked in-process, no cache (the 03_RAG
+  notebook's loop)
+- batched calls (``--batch-size`` texts, ``--concurrency`` in flight) with
+  chunking on ``--workers`` processes, into an empty embedding cache
+- the same again with the now warm cache (collection rebuild)
+- a rebuild after editing ``--changed`` of the articles
+
+The embedder is ``FakeEmbedder``. Each call costs ``--call-ms`` plus
+``--text-ms`` per text (scaled by ``--time-scale``), and the vectors are
+deterministic. Reports chunks/second, embedder calls and texts embedded.
+
+Usage:
+    python src/tools/bench_rag_ingestion.py --articles 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.fakes import FakeEmbedder
+from utils.rag_ingestion import EmbeddingCache, KnowledgeBaseIngestor, VietnameseDocumentChunker
+
+
+class MemoryStore:
+    """Vector store stand-in: upserts into a dict"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def add_embeddings(self, ids, texts, embeddings, metadatas):
+        for doc_id, text, vector, metadata in zip(ids, texts, embeddings, metadatas):
+            self.entries[doc_id] = (text, vector, metadata)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=2000, help="First N train articles (0 for all)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--changed", type=float, default=0.05, help="Fraction of articles edited")
+    parser.add_argument("--call-ms", type=float, default=20.0, help="Embedder cost per call")
+    parser.add_argument("--text-ms", type=float, default=4.0, help="Embedder cost per text")
+    parser.add_argument("--time-scale", type=float, default=0.1)
+    args = parser.parse_args()
+
+    records = NERDataLoader().load_split("train")
+    if args.articles:
+        records = records[:args.articles]
+    articles = [{"id": str(r["id"]), "text": r["text"], "source": "vlsp_2018_train",
+                 "domain": r.get("topic", "general")} for r in records]
+    n_changed = int(len(articles) * args.changed)
+    edited = [dict(a, text=a["text"] + " Cập nhật.") if i < n_changed else a
+              for i, a in enumerate(articles)]
+
+    def embedder():
+        return FakeEmbedder(delay_per_call=args.call_ms / 1000 * args.time_scale,
+                            delay_per_text=args.text_ms / 1000 * args.time_scale)
+
+    chunker = VietnameseDocumentChunker()
+    print(f"{len(articles)} train articles; embedder {args.call_ms:g} ms/call + "
+          f"{args.text_ms:g} ms/text x {args.time_scale:g}\n")
+    print(f"{'Mode':<34} {'Time (s)':>9} {'Chunks':>7} {'Chunks/s':>9} {'Calls':>6} {'Embedded':>9}")
+    print("-" * 80)
+
+    def run(label, ingestor, batch):
+        start = time.perf_counter()
+        stats = ingestor.ingest(batch)
+        wall = time.perf_counter() - start
+        print(f"{label:<34} {wall:>9.2f} {stats['chunks_created']:>7} "
+              f"{stats['chunks_created'] / wall:>9.1f} {ingestor.embedder.calls:>6} "
+              f"{ingestor.embedder.texts_embedded:>9}")
+
+    quiet = lambda done, total, rate: None
+    run("1 chunk / call, serial", KnowledgeBaseIngestor(
+        MemoryStore(), embedder(), chunker, batch_size=1, max_concurrency=1, workers=1,
+        progress=quiet), articles)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        def batched():
+            return KnowledgeBaseIngestor(
+                MemoryStore(), embedder(), chunker, EmbeddingCache(cache_dir, model="fake"),
+                batch_size=args.batch_size, max_concurrency=args.concurrency,
+                workers=args.workers, progress=quiet)
+
+        run(f"batched {args.batch_size} x {args.concurrency}, cold cache", batched(), articles)
+        run("batched, warm cache (rebuild)", batched(), articles)
+        run(f"batched, {args.changed:.0%} articles edited", batched(), edited)
+
+
+if __name__ == "__main__":
+    main()
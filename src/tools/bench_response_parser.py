@@ -0,0 +1,146 @@
+"""Benchmark: linear JSON extractor vs the nested-brace regex parser
+
+Parses a corpus of LLM responses with both implementations and reports
+throughput (overall and per response style), parse-status counts, and how
+often each parser recovers the expected entities. By default the corpus is synthesized from dev
+ground truth with ``make_fake_responses``. Recorded responses can be passed
+as JSONL (one ``{"response": ...}`` per line, optionally with ``"style"``).
+
+Usage:
+    python src/tools/bench_response_parser.py
+    python src/tools/bench_response_parser.py --responses outputs/responses.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.fakes import make_fake_responses
+from utils.parallel_evaluation import iter_jsonl
+from utils.response_parser import parse_ner_response_with_status
+
+
+def regex_parse_ner_response(response_text: str) -> Dict[str, List[str]]:
+    """Reference implementation: fence stripping plus the nested-brace regex"""
+    default_result = {"person": [], "organizations": [], "address": []}
+
+    cleaned_text = response_text.strip()
+    if cleaned_text.startswith('```'):
+        first_newline = cleaned_text.find('\n')
+        if first_newline != -1:
+            cleaned_text = cleaned_text[first_newline + 1:]
+    if '```' in cleaned_text:
+        cleaned_text = cleaned_text[:cleaned_text.rfind('```')]
+    cleaned_text = cleaned_text.strip()
+
+    json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', cleaned_text, re.DOTALL)
+    if not json_match:
+        return default_result
+    try:
+        parsed = json.loads(json_match.group())
+        result = {
+            "person": parsed.get("person", []),
+            "organizations": parsed.get("organizations", parsed.get("organization", [])),
+            "address": parsed.get("address", parsed.get("addresses", [])),
+        }
+        for key in result:
+            if not isinstance(result[key], list):
+                result[key] = [str(result[key])] if result[key] else []
+        return result
+    except json.JSONDecodeError:
+        return default_result
+
+
+def time_parser(parse: Callable[[str], object], responses: List[str], repeat: int) -> float:
+    """Best-of-``repeat`` seconds for one pass over the corpus"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for response in responses:
+            parse(response)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def pathological_responses(count: int, size: int) -> List[str]:
+    """Chain-of-thought text with many unclosed braces before the answer"""
+    prose = "Xét cụm {từ " * (size // 12)
+    answer = '{"person": ["Nguyễn Văn A"], "organizations": [], "address": ["Hà Nội"]}'
+    return [f"{prose}\n{answer}"] * count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--responses", type=Path, help="JSONL file of recorded responses")
+    parser.add_argument("--split", default="dev")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pathological-size", type=int, default=4000,
+                        help="Characters of unclosed-brace prose per pathological response")
+    args = parser.parse_args()
+
+    expected = None
+    if args.responses:
+        records = list(iter_jsonl(args.responses))
+    else:
+        gts = [r["ground_truth"] for r in NERDataLoader().load_split(args.split)]
+        records = make_fake_responses(gts)
+        expected = gts
+    responses = [r["response"] for r in records]
+    size_mb = sum(len(r.encode("utf-8")) for r in responses) / 1e6
+    print(f"Corpus: {len(responses)} responses, {size_mb:.2f} MB")
+
+    # Status breakdown and recovery per style
+    statuses = Counter()
+    recovered = Counter()
+    for i, record in enumerate(records):
+        style = record.get("style", "recorded")
+        result = parse_ner_response_with_status(record["response"])
+        statuses[(style, result.status.value)] += 1
+        if expected is not None:
+            recovered[(style, "linear")] += result.entities == expected[i]
+            recovered[(style, "regex")] += regex_parse_ner_response(record["response"]) == expected[i]
+
+    print(f"\n{'Style':<18} {'Status':<14} {'Count':>6}")
+    print("-" * 40)
+    for (style, status), count in sorted(statuses.items()):
+        print(f"{style:<18} {status:<14} {count:>6}")
+
+    if expected is not None:
+        styles = sorted({style for style, _ in recovered})
+        print(f"\n{'Style':<18} {'Regex exact':>12} {'Linear exact':>13}")
+        print("-" * 45)
+        for style in styles:
+            print(f"{style:<18} {recovered[(style, 'regex')]:>12} {recovered[(style, 'linear')]:>13}")
+
+    by_style: Dict[str, List[str]] = {}
+    for record in records:
+        by_style.setdefault(record.get("style", "recorded"), []).append(record["response"])
+
+    print(f"\n{'Corpus':<22} {'Regex (ms)':>11} {'Linear (ms)':>12} {'Linear MB/s':>12} {'Speedup':>8}")
+    print("-" * 69)
+    corpora = [("all responses", responses)]
+    if len(by_style) > 1:
+        corpora += sorted(by_style.items())
+    corpora.append(
+        (f"unclosed braces x{args.pathological_size}", pathological_responses(20, args.pathological_size))
+    )
+    for label, corpus in corpora:
+        regex = time_parser(regex_parse_ner_response, corpus, args.repeat)
+        linear = time_parser(parse_ner_response_with_status, corpus, args.repeat)
+        mb = sum(len(r.encode("utf-8")) for r in corpus) / 1e6
+        print(f"{label:<22} {regex * 1000:>11.1f} {linear * 1000:>12.1f} "
+              f"{mb / linear:>12.1f} {regex / linear:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: streamed extraction with early stop vs waiting for the full response
+
+Serves synthesized chain-of-thought answers from ``FakeOllamaServer`` (one
+token every ``--token-delay`` seconds) and extracts each one twice: once
+consuming the whole stream, once with ``stream_extract`` closing it as soon as
+the JSON object is complete. Reports tokens and latency saved per request and
+in total. Fails if the two modes extract different entities.
+
+Usage:
+    python src/tools/bench_streaming_extraction.py --limit 40 --token-delay 0.005
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from prompt import build_chain_of_thought_prompt
+from utils.fakes import FakeOllamaServer, make_fake_response
+from utils.streaming import ollama_generate_stream, stream_extract
+
+COMMENTARY = (
+    " Lưu ý: các chức danh như \"ông\", \"bà\" không được tính là một phần của tên."
+    " Tên tổ chức được giữ nguyên như trong văn bản."
+    " Các địa danh bao gồm tỉnh, thành phố và quốc gia."
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="dev")
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--token-delay", type=float, default=0.002,
+                        help="Seconds per generated token on the fake server")
+    parser.add_argument("--commentary", type=int, default=2,
+                        help="Commentary paragraphs the model adds after the JSON")
+    parser.add_argument("--show", type=int, default=10, help="Per-request rows to print")
+    args = parser.parse_args()
+
+    records = NERDataLoader().load_split(args.split)[:args.limit]
+    rng = random.Random(42)
+    responses = {}
+    for i, record in enumerate(records):
+        style = ("chain_of_thought", "trailing", "plain")[i % 3]
+        answer = make_fake_response(record["ground_truth"], style, rng)
+        responses[build_chain_of_thought_prompt(record["text"])] = answer + COMMENTARY * args.commentary
+
+    rows = []
+    mismatches = 0
+    with FakeOllamaServer(responses.__getitem__, token_delay=args.token_delay) as server:
+        for prompt in responses:
+            full = stream_extract(ollama_generate_stream(prompt, "fake", host=server.url), early_stop=False)
+            early = stream_extract(ollama_generate_stream(prompt, "fake", host=server.url))
+            mismatches += full.entities != early.entities
+            rows.append((full, early))
+        time.sleep(0.05)  # let the server log the cancelled streams
+        generated = [log["tokens_sent"] for log in server.requests[1::2]]
+
+    print(f"{len(rows)} requests, {args.token_delay * 1000:.1f} ms/token\n")
+    print(f"{'#':>3} {'Full tok':>9} {'Early tok':>10} {'Saved':>6} "
+          f"{'Full ms':>8} {'Early ms':>9} {'Saved ms':>9} {'Server tok':>11}")
+    print("-" * 72)
+    for i, ((full, early), sent) in enumerate(zip(rows, generated)):
+        if i < args.show:
+            print(f"{i:>3} {full.tokens:>9} {early.tokens:>10} {full.tokens - early.tokens:>6} "
+                  f"{full.elapsed * 1000:>8.0f} {early.elapsed * 1000:>9.0f} "
+                  f"{(full.elapsed - early.elapsed) * 1000:>9.0f} {sent:>11}")
+
+    full_tokens = sum(full.tokens for full, _ in rows)
+    early_tokens = sum(early.tokens for _, early in rows)
+    full_time = sum(full.elapsed for full, _ in rows)
+    early_time = sum(early.elapsed for _, early in rows)
+    print("-" * 72)
+    print(f"Tokens:  {full_tokens} -> {early_tokens} "
+          f"({(full_tokens - early_tokens) / full_tokens:.0%} saved, "
+          f"{(full_tokens - early_tokens) / len(rows):.1f} per request)")
+    print(f"Latency: {full_time:.2f} s -> {early_time:.2f} s "
+          f"({(full_time - early_time) / full_time:.0%} saved, "
+          f"{(full_time - early_time) / len(rows) * 1000:.0f} ms per request)")
+    print(f"Server generated {sum(generated)} tokens for the early-stopped requests")
+    print(f"Stopped early: {sum(early.stopped_early for _, early in rows)}/{len(rows)}, "
+          f"entity mismatches: {mismatches}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: one-pass threshold sweep vs re-evaluating per threshold
+
+Re-evaluating means calling ``compute_comprehensive_metrics`` once per
+threshold with a cold pair cache, as separate runs would. ``ThresholdSweep``
+computes similarities once and scores every threshold from them. The script
+fails if any threshold's result differs.
+
+Usage:
+    python src/tools/bench_threshold_sweep.py --split test --scale 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.evaluation import compute_comprehensive_metrics
+from utils.fakes import make_noisy_predictions
+from utils.fuzzy import _char_counts, sequence_ratio
+from utils.threshold_sweep import ThresholdSweep
+
+
+def clear_caches() -> None:
+    sequence_ratio.cache_clear()
+    _char_counts.cache_clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Replicate the split this many times (distinct noise per copy)")
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=[round(t, 2) for t in np.arange(0.5, 0.96, 0.05)])
+    args = parser.parse_args()
+
+    gts = [r["ground_truth"] for r in NERDataLoader().load_split(args.split)]
+    ground_truths = gts * args.scale
+    predictions = [p for copy in range(args.scale) for p in make_noisy_predictions(gts, seed=copy)]
+    print(f"Split '{args.split}' x{args.scale}: {len(ground_truths)} documents, "
+          f"{len(args.thresholds)} thresholds")
+
+    start = time.perf_counter()
+    reference = {}
+    for threshold in args.thresholds:
+        clear_caches()
+        reference[threshold] = compute_comprehensive_metrics(
+            predictions, ground_truths, similarity_threshold=threshold
+        )
+    per_threshold = time.perf_counter() - start
+
+    clear_caches()
+    start = time.perf_counter()
+    sweep = ThresholdSweep(predictions, ground_truths, min_threshold=min(args.thresholds))
+    build = time.perf_counter() - start
+    results = {threshold: sweep.result(threshold) for threshold in args.thresholds}
+    swept = time.perf_counter() - start
+
+    print(f"\nRe-evaluate per threshold: {per_threshold:8.2f} s")
+    print(f"Sweep (build {build:.2f} s):   {swept:8.2f} s")
+    print(f"Speedup:                   {per_threshold / swept:8.1f}x")
+    print(f"Similarity array:          {sweep.sims.nbytes / 1e6:8.2f} MB ({sweep.sims.size} pairs)")
+
+    print(f"\n{'Threshold':<10} {'Precision':>10} {'Recall':>8} {'F1':>8} {'Identical':>10}")
+    mismatches = 0
+    for threshold in args.thresholds:
+        overall = results[threshold]['overall_entity_metrics']
+        same = results[threshold] == reference[threshold]
+        mismatches += not same
+        print(f"{threshold:<10} {overall['precision_pct']:>10} {overall['recall_pct']:>8} "
+              f"{overall['f1_pct']:>8} {str(same):>10}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Benchmark: NumpyVectorIndex vs Chroma retrieval latency on dev queries
+
+Builds the knowledge base from the train split (``KnowledgeBaseIngestor``
+with ``FakeEmbedder``), saves it as a ``NumpyVectorIndex``, and times:
+
+- loading the saved index, and the first query after loading (it reads the
+  vectors from disk and makes the float32 scoring copy)
+- per-query latency with the blocked scoring used for indexes above
+  ``MAX_SCORING_CACHE_MB`` (no float32 copy kept)
+- one search per dev query, and all dev queries in one batched search
+- Chroma (in-memory ``chromadb`` collection with the same vectors) one
+  query at a time, followed by the notebook's per-document dedup, when
+  chromadb is installed
+
+Query embeddings are computed once up front, so only search is timed. The
+NumPy results are checked against an exact sort plus the notebook's
+``_deduplicate_chunks`` rule.
+
+Usage:
+    python src/tools/bench_vector_index.py --k 5 --max-per-doc 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import NERDataLoader
+from utils.fakes import FakeEmbedder
+from utils.rag_ingestion import KnowledgeBaseIngestor
+from utils import vector_index
+from utils.vector_index import NumpyVectorIndex
+
+
+def reference_search(matrix: np.ndarray, doc_ids: np.ndarray, query: np.ndarray, k: int, max_per_doc: int):
+    """Full sort, then keep at most ``max_per_doc`` chunks per document"""
+    scores = matrix @ (query / np.linalg.norm(query))
+    selected, counts = [], {}
+    for row in np.argsort(-scores, kind="stable"):
+        doc = int(doc_ids[row])
+        if counts.get(doc, 0) < max_per_doc:
+            counts[doc] = counts.get(doc, 0) + 1
+            selected.append(int(row))
+            if len(selected) == k:
+                break
+    return selected
+
+
+def chroma_latency(index: NumpyVectorIndex, queries: np.ndarray, k: int, max_per_doc: int):
+    try:
+        import chromadb
+    except ImportError:
+        return None
+    collection = chromadb.EphemeralClient().create_collection("bench", metadata={"hnsw:space": "cosine"})
+    meta = index.meta
+    vectors = np.asarray(index._vectors, dtype=np.float32)
+    for i in range(0, len(index), 5000):
+        collection.add(ids=meta["ids"][i:i + 5000], embeddings=vectors[i:i + 5000].tolist(),
+                       documents=meta["texts"][i:i + 5000], metadatas=meta["metadatas"][i:i + 5000])
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k)
+        kept, counts = [], {}
+        for metadata in result["metadatas"][0]:
+            doc_id = metadata.get("doc_id")
+            if counts.get(doc_id, 0) < max_per_doc:
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+                kept.append(metadata)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--max-per-doc", type=int, default=1)
+    args = parser.parse_args()
+
+    loader = NERDataLoader()
+    articles = [{"id": str(r["id"]), "text": r["text"], "source": "vlsp_2018_train",
+                 "domain": r.get("topic", "general")} for r in loader.load_split("train")]
+    embedder = FakeEmbedder()
+    index = NumpyVectorIndex(embedder)
+    KnowledgeBaseIngestor(index, embedder, workers=1, progress=lambda *a: None).ingest(articles)
+    queries = np.asarray(embedder.embed_documents([r["text"][:1500] for r in loader.load_split("dev")]),
+                         dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as path:
+        index.save(path)
+        start = time.perf_counter()
+        loaded = NumpyVectorIndex.load(path, embedder)
+        load_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        loaded.search_vectors(queries[:1], args.k, args.max_per_doc)
+        first_ms = (time.perf_counter() - start) * 1000
+        print(f"{len(loaded)} chunks x {queries.shape[1]}-d, {len(queries)} dev queries, "
+              f"k={args.k}, max_per_doc={args.max_per_doc}")
+        print(f"Load: {load_ms:.2f} ms (vectors mmap'd, metadata deferred), "
+              f"first query: {first_ms:.2f} ms\n")
+
+        single = []
+        for query in queries:
+            start = time.perf_counter()
+            loaded.search_vectors(query[None, :], args.k, args.max_per_doc)
+            single.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        batched = loaded.search_vectors(queries, args.k, args.max_per_doc)
+        batch_total = time.perf_counter() - start
+
+        blocked = []
+        unbounded = NumpyVectorIndex.load(path, embedder)
+        vector_index.MAX_SCORING_CACHE_MB, cache_mb = 0, vector_index.MAX_SCORING_CACHE_MB
+        for query in queries:
+            start = time.perf_counter()
+            unbounded.search_vectors(query[None, :], args.k, args.max_per_doc)
+            blocked.append(time.perf_counter() - start)
+        vector_index.MAX_SCORING_CACHE_MB = cache_mb
+
+        matrix = np.asarray(loaded._vectors, dtype=np.float32)
+        # Compare scores, not rows: identical chunks (overlaps) tie
+        mismatches = 0
+        for query, hits in zip(queries, batched):
+            expected = reference_search(matrix, loaded._doc_ids, query, args.k, args.max_per_doc)
+            expected_scores = matrix[expected] @ (query / np.linalg.norm(query))
+            mismatches += not np.allclose([score for _, score in hits], expected_scores, atol=1e-6)
+        chroma = chroma_latency(loaded, queries, args.k, args.max_per_doc)
+
+    print(f"{'Backend':<28} {'Mean (ms)':>10} {'p95 (ms)':>9} {'Total (s)':>10}")
+    print("-" * 60)
+    rows = [("numpy, per query", single), ("numpy blocked, per query", blocked)]
+    if chroma is not None:
+        rows.append(("chroma, per query + dedup", chroma))
+    for label, times in rows:
+        p95 = sorted(times)[int(len(times) * 0.95)]
+        print(f"{label:<28} {statistics.mean(times) * 1000:>10.3f} {p95 * 1000:>9.3f} {sum(times):>10.3f}")
+    print(f"{'numpy, one batch':<28} {batch_total / len(queries) * 1000:>10.3f} {'':>9} {batch_total:>10.3f}")
+    if chroma is None:
+        print("\nchromadb not installed; Chroma latency skipped")
+    print(f"\nParity with exact sort + dedup: {len(queries) - mismatches}/{len(queries)} queries match")
+
+
+if __name__ == "__main__":
+    main()
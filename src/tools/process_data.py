@@ -1,15 +1,34 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import os
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data.loader import write_jsonl as write_indexed_jsonl
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 RAW_DIR = PROJECT_ROOT / "data" / "vlps_2018_ner" / "raw"
 PROCESSED_DIR = PROJECT_ROOT / "data" / "vlps_2018_ner" / "processed"
+MANIFEST_PATH = PROCESSED_DIR / "manifest.json"
+SPLITS = ("train", "dev", "test")
+
+# Bump whenever parse_file output changes so cached records are re-emitted
+PARSER_VERSION = 2
 
 ENAMEX_PATTERN = re.compile(r'<ENAMEX\s+TYPE="([^"]+)">(.*?)</ENAMEX>', re.IGNORECASE | re.DOTALL)
+# Opening or closing tag (group 1 = whole tag, group 2 = type of an opening tag),
+# used by the single-scan tokenizer via re.split
+ENAMEX_TAG_PATTERN = re.compile(r'(<ENAMEX\s+TYPE="([^"]+)">|</ENAMEX>)', re.IGNORECASE)
 ENTITY_KEY_MAP = {
     "PERSON": "person",
     "ORGANIZATION": "organizations",
@@ -28,51 +47,202 @@ def clean_text(text: str) -> str:
     - Normalize multiple spaces to single space
     - Strip leading/trailing whitespace
     """
-    # Replace newlines with spaces
-    text = text.replace('\n', ' ')
-
     # Remove various types of quotes
     text = text.replace('"', '')
-    text = text.replace('"', '')
-    text = text.replace('"', '')
 
-    # Normalize multiple spaces to single space
-    text = re.sub(r'\s+', ' ', text)
+    # Collapse whitespace runs (newlines included) to single spaces and strip;
+    # str.split() uses the same Unicode whitespace set as re's \s
+    return ' '.join(text.split())
 
-    # Strip leading/trailing whitespace
-    return text.strip()
 
+def map_offsets_through_clean(text: str, positions: List[int]) -> Dict[int, Tuple[int, int]]:
+    """Map character offsets in ``text`` to offsets in ``clean_text(text)``.
 
-def strip_tags_and_collect_entities(text: str) -> Tuple[str, Dict[str, List[str]]]:
-    """Remove ENAMEX tags while collecting entity mentions."""
-    ground_truth = {"person": [], "organizations": [], "address": []}
+    Each position gets two mappings: where a span *starting* there begins in
+    the cleaned text (after any collapsed space), and where a span *ending*
+    there ends (before it). Works piecewise between the requested positions,
+    so the cost is linear in the text length.
 
-    # Process tags from innermost to outermost
-    # Each iteration removes one layer and collects entities without nested tags
-    current_text = text
-    while ENAMEX_PATTERN.search(current_text):
-        # Find all matches in current iteration
-        matches = list(ENAMEX_PATTERN.finditer(current_text))
-
-        for match in matches:
-            entity_type = match.group(1).strip().upper()
-            value = match.group(2).strip()
-
-            # Only collect if the value has NO tags at all (check for < character)
-            # This ensures we only collect innermost entities with clean values
-            if '<' not in value:
-                key = ENTITY_KEY_MAP.get(entity_type)
-                if key and value and value not in ground_truth[key]:
-                    # Clean the entity value before adding
-                    cleaned_value = clean_text(value)
-                    if cleaned_value:
-                        ground_truth[key].append(cleaned_value)
-
-        # Remove one layer of tags (replace with content)
-        current_text = ENAMEX_PATTERN.sub(lambda m: m.group(2), current_text)
+    Returns:
+        Dict position -> (offset as span start, offset as span end)
+    """
+    mapping = {}
+    cleaned_len = 0
+    emitted = False  # any character written to the cleaned text yet
+    pending_space = False  # whitespace seen since the last written character
+    previous = 0
+
+    for position in sorted(set(positions)):
+        piece = text[previous:position].replace('"', '')
+        words = piece.split()
+        if words:
+            if emitted and (pending_space or piece[0].isspace()):
+                cleaned_len += 1
+            cleaned_len += len(' '.join(words))
+            emitted = True
+            pending_space = piece[-1].isspace()
+        elif piece:
+            pending_space = True
+        previous = position
+
+        mapping[position] = (cleaned_len + (1 if emitted and pending_space else 0), cleaned_len)
+    return mapping
+
+
+def _pair_enamex_tags(types: List[Optional[str]]) -> List[List[Tuple[int, int, bool]]]:
+    """Pair opening/closing tags the way repeated ``ENAMEX_PATTERN.sub`` does.
+
+    Each round scans the remaining tags left to right and pairs an opening tag
+    with the next closing tag; opening tags met while looking for a close stay
+    for a later round, as do closing tags with no opening tag before them.
+    On nested markup this differs from stack pairing, so it is reproduced
+    exactly to keep the processed dataset unchanged.
+
+    Args:
+        types: Entity type of each tag, or None for a closing tag
+
+    Returns:
+        One list per round of (open_index, close_index, adjacent) in document
+        order, where ``adjacent`` means no unpaired tag lies between the two.
+    """
+    # Fast path: flat markup (open, close, open, close, ...) pairs in one round
+    if len(types) % 2 == 0 and types[1::2].count(None) == len(types) // 2 and None not in types[0::2]:
+        return [[(i, i + 1, True) for i in range(0, len(types), 2)]] if types else []
+
+    alive = range(len(types))
+    rounds = []
+    while True:
+        pairs = []
+        open_index = None
+        previous = None
+        for index in alive:
+            if types[index] is not None:
+                if open_index is None:
+                    open_index = index
+            elif open_index is not None:
+                pairs.append((open_index, index, previous == open_index))
+                open_index = None
+            previous = index
+        if not pairs:
+            return rounds
+        rounds.append(pairs)
+        paired = {i for pair in pairs for i in pair[:2]}
+        alive = [i for i in alive if i not in paired]
+
+
+def parse_enamex(text: str, strip_content: bool = False) -> Tuple[str, List[Tuple[str, int, int]]]:
+    """Remove ENAMEX tags in a single scan and locate the innermost mentions.
+
+    The document is split once into text segments and tags; tags are then
+    paired on the (small) tag list instead of re-running the regex over the
+    whole document for every nesting level.
+
+    Args:
+        text: Raw text with ENAMEX markup
+        strip_content: Strip whitespace inside each removed tag pair (title handling)
+
+    Returns:
+        Tuple of (tag-free text, mentions) where each mention is
+        (TYPE, start, end) with offsets into the tag-free text, in the order the
+        iterative parser collected them. Only pairs whose stripped content is
+        non-empty and contains no markup are reported.
+    """
+    # parts = [segment, tag, type, segment, tag, type, ..., segment];
+    # segments[i] precedes tags[i] and segments[-1] trails the last tag
+    parts = ENAMEX_TAG_PATTERN.split(text)
+    segments = parts[0::3]
+    tags = parts[1::3]
+    types = parts[2::3]
+
+    rounds = _pair_enamex_tags(types)
+    removed = [False] * len(tags)
+    for pairs in rounds:
+        if strip_content:
+            for open_index, close_index, _ in pairs:
+                # Leading whitespace of the content, skipping already removed tags
+                j = open_index + 1
+                while True:
+                    segments[j] = segments[j].lstrip()
+                    if segments[j] or j == close_index or not removed[j]:
+                        break
+                    j += 1
+                # Trailing whitespace of the content
+                j = close_index
+                while True:
+                    segments[j] = segments[j].rstrip()
+                    if segments[j] or j - 1 == open_index or not removed[j - 1]:
+                        break
+                    j -= 1
+        for open_index, close_index, _ in pairs:
+            removed[open_index] = removed[close_index] = True
+
+    # Unpaired tags stay in the text as-is
+    for index in range(len(tags)):
+        if not removed[index]:
+            segments[index] += tags[index]
+    segment_starts = [0, *accumulate(map(len, segments))]
+    stripped = "".join(segments)
+
+    mentions = []
+    for pairs in rounds:
+        for open_index, close_index, adjacent in pairs:
+            if not adjacent:
+                continue
+            start = segment_starts[open_index + 1]
+            content = stripped[start:segment_starts[close_index + 1]]
+            value = content.strip()
+            if not value or '<' in value:
+                continue
+            start += len(content) - len(content.lstrip())
+            mentions.append((types[open_index].strip().upper(), start, start + len(value)))
+
+    return stripped, mentions
+
+
+def strip_tags_and_collect_spans(
+    text: str,
+    with_spans: bool = True,
+) -> Tuple[str, Dict[str, List[str]], List[List]]:
+    """Remove ENAMEX tags while collecting entity mentions and their spans.
+
+    Returns:
+        Tuple of (clean text, ground truth, spans) where spans are
+        [start, end, entity_key] offsets into the clean text for every tagged
+        mention (duplicates included), sorted by position.
+    """
+    ground_truth = {"person": [], "organizations": [], "address": []}
+    seen = {key: set() for key in ground_truth}
+
+    stripped, mentions = parse_enamex(text)
+    kept = []
+    for entity_type, start, end in mentions:
+        key = ENTITY_KEY_MAP.get(entity_type)
+        if not key:
+            continue
+        value = stripped[start:end]
+        # Clean the entity value before adding
+        cleaned_value = clean_text(value)
+        if not cleaned_value:
+            continue
+        kept.append((start, end, key))
+        if value not in seen[key]:
+            ground_truth[key].append(cleaned_value)
+            seen[key].add(cleaned_value)
+
+    # Track mention offsets through the whitespace/quote normalization
+    spans = []
+    if with_spans:
+        offsets = map_offsets_through_clean(stripped, [p for start, end, _ in kept for p in (start, end)])
+        spans = sorted([offsets[start][0], offsets[end][1], key] for start, end, key in kept)
 
     # Clean the final text
-    return clean_text(current_text), ground_truth
+    return clean_text(stripped), ground_truth, spans
+
+
+def strip_tags_and_collect_entities(text: str) -> Tuple[str, Dict[str, List[str]]]:
+    """Remove ENAMEX tags while collecting entity mentions."""
+    text_clean, ground_truth, _ = strip_tags_and_collect_spans(text, with_spans=False)
+    return text_clean, ground_truth
 
 
 def parse_file(file_path: Path, topic: str) -> Dict:
@@ -85,15 +255,13 @@ def parse_file(file_path: Path, topic: str) -> Dict:
     body_raw = lines[1].strip() if len(lines) > 1 else ""
 
     # Remove ENAMEX tags from title
-    title_clean = title_raw
-    while ENAMEX_PATTERN.search(title_clean):
-        title_clean = ENAMEX_PATTERN.sub(lambda m: m.group(2).strip(), title_clean)
+    title_clean, _ = parse_enamex(title_raw, strip_content=True)
 
     # Clean the title text
     title_clean = clean_text(title_clean)
 
-    # Process body text to get clean text and entities
-    text_clean, ground_truth = strip_tags_and_collect_entities(body_raw)
+    # Process body text to get clean text, entities and their spans
+    text_clean, ground_truth, spans = strip_tags_and_collect_spans(body_raw)
 
     stem = file_path.stem
     try:
@@ -107,23 +275,142 @@ def parse_file(file_path: Path, topic: str) -> Dict:
         "title": title_clean,
         "text": text_clean,
         "ground_truth": ground_truth,
+        "spans": spans,
     }
 
 
-def collect_split(split: str) -> List[Dict]:
-    """Collect all records for a given split (train/dev/test)."""
+def list_split_files(split: str) -> List[Tuple[str, Path]]:
+    """List (topic, path) for every raw .muc/.txt file of a split, in output order."""
     split_dir = RAW_DIR / split
     if not split_dir.exists():
         raise FileNotFoundError(f"Missing split directory: {split_dir}")
 
-    records: List[Dict] = []
+    files: List[Tuple[str, Path]] = []
     for topic_dir in sorted(p for p in split_dir.iterdir() if p.is_dir()):
         # collect both .muc and .txt files
         muc_files = list(topic_dir.glob("*.muc"))
         txt_files = list(topic_dir.glob("*.txt"))
         for muc_file in sorted(muc_files + txt_files):
-            records.append(parse_file(muc_file, topic_dir.name))
-    return records
+            files.append((topic_dir.name, muc_file))
+    return files
+
+
+def collect_split(split: str) -> List[Dict]:
+    """Collect all records for a given split (train/dev/test)."""
+    return [parse_file(path, topic) for topic, path in list_split_files(split)]
+
+
+def file_sha256(file_path: Path) -> str:
+    """Hash a raw file's content."""
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+def load_manifest() -> Dict:
+    """Load the manifest of previously converted files (empty if missing or stale)."""
+    if not MANIFEST_PATH.exists():
+        return {"parser_version": PARSER_VERSION, "splits": {}}
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    if manifest.get("parser_version") != PARSER_VERSION:
+        # Parser output changed: every cached record is stale
+        return {"parser_version": PARSER_VERSION, "splits": {}}
+    return manifest
+
+
+def save_manifest(manifest: Dict) -> None:
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def load_previous_records(split: str) -> Dict[Tuple[str, str], Dict]:
+    """Index the previously written records of a split by (topic, id)."""
+    output_path = PROCESSED_DIR / f"{split}.json"
+    if not output_path.exists():
+        return {}
+    records = json.loads(output_path.read_text(encoding="utf-8"))
+    return {(record["topic"], str(record["id"])): record for record in records}
+
+
+def _parse_task(task: Tuple[str, str]) -> Dict:
+    """Process-pool entry point: parse one (path, topic) pair."""
+    path, topic = task
+    return parse_file(Path(path), topic)
+
+
+def convert_split(
+    split: str,
+    manifest: Dict,
+    executor: Optional[ProcessPoolExecutor] = None,
+    force: bool = False,
+) -> Dict[str, float]:
+    """Incrementally convert one split, re-parsing only new or changed files.
+
+    A file is unchanged when its (mtime, size) match the manifest, or when its
+    content hash does. Unchanged files reuse the previously written record.
+
+    Returns:
+        Timing breakdown and file counts for the split
+    """
+    timings: Dict[str, float] = {}
+
+    # Step 1: scan files and detect changes
+    start = time.perf_counter()
+    files = list_split_files(split)
+    old_entries = {} if force else manifest["splits"].get(split, {})
+    previous = {} if force else load_previous_records(split)
+    new_entries: Dict[str, Dict] = {}
+    records: List[Optional[Dict]] = [None] * len(files)
+    to_parse: List[int] = []
+
+    for index, (topic, path) in enumerate(files):
+        rel_path = path.relative_to(RAW_DIR).as_posix()
+        stat = path.stat()
+        entry = {"mtime": stat.st_mtime, "size": stat.st_size}
+        old = old_entries.get(rel_path)
+        cached = previous.get((topic, path.stem))
+
+        if old and old["size"] == entry["size"] and old["mtime"] == entry["mtime"]:
+            entry["sha256"] = old["sha256"]
+        else:
+            entry["sha256"] = file_sha256(path)
+
+        if cached is not None and old and old["sha256"] == entry["sha256"]:
+            records[index] = cached
+        else:
+            to_parse.append(index)
+        new_entries[rel_path] = entry
+
+    removed = len(set(old_entries) - set(new_entries))
+    timings["scan"] = time.perf_counter() - start
+
+    # Step 2: parse new/changed files across worker processes
+    start = time.perf_counter()
+    tasks = [(str(files[i][1]), files[i][0]) for i in to_parse]
+    if executor is not None and len(tasks) > 1:
+        parsed = executor.map(_parse_task, tasks, chunksize=max(1, len(tasks) // 64))
+    else:
+        parsed = map(_parse_task, tasks)
+    for index, record in zip(to_parse, parsed):
+        records[index] = record
+    timings["parse"] = time.perf_counter() - start
+
+    # Step 3: write only when something changed
+    start = time.perf_counter()
+    output_path = PROCESSED_DIR / f"{split}.json"
+    if to_parse or removed or not output_path.exists():
+        write_json(split, records)
+        write_jsonl(split, records)
+    else:
+        print(f"{split}: no changes, kept {output_path}")
+    manifest["splits"][split] = new_entries
+    timings["write"] = time.perf_counter() - start
+
+    timings.update({
+        "files": len(files),
+        "parsed": len(to_parse),
+        "unchanged": len(files) - len(to_parse),
+        "removed": removed,
+    })
+    return timings
 
 
 def write_json(split: str, records: List[Dict]) -> None:
@@ -134,12 +421,45 @@ def write_json(split: str, records: List[Dict]) -> None:
     print(f"Wrote {len(records)} records to {output_path}")
 
 
+def write_jsonl(split: str, records: List[Dict]) -> None:
+    """Write records to processed/<split>.jsonl plus a byte-offset index.
+
+    Uses ``data.loader.write_jsonl``, the one writer of the ``.jsonl.idx``
+    format that ``NERDataLoader.get_record`` reads.
+    """
+    write_indexed_jsonl(records, PROCESSED_DIR / f"{split}.jsonl")
+
+
+def print_timings(all_timings: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{'Split':<8} {'Files':>7} {'Parsed':>7} {'Skipped':>8} {'Removed':>8} "
+          f"{'Scan (s)':>9} {'Parse (s)':>10} {'Write (s)':>10}")
+    print("-" * 74)
+    for split, t in all_timings.items():
+        print(f"{split:<8} {t['files']:>7} {t['parsed']:>7} {t['unchanged']:>8} {t['removed']:>8} "
+              f"{t['scan']:>9.3f} {t['parse']:>10.3f} {t['write']:>10.3f}")
+
+
 def main() -> None:
-    for split in ("train", "dev", "test"):
-        records = collect_split(split)
-        write_json(split, records)
+    parser = argparse.ArgumentParser(description="Convert raw VLSP 2018 NER files to processed JSON")
+    parser.add_argument("--splits", nargs="+", default=list(SPLITS), choices=SPLITS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Parser processes (1 = parse serially)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore the manifest and re-parse every file")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    all_timings = {}
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers and args.workers > 1 else None
+    try:
+        for split in args.splits:
+            all_timings[split] = convert_split(split, manifest, executor=executor, force=args.force)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    save_manifest(manifest)
+    print_timings(all_timings)
 
 
 if __name__ == "__main__":
     main()
-
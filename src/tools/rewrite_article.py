@@ -1,8 +1,11 @@
+import argparse
+import asyncio
 import json
+import os
 import time
 import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 from tqdm.auto import tqdm
 import logging
 
@@ -11,6 +14,8 @@ project_root = Path(__file__).parent.parent if '__file__' in globals() else Path
 sys.path.insert(0, str(project_root))
 
 from data import load_processed_data
+from utils.llm_cache import CacheMissError, CachedLLM, LLMResponseCache
+from utils.llm_calls import invoke_llm
 from langchain_ollama import OllamaLLM
 
 # Configure logging
@@ -29,9 +34,16 @@ CONFIG = {
     "llm_model": "ministral-3:14b",
     "temperature": 0.7,  # Higher for creative rewriting
     "max_tokens": 1000,
-    "batch_size": 1,  # Process one at a time for stability
+    "max_concurrency": 4,  # Max in-flight LLM requests (match OLLAMA_NUM_PARALLEL)
+    "request_timeout": 300.0,  # Seconds before a single rewrite request is abandoned
+    "max_retries": 3,  # Retries per article after a failed/timed-out request
+    "retry_backoff": 2.0,  # Base delay (seconds) for exponential backoff
     "output_file": "train_new.json",
-    "checkpoint_interval": 50,  # Save checkpoint every 50 articles
+    "journal_file": "train_new.journal.jsonl",  # Append-only record of finished rewrites
+    "fsync_interval": 50,  # fsync the journal every 50 articles
+    "cache_dir": None,  # LLM response cache directory (None = disabled)
+    "cache_max_mb": 1024,  # Cache size budget before LRU eviction
+    "cache_replay": False,  # Serve only cached responses, never call the LLM
 }
 
 # ============================================================================
@@ -73,9 +85,11 @@ class ArticleRewriter:
                  llm_model: str = "ministral-3:14b",
                  ollama_host: str = "http://127.0.0.1:11434",
                  temperature: float = 0.7,
-                 max_tokens: int = 1000):
+                 max_tokens: int = 1000,
+                 llm: Any = None):
         
-        self.llm = OllamaLLM(
+        # Any object with invoke()/ainvoke() can stand in for Ollama (e.g. FakeLLM)
+        self.llm = llm if llm is not None else OllamaLLM(
             base_url=ollama_host,
             model=llm_model,
             temperature=temperature,
@@ -83,7 +97,7 @@ class ArticleRewriter:
             top_p=0.9,
             top_k=40
         )
-        logger.info(f"✓ Initialized ArticleRewriter with {llm_model}")
+        logger.info(f"✓ Initialized ArticleRewriter with {getattr(self.llm, 'model', llm_model)}")
     
     def build_prompt(self, article: Dict[str, Any]) -> str:
         """Build rewriting prompt with entity preservation instructions"""
@@ -101,8 +115,7 @@ class ArticleRewriter:
             addresses=addresses,
             original_text=article['text']
         )
-        print(len(prompt))
-        print(prompt)
+        logger.debug(f"Built rewrite prompt for article {article['id']} ({len(prompt)} chars)")
         
         return prompt
     
@@ -155,12 +168,274 @@ class ArticleRewriter:
         
         return verification
 
+# ============================================================================
+# Concurrent Rewrite Engine
+# ============================================================================
+
+class ConcurrentRewriteEngine:
+    """Rewrite many articles concurrently with a bounded number of in-flight requests
+    
+    Requests are issued from a single asyncio event loop. A semaphore caps the
+    number of requests outstanding at the server, each request has its own
+    timeout, and failed requests are retried with exponential backoff. Results
+    are returned in input order regardless of completion order.
+    """
+    
+    def __init__(self,
+                 rewriter: ArticleRewriter,
+                 max_concurrency: int = 4,
+                 request_timeout: Optional[float] = 300.0,
+                 max_retries: int = 3,
+                 retry_backoff: float = 2.0):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        
+        self.rewriter = rewriter
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stats = {}
+    
+    async def _call_llm(self, prompt: str) -> str:
+        """Invoke the LLM without blocking the event loop"""
+        return await invoke_llm(self.rewriter.llm, prompt, self.request_timeout)
+    
+    async def _rewrite_one(self,
+                           article: Dict[str, Any],
+                           semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Rewrite one article, retrying with backoff; fall back to the original text"""
+        prompt = self.rewriter.build_prompt(article)
+        last_error = None
+        
+        for attempt in range(self.max_retries + 1):
+            self._queued += 1
+            async with semaphore:
+                self._queued -= 1
+                self._in_flight += 1
+                self._depth_samples.append(self._in_flight)
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+                start_time = time.time()
+                try:
+                    rewritten_text = (await self._call_llm(prompt)).strip()
+                    return {
+                        "rewrite": rewritten_text,
+                        "ok": True,
+                        "attempts": attempt + 1,
+                        "elapsed": time.time() - start_time,
+                    }
+                except CacheMissError as e:
+                    # Replay mode: retrying cannot produce a response
+                    last_error = e
+                    break
+                except Exception as e:
+                    last_error = e
+                finally:
+                    self._in_flight -= 1
+            
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                wait_time = self.retry_backoff * (2.0 ** attempt)
+                logger.warning(
+                    f"Article {article['id']} failed (attempt {attempt + 1}): "
+                    f"{type(last_error).__name__}: {last_error}. Retrying in {wait_time:.1f}s"
+                )
+                await asyncio.sleep(wait_time)
+        
+        logger.error(f"Failed to rewrite article {article['id']}: {last_error}")
+        return {
+            "rewrite": article['text'],  # Fallback to original
+            "ok": False,
+            "attempts": attempt + 1,
+            "elapsed": 0.0,
+            "error": str(last_error),
+        }
+    
+    async def _run(self,
+                   articles: List[Dict[str, Any]],
+                   on_result: Optional[Callable[[int, Dict[str, Any], Dict[str, Any]], None]]
+                   ) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(articles)
+        
+        async def run_indexed(index: int, article: Dict[str, Any]):
+            return index, await self._rewrite_one(article, semaphore)
+        
+        tasks = [asyncio.create_task(run_indexed(i, a)) for i, a in enumerate(articles)]
+        with tqdm(total=len(tasks), desc="Rewriting articles") as progress:
+            for finished in asyncio.as_completed(tasks):
+                index, result = await finished
+                results[index] = result
+                if on_result is not None:
+                    on_result(index, articles[index], result)
+                progress.update(1)
+                progress.set_postfix(in_flight=self._in_flight, queued=self._queued)
+        
+        return results
+    
+    def run(self,
+            articles: List[Dict[str, Any]],
+            on_result: Optional[Callable[[int, Dict[str, Any], Dict[str, Any]], None]] = None
+            ) -> List[Dict[str, Any]]:
+        """Rewrite all articles concurrently
+        
+        Args:
+            articles: Articles with 'id', 'text' and 'ground_truth'
+            on_result: Optional callback ``(index, article, result)`` invoked as
+                soon as each article finishes (in completion order)
+        
+        Returns:
+            One result dict per article, in input order, with keys
+            'rewrite', 'ok', 'attempts' and 'elapsed'
+        """
+        self._in_flight = 0
+        self._queued = 0
+        self._depth_samples = []
+        self.stats = {"retries": 0, "max_in_flight": 0}
+        
+        start_time = time.time()
+        results = asyncio.run(self._run(articles, on_result))
+        total_time = time.time() - start_time
+        
+        self.stats.update({
+            "total_time": total_time,
+            "articles_per_second": len(articles) / total_time if total_time > 0 else 0,
+            "mean_in_flight": (sum(self._depth_samples) / len(self._depth_samples)
+                               if self._depth_samples else 0),
+        })
+        return results
+
+# ============================================================================
+# Rewrite Journal (crash-safe checkpointing)
+# ============================================================================
+
+class RewriteJournal:
+    """Append-only JSONL journal with one line per finished article
+    
+    Each record is flushed as soon as it is written and the file is fsynced
+    every ``fsync_interval`` records, so checkpointing costs constant work per
+    article. After a crash the journal is replayed to skip finished articles,
+    and :meth:`compact` turns it into the final JSON output.
+    """
+    
+    def __init__(self, path: Path, fsync_interval: int = 50):
+        self.path = Path(path)
+        self.fsync_interval = max(1, fsync_interval)
+        self._file = None
+        self._unsynced = 0
+    
+    def read(self) -> Dict[Any, Dict[str, Any]]:
+        """Read journal records keyed by article id (later entries win)
+        
+        A torn trailing line left by a crash is ignored.
+        """
+        records = {}
+        if not self.path.exists():
+            return records
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt journal line {line_no} in {self.path}")
+                    continue
+                records[record['id']] = record
+        return records
+    
+    def open(self, resume: bool = False):
+        """Open the journal for appending (truncates it unless resuming)"""
+        if resume and self.path.exists():
+            self._drop_torn_tail()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        self._unsynced = 0
+        return self
+    
+    def _drop_torn_tail(self):
+        """Truncate a partially written last line so appends start on a fresh line"""
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            
+            # Scan backwards in blocks for the last newline
+            pos = size
+            while pos > 0:
+                block_start = max(0, pos - 4096)
+                f.seek(block_start)
+                block = f.read(pos - block_start)
+                if pos == size and block.endswith(b"\n"):
+                    return
+                newline = block.rfind(b"\n")
+                if newline != -1:
+                    f.truncate(block_start + newline + 1)
+                    return
+                pos = block_start
+            f.truncate(0)
+
+    def append(self, record: Dict[str, Any]):
+        """Append one record, fsyncing every ``fsync_interval`` records"""
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_interval:
+            self.sync()
+    
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+    
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def compact(self, articles: List[Dict[str, Any]], output_path: Path) -> List[Dict[str, Any]]:
+        """Write journal records in input order to the final JSON output
+        
+        Articles missing from the journal are skipped.
+        """
+        records = self.read()
+        compacted = []
+        for article in articles:
+            record = records.get(article['id'])
+            if record is not None:
+                record = dict(record)
+                record.pop('ok', None)
+                compacted.append(record)
+        
+        # Write to a temp file first so a crash never leaves a truncated output
+        tmp_path = Path(output_path).with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(compacted, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_path)
+        return compacted
+
 # ============================================================================
 # Main Rewriting Pipeline
 # ============================================================================
 
-def rewrite_training_data(config: Dict[str, Any]):
-    """Main function to rewrite all training data"""
+def rewrite_training_data(config: Dict[str, Any], llm: Any = None):
+    """Main function to rewrite all training data
+    
+    Args:
+        config: Pipeline configuration (see CONFIG)
+        llm: Optional LLM override (e.g. FakeLLM); defaults to Ollama
+    """
     
     logger.info("=" * 80)
     logger.info("TRAINING DATA REWRITER")
@@ -170,6 +445,8 @@ def rewrite_training_data(config: Dict[str, Any]):
     logger.info("\n1. Loading VLSP 2018 NER dataset...")
     data_splits = load_processed_data()
     train_data = data_splits['train']
+    if config.get('limit'):
+        train_data = train_data[:config['limit']]
     
     logger.info(f"✓ Loaded {len(train_data)} training examples")
     
@@ -179,18 +456,48 @@ def rewrite_training_data(config: Dict[str, Any]):
         llm_model=config['llm_model'],
         ollama_host=config['ollama_host'],
         temperature=config['temperature'],
-        max_tokens=config['max_tokens']
+        max_tokens=config['max_tokens'],
+        llm=llm
+    )
+    cache = None
+    if config.get('cache_dir'):
+        cache = LLMResponseCache(
+            config['cache_dir'],
+            max_size_mb=config['cache_max_mb'],
+            replay=config['cache_replay']
+        )
+        rewriter.llm = CachedLLM(rewriter.llm, cache)
+        logger.info(f"✓ LLM response cache: {config['cache_dir']} (replay={config['cache_replay']})")
+    engine = ConcurrentRewriteEngine(
+        rewriter,
+        max_concurrency=config['max_concurrency'],
+        request_timeout=config['request_timeout'],
+        max_retries=config['max_retries'],
+        retry_backoff=config['retry_backoff']
     )
     
     # Step 3: Rewrite articles
     logger.info("\n3. Rewriting articles...")
     logger.info(f"   Model: {config['llm_model']}")
     logger.info(f"   Temperature: {config['temperature']}")
+    logger.info(f"   Concurrency: {config['max_concurrency']}")
     logger.info(f"   Total articles: {len(train_data)}")
     
-    rewritten_data = []
+    # Replay the journal so finished articles are skipped on --resume
+    journal = RewriteJournal(config['journal_file'], fsync_interval=config['fsync_interval'])
+    resume = config.get('resume', False)
+    if resume:
+        finished_ids = {
+            record_id for record_id, record in journal.read().items() if record.get('ok', True)
+        }
+        pending = [article for article in train_data if article['id'] not in finished_ids]
+        logger.info(f"   Resuming: {len(train_data) - len(pending)} articles already in {journal.path}")
+    else:
+        pending = train_data
+    
     stats = {
         "total": len(train_data),
+        "resumed": len(train_data) - len(pending),
         "success": 0,
         "failed": 0,
         "entities_preserved": 0,
@@ -198,21 +505,17 @@ def rewrite_training_data(config: Dict[str, Any]):
         "total_time": 0
     }
     
-    start_time = time.time()
-    
-    for i, article in enumerate(tqdm(train_data, desc="Rewriting articles")):
-        try:
-            # Rewrite article
-            rewritten_text = rewriter.rewrite_article(article)
+    def handle_result(index: int, article: Dict[str, Any], result: Dict[str, Any]):
+        rewritten_text = result["rewrite"]
+        
+        if result["ok"]:
+            stats["success"] += 1
             
             # Verify entity preservation
             verification = rewriter.verify_entities_preserved(
                 article['ground_truth'],
                 rewritten_text
             )
-            
-            # Update stats
-            stats["success"] += 1
             stats["entities_preserved"] += verification["preserved_count"]
             stats["entities_missing"] += len(verification["missing_entities"])
             
@@ -222,49 +525,29 @@ def rewrite_training_data(config: Dict[str, Any]):
                     f"Article {article['id']}: {len(verification['missing_entities'])} "
                     f"entities missing in rewrite"
                 )
-            
-            # Create output record
-            rewritten_record = {
-                "id": article['id'],
-                "topic": article.get('topic', 'general'),
-                "title": article.get('title', ''),
-                "text": article['text'],
-                "rewrite": rewritten_text,
-                "ground_truth": article['ground_truth']
-            }
-            
-            rewritten_data.append(rewritten_record)
-            
-            # Save checkpoint periodically
-            if (i + 1) % config['checkpoint_interval'] == 0:
-                checkpoint_file = f"checkpoint_{i+1}.json"
-                with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                    json.dump(rewritten_data, f, ensure_ascii=False, indent=2)
-                logger.info(f"✓ Saved checkpoint: {checkpoint_file}")
-        
-        except Exception as e:
-            logger.error(f"Failed to process article {article['id']}: {e}")
+        else:
             stats["failed"] += 1
-            
-            # Add original as fallback
-            rewritten_record = {
-                "id": article['id'],
-                "topic": article.get('topic', 'general'),
-                "title": article.get('title', ''),
-                "text": article['text'],
-                "rewrite": article['text'],  # Fallback to original
-                "ground_truth": article['ground_truth']
-            }
-            rewritten_data.append(rewritten_record)
-    
-    stats["total_time"] = time.time() - start_time
-    
-    # Step 4: Save final output
-    logger.info("\n4. Saving rewritten data...")
-    output_path = Path(config['output_file'])
+        
+        # Journal the output record (failed rewrites fall back to the original
+        # text and are retried on the next --resume)
+        journal.append({
+            "id": article['id'],
+            "topic": article.get('topic', 'general'),
+            "title": article.get('title', ''),
+            "text": article['text'],
+            "rewrite": rewritten_text,
+            "ground_truth": article['ground_truth'],
+            "ok": result["ok"]
+        })
+    
+    with journal.open(resume=resume):
+        engine.run(pending, on_result=handle_result)
+    stats["total_time"] = engine.stats["total_time"]
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(rewritten_data, f, ensure_ascii=False, indent=2)
+    # Step 4: Compact the journal into the final output
+    logger.info("\n4. Compacting journal into rewritten data...")
+    output_path = Path(config['output_file'])
+    rewritten_data = journal.compact(train_data, output_path)
     
     logger.info(f"✓ Saved {len(rewritten_data)} rewritten articles to {output_path}")
     
@@ -273,10 +556,23 @@ def rewrite_training_data(config: Dict[str, Any]):
     logger.info("REWRITING STATISTICS")
     logger.info("=" * 80)
     logger.info(f"Total articles:        {stats['total']}")
+    logger.info(f"Resumed from journal:  {stats['resumed']}")
     logger.info(f"Successfully rewritten: {stats['success']}")
     logger.info(f"Failed:                {stats['failed']}")
+    logger.info(f"Retries:               {engine.stats['retries']}")
     logger.info(f"Total time:            {stats['total_time']:.1f}s")
-    logger.info(f"Avg time per article:  {stats['total_time']/stats['total']:.2f}s")
+    if pending:
+        logger.info(f"Avg time per article:  {stats['total_time']/len(pending):.2f}s")
+    logger.info(f"Throughput:            {engine.stats['articles_per_second']:.2f} articles/s")
+    logger.info(f"\nServer Queue Depth (in-flight requests):")
+    logger.info(f"  Mean:                {engine.stats['mean_in_flight']:.2f}")
+    logger.info(f"  Max:                 {engine.stats['max_in_flight']} (limit {config['max_concurrency']})")
+    if cache is not None:
+        cache_stats = cache.stats()
+        logger.info(f"\nLLM Response Cache:")
+        logger.info(f"  Hits / misses:       {cache_stats['hits']} / {cache_stats['misses']}")
+        logger.info(f"  Hit rate:            {cache_stats['hit_rate']:.1%}")
+        logger.info(f"  Entries:             {cache_stats['entries']} ({cache_stats['size_mb']:.1f} MB)")
     logger.info(f"\nEntity Preservation:")
     logger.info(f"  Entities preserved:  {stats['entities_preserved']}")
     logger.info(f"  Entities missing:    {stats['entities_missing']}")
@@ -288,17 +584,56 @@ def rewrite_training_data(config: Dict[str, Any]):
     
     logger.info("=" * 80)
     
+    stats.update(engine.stats)
     return rewritten_data, stats
 
 # ============================================================================
 # Main Entry Point
 # ============================================================================
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rewrite VLSP 2018 training articles with an LLM")
+    parser.add_argument("--max-concurrency", type=int, default=CONFIG["max_concurrency"],
+                        help="Maximum number of in-flight LLM requests")
+    parser.add_argument("--request-timeout", type=float, default=CONFIG["request_timeout"],
+                        help="Per-request timeout in seconds")
+    parser.add_argument("--max-retries", type=int, default=CONFIG["max_retries"],
+                        help="Retries per article after a failed request")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip articles already rewritten in the journal instead of starting over")
+    parser.add_argument("--cache-dir", default=CONFIG["cache_dir"],
+                        help="Cache LLM responses in this directory")
+    parser.add_argument("--replay", action="store_true",
+                        help="Serve rewrites from --cache-dir only, never calling the LLM")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Only rewrite the first N articles")
+    parser.add_argument("--fake-llm-delay", type=float, default=None,
+                        help="Use a local fake LLM with this per-request delay (seconds) instead of Ollama")
+    return parser.parse_args()
+
+
 def main():
     """Main execution"""
     
+    args = parse_args()
+    config = {
+        **CONFIG,
+        "max_concurrency": args.max_concurrency,
+        "request_timeout": args.request_timeout,
+        "max_retries": args.max_retries,
+        "limit": args.limit,
+        "resume": args.resume,
+        "cache_dir": args.cache_dir,
+        "cache_replay": args.replay,
+    }
+    
+    llm = None
+    if args.fake_llm_delay is not None:
+        from utils.fakes import FakeLLM
+        llm = FakeLLM(delay=args.fake_llm_delay)
+    
     try:
-        rewritten_data, stats = rewrite_training_data(CONFIG)
+        rewritten_data, stats = rewrite_training_data(config, llm=llm)
         
         logger.info("\n✅ Rewriting completed successfully!")
         logger.info(f"   Output file: {CONFIG['output_file']}")
@@ -2,15 +2,86 @@
 
 from .evaluation import (
     calculate_accuracy,
+    compute_comprehensive_metrics,
+    MetricsAccumulator,
     print_evaluation_results,
     print_comparison_table,
     parse_ner_response,
     save_json_with_numpy_conversion,
 )
+from .response_parser import (
+    ParseStatus,
+    StreamingJSONDetector,
+    parse_batched_response,
+    parse_ner_response_with_status,
+)
+from .streaming import StreamingResult, ollama_generate_stream, stream_extract
+from .fuzzy import fuzzy_match_entities
+from .parallel_evaluation import evaluate_parallel, iter_jsonl
+from .threshold_sweep import ThresholdSweep, sweep_thresholds
+from .resampling import (
+    DocumentScores,
+    attach_confidence_intervals,
+    bootstrap_ci,
+    paired_permutation_test,
+)
+from .chunked_extraction import ChunkedExtractor, merge_entities
+from .batched_extraction import BatchedExtractor
+from .rag_ingestion import EmbeddingCache, KnowledgeBaseIngestor, VietnameseDocumentChunker
+from .vector_index import NumpyVectorIndex, RetrievedChunk
+from .rag import PerformanceMonitor, RAGNERExtractor, RAGPromptBuilder
+from .lexical_index import HybridRetriever, LexicalIndex
+from .gazetteer import Gazetteer, GazetteerExtractor
+from .cascade import CascadeExtractor, gazetteer_confidence, llm_escalation
+from .llm_calls import invoke_llm
+from .prefix_cache import OllamaPrefixClient, TransformersPrefixCache
+from .llm_cache import LLMResponseCache, CachedLLM, CacheMissError
 
 __all__ = [
     'calculate_accuracy',
+    'compute_comprehensive_metrics',
+    'MetricsAccumulator',
     'print_comparison_table',
     'parse_ner_response',
     'save_json_with_numpy_conversion',
+    'parse_ner_response_with_status',
+    'ParseStatus',
+    'parse_batched_response',
+    'StreamingJSONDetector',
+    'StreamingResult',
+    'ollama_generate_stream',
+    'stream_extract',
+    'fuzzy_match_entities',
+    'evaluate_parallel',
+    'iter_jsonl',
+    'ThresholdSweep',
+    'sweep_thresholds',
+    'DocumentScores',
+    'bootstrap_ci',
+    'paired_permutation_test',
+    'attach_confidence_intervals',
+    'ChunkedExtractor',
+    'merge_entities',
+    'BatchedExtractor',
+    'EmbeddingCache',
+    'KnowledgeBaseIngestor',
+    'VietnameseDocumentChunker',
+    'NumpyVectorIndex',
+    'RetrievedChunk',
+    'PerformanceMonitor',
+    'RAGNERExtractor',
+    'RAGPromptBuilder',
+    'HybridRetriever',
+    'LexicalIndex',
+    'Gazetteer',
+    'GazetteerExtractor',
+    'CascadeExtractor',
+    'gazetteer_confidence',
+    'llm_escalation',
+    'invoke_llm',
+    'OllamaPrefixClient',
+    'TransformersPrefixCache',
+    'LLMResponseCache',
+    'CachedLLM',
+    'CacheMissError',
 ]
@@ -0,0 +1,133 @@
+"""Multi-document batched extraction
+
+Short documents pay for the whole instruction block on every call. A
+``BatchedPromptTemplate`` packs consecutive documents into one request (as
+many as fit the token budget, so K follows the document lengths) and asks
+for a JSON array with one object per document id. ``parse_batched_response``
+maps the objects back by id. Documents the answer has no entry for (a
+malformed or cut-off array, or a failed request) are re-extracted one per
+call with the single-document template.
+
+Example:
+    >>> extractor = BatchedExtractor(llm, BatchedPromptTemplate(), PromptTemplate('zero_shot'),
+    ...                              max_prompt_tokens=2048)
+    >>> results = extractor.extract_many([r['text'] for r in records])
+    >>> results[0]['entities'], results[0]['batch_size'], results[0]['fallback']
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from .llm_calls import invoke_llm, run_coroutine
+from .response_parser import ParseStatus, parse_batched_response, parse_ner_response_with_status
+
+if TYPE_CHECKING:
+    from prompt.compiled import BatchedPromptTemplate, PromptTemplate
+
+
+class BatchedExtractor:
+    """Extract entities from several documents per LLM request
+
+    Args:
+        llm: Object with ``invoke(prompt)`` (and optionally ``ainvoke``); wrap
+            it in ``CachedLLM`` to share the response cache
+        batch_template: Compiled multi-document prompt
+        fallback_template: Single-document prompt for documents missing from
+            a batched answer
+        max_prompt_tokens: Budget per request: prompt plus the answer tokens
+            reserved per document (``num_ctx``)
+        max_docs: Upper bound on documents per request (None for no bound)
+        max_concurrency: LLM requests in flight
+        request_timeout: Seconds per request (None for no limit)
+    """
+
+    def __init__(self,
+                 llm: Any,
+                 batch_template: 'BatchedPromptTemplate',
+                 fallback_template: 'PromptTemplate',
+                 max_prompt_tokens: int = 2048,
+                 max_docs: Optional[int] = None,
+                 max_concurrency: int = 4,
+                 request_timeout: Optional[float] = 300.0):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.llm = llm
+        self.batch_template = batch_template
+        self.fallback_template = fallback_template
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_docs = max_docs
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+
+    def batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Document indices sent together, in input order"""
+        doc_tokens = [self.batch_template.count_tokens(text) for text in texts]
+        return self.batch_template.pack(doc_tokens, self.max_prompt_tokens, self.max_docs)
+
+    async def _call_llm(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            return await invoke_llm(self.llm, prompt, self.request_timeout)
+
+    async def _extract_single(self, text: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        try:
+            response = await self._call_llm(self.fallback_template.render(text), semaphore)
+        except Exception:
+            return {"entities": parse_ner_response_with_status('').entities,
+                    "status": ParseStatus.EMPTY, "failed": True}
+        parsed = parse_ner_response_with_status(response)
+        return {"entities": parsed.entities, "status": parsed.status, "failed": False}
+
+    async def _extract_batch(self,
+                             texts: Sequence[str],
+                             indices: List[int],
+                             semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        start_time = time.time()
+        batch = [texts[i] for i in indices]
+        try:
+            response = await self._call_llm(self.batch_template.render(batch), semaphore)
+        except Exception:
+            response = ''
+        parsed = parse_batched_response(response, len(batch))
+
+        missing = [k for k, result in enumerate(parsed) if result.status == ParseStatus.MISSING]
+        singles = await asyncio.gather(*(self._extract_single(batch[k], semaphore) for k in missing))
+        fallback = dict(zip(missing, singles))
+
+        elapsed = time.time() - start_time
+        results = []
+        for k, result in enumerate(parsed):
+            if k in fallback:
+                results.append({**fallback[k], "batch_size": len(batch), "fallback": True,
+                                "elapsed": elapsed})
+            else:
+                results.append({"entities": result.entities, "status": result.status,
+                                "failed": False, "batch_size": len(batch), "fallback": False,
+                                "elapsed": elapsed})
+        return results
+
+    async def _run(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        batches = self.batches(texts)
+        outputs = await asyncio.gather(*(self._extract_batch(texts, indices, semaphore)
+                                         for indices in batches))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        for indices, output in zip(batches, outputs):
+            for i, result in zip(indices, output):
+                results[i] = result
+        return results
+
+    def extract_many(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Extract every document; results in input order
+
+        Returns:
+            One dict per document with 'entities', 'status' (``ParseStatus``
+            of the answer used), 'failed' (the fallback request raised),
+            'batch_size', 'fallback' (re-extracted on its own) and 'elapsed'
+            (of its whole batch, fallbacks included)
+        """
+        return run_coroutine(self._run(texts))
+
+    async def aextract_many(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """``extract_many`` for callers already inside an event loop"""
+        return await self._run(texts)
@@ -0,0 +1,177 @@
+"""Cascade extraction: gazetteer first, LLM only for uncertain documents
+
+Every document is tagged by the gazetteer (``GazetteerExtractor``), which
+takes about a millisecond. Its confidence is the share of capitalized spans
+(candidate names) covered by a gazetteer match. A document whose names are
+all known needs no LLM call. The least confident documents are escalated
+to a slower extractor: a zero-shot prompt, RAG, or a fine-tuned model. How
+many are escalated is set by ``escalation_rate`` (a share of every batch)
+or by a confidence ``threshold``.
+
+Example:
+    >>> template = PromptTemplate('zero_shot')
+    >>> cascade = CascadeExtractor(GazetteerExtractor(gazetteer),
+    ...                            llm_escalation(llm, template.render), escalation_rate=0.3)
+    >>> results = cascade.extract_many(texts)
+    >>> results[0]['entities'], results[0]['confidence'], results[0]['escalated']
+"""
+
+import asyncio
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .chunked_extraction import merge_entities
+from .gazetteer import GazetteerExtractor, Match
+from .llm_calls import invoke_llm, run_coroutine
+from .response_parser import parse_ner_response_with_status
+
+_WORD_RE = re.compile(r'\w+')
+# Characters that may sit between a sentence end and its first word
+_OPENERS = ' \t"“‘(['
+_SENTENCE_ENDS = '.!?:…\n'
+
+
+def _opens_sentence(text: str, start: int) -> bool:
+    before = text[:start].rstrip(_OPENERS)
+    return not before or before[-1] in _SENTENCE_ENDS
+
+
+def capitalized_spans(text: str) -> List[Tuple[int, int]]:
+    """Runs of capitalized words, except a lone word opening a sentence"""
+    spans = []
+    run_start = run_end = None
+    count = 0
+    for word in _WORD_RE.finditer(text):
+        capitalized = word.group()[0].isupper()
+        if capitalized and run_end is not None and text[run_end:word.start()] == ' ':
+            run_end = word.end()
+            count += 1
+            continue
+        if run_start is not None and not (count == 1 and _opens_sentence(text, run_start)):
+            spans.append((run_start, run_end))
+        run_start, run_end, count = (word.start(), word.end(), 1) if capitalized else (None, None, 0)
+    if run_start is not None and not (count == 1 and _opens_sentence(text, run_start)):
+        spans.append((run_start, run_end))
+    return spans
+
+
+def gazetteer_confidence(text: str, matches: Sequence[Match]) -> float:
+    """Share of capitalized spans overlapping a gazetteer match (1.0 if none)"""
+    spans = capitalized_spans(text)
+    if not spans:
+        return 1.0
+    covered = 0
+    i = 0
+    for start, end in spans:
+        # Spans and (non-overlapping) matches are both sorted by position
+        while i < len(matches) and matches[i].end <= start:
+            i += 1
+        if i < len(matches) and matches[i].start < end:
+            covered += 1
+    return covered / len(spans)
+
+
+def llm_escalation(llm: Any,
+                   render: Callable[[str], str],
+                   max_concurrency: int = 4,
+                   request_timeout: Optional[float] = 300.0) -> Callable[[List[str]], List[Dict[str, List]]]:
+    """Escalation backend: ``render`` each text, call ``llm`` concurrently, parse
+
+    ``render`` is e.g. ``build_zero_shot_prompt`` or ``PromptTemplate.render``.
+    A failed request yields empty entities. Pass a ``CachedLLM`` to share the
+    response cache.
+    """
+    async def call(prompt: str, semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            return await invoke_llm(llm, prompt, request_timeout)
+
+    async def run(texts: List[str]) -> List[Any]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(*(call(render(text), semaphore) for text in texts),
+                                    return_exceptions=True)
+
+    def escalate(texts: List[str]) -> List[Dict[str, List]]:
+        responses = run_coroutine(run(texts))
+        return [parse_ner_response_with_status('' if isinstance(response, BaseException) else response).entities
+                for response in responses]
+
+    return escalate
+
+
+class CascadeExtractor:
+    """Gazetteer extraction with LLM escalation of low-confidence documents
+
+    Args:
+        fast: Gazetteer extractor applied to every document
+        escalate: ``escalate(texts) -> [entities, ...]`` for the escalated
+            documents (``llm_escalation``, or a wrapper around
+            ``RAGNERExtractor.batch_extract_with_rag``)
+        escalation_rate: Share of each ``extract_many`` batch escalated,
+            least confident first (0 never calls ``escalate``, 1 always does)
+        threshold: Escalate documents with confidence below this instead
+            (used when ``escalation_rate`` is None)
+        merge: Add the gazetteer's matches to the escalated output
+    """
+
+    def __init__(self,
+                 fast: GazetteerExtractor,
+                 escalate: Callable[[List[str]], List[Dict[str, List]]],
+                 escalation_rate: Optional[float] = 0.3,
+                 threshold: float = 1.0,
+                 merge: bool = True):
+        if escalation_rate is not None and not 0 <= escalation_rate <= 1:
+            raise ValueError(f"escalation_rate must be in [0, 1], got {escalation_rate}")
+        self.fast = fast
+        self.escalate = escalate
+        self.escalation_rate = escalation_rate
+        self.threshold = threshold
+        self.merge = merge
+
+    def score(self, text: str) -> Tuple[Dict[str, List], float]:
+        """Gazetteer entities and confidence for one document"""
+        matches = self.fast.gazetteer.tag(text)
+        return self.fast.extract_matches(text, matches), gazetteer_confidence(text, matches)
+
+    def _escalated(self, confidences: List[float]) -> List[int]:
+        if self.escalation_rate is None:
+            return [i for i, c in enumerate(confidences) if c < self.threshold]
+        count = math.ceil(self.escalation_rate * len(confidences) - 1e-9)
+        order = sorted(range(len(confidences)), key=lambda i: confidences[i])
+        return sorted(order[:count])
+
+    def extract_many(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Extract every document; results in input order
+
+        Returns:
+            One dict per document with 'entities', 'confidence', 'escalated'
+            and 'fast_entities' (the gazetteer output)
+        """
+        texts = list(texts)
+        scored = [self.score(text) for text in texts]
+        escalated = self._escalated([confidence for _, confidence in scored])
+
+        slow = dict(zip(escalated, self.escalate([texts[i] for i in escalated]))) if escalated else {}
+        results = []
+        for i, (fast_entities, confidence) in enumerate(scored):
+            entities = fast_entities
+            if i in slow:
+                entities = merge_entities([slow[i], fast_entities]) if self.merge else slow[i]
+            results.append({
+                "entities": entities,
+                "confidence": confidence,
+                "escalated": i in slow,
+                "fast_entities": fast_entities,
+            })
+        return results
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Extract one document, escalated if its confidence is below ``threshold``"""
+        fast_entities, confidence = self.score(text)
+        entities = fast_entities
+        escalated = confidence < self.threshold
+        if escalated:
+            slow = self.escalate([text])[0]
+            entities = merge_entities([slow, fast_entities]) if self.merge else slow
+        return {"entities": entities, "confidence": confidence, "escalated": escalated,
+                "fast_entities": fast_entities}
@@ -0,0 +1,138 @@
+"""Chunked extraction for documents longer than the model's comfortable context
+
+Each document is split on sentence boundaries to a prompt-token budget
+(``PromptTemplate.chunk``). Every chunk is extracted as its own LLM request, with
+the chunks of all documents sharing one concurrency limit. The per-chunk
+entity lists are then merged, and entities seen twice in overlapping text
+are dropped.
+
+Example:
+    >>> extractor = ChunkedExtractor(llm, PromptTemplate('zero_shot'), max_prompt_tokens=1024)
+    >>> results = extractor.extract_many([r['text'] for r in records])
+    >>> results[0]['entities'], results[0]['chunks']
+"""
+
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from .llm_calls import invoke_llm, run_coroutine
+from .response_parser import parse_ner_response_with_status
+
+if TYPE_CHECKING:
+    from prompt.compiled import PromptTemplate
+
+ENTITY_KEYS = ('person', 'organizations', 'address')
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _dedup_key(entity: Any) -> str:
+    """Entity text with whitespace collapsed and trailing punctuation removed"""
+    return _SPACE_RE.sub(' ', str(entity)).strip().rstrip('.,;:')
+
+
+def merge_entities(chunk_entities: Sequence[Dict[str, List]],
+                   entity_types: Sequence[str] = ENTITY_KEYS) -> Dict[str, List]:
+    """Union per-chunk entity lists in chunk order, without duplicates
+
+    The first spelling of each entity is kept. Entities that differ only in
+    spacing or trailing punctuation count as duplicates. Entities that merely
+    contain one another ("Phúc" and "Đức Phúc") are kept, as in the ground
+    truth.
+    """
+    merged = {}
+    for entity_type in entity_types:
+        seen = set()
+        values = []
+        for entities in chunk_entities:
+            for entity in entities.get(entity_type, []):
+                key = _dedup_key(entity)
+                if key and key not in seen:
+                    seen.add(key)
+                    values.append(entity)
+        merged[entity_type] = values
+    return merged
+
+
+class ChunkedExtractor:
+    """Extract entities chunk by chunk and merge them per document
+
+    Args:
+        llm: Object with ``invoke(prompt)`` (and optionally ``ainvoke``); wrap
+            it in ``CachedLLM`` to share the response cache
+        template: Compiled prompt used for every chunk
+        max_prompt_tokens: Budget for template + chunk. Documents that fit are
+            sent whole.
+        overlap_tokens: Sentence overlap between consecutive chunks
+        max_concurrency: LLM requests in flight across all documents
+        request_timeout: Seconds per request (None for no limit)
+    """
+
+    def __init__(self,
+                 llm: Any,
+                 template: 'PromptTemplate',
+                 max_prompt_tokens: int = 1024,
+                 overlap_tokens: int = 64,
+                 max_concurrency: int = 4,
+                 request_timeout: Optional[float] = 300.0):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.llm = llm
+        self.template = template
+        self.max_prompt_tokens = max_prompt_tokens
+        self.overlap_tokens = overlap_tokens
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+
+    def chunks(self, text: str) -> List[str]:
+        """Chunks of one document (the whole text if it fits the budget)"""
+        return self.template.chunk(text, self.max_prompt_tokens, self.overlap_tokens)
+
+    async def _call_llm(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            return await invoke_llm(self.llm, prompt, self.request_timeout)
+
+    async def _extract_one(self, text: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        start_time = time.time()
+        chunks = self.chunks(text)
+        responses = await asyncio.gather(
+            *(self._call_llm(self.template.render(chunk), semaphore) for chunk in chunks),
+            return_exceptions=True,
+        )
+
+        chunk_entities = []
+        failed = 0
+        for response in responses:
+            if isinstance(response, BaseException):
+                failed += 1
+                continue
+            chunk_entities.append(parse_ner_response_with_status(response).entities)
+        return {
+            "entities": merge_entities(chunk_entities),
+            "chunks": len(chunks),
+            "failed_chunks": failed,
+            "elapsed": time.time() - start_time,
+        }
+
+    async def _run(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self._extract_one(text, semaphore) for text in texts))
+
+    def extract_many(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Extract every document; results in input order
+
+        Returns:
+            One dict per document with 'entities' (merged), 'chunks',
+            'failed_chunks' (requests that raised) and 'elapsed'
+        """
+        return run_coroutine(self._run(texts))
+
+    async def aextract_many(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """``extract_many`` for callers already inside an event loop"""
+        return await self._run(texts)
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Extract one document"""
+        return self.extract_many([text])[0]
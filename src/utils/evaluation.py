@@ -5,11 +5,12 @@ including fuzzy matching, JSON parsing, and result comparison.
 """
 
 import json
-import re
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any
-from difflib import SequenceMatcher
+
+from .fuzzy import fuzzy_match_entities
+from .response_parser import parse_ner_response_with_status
 
 
 # ============================================================================
@@ -21,101 +22,10 @@ def calculate_accuracy(predictions: List[Dict], ground_truth: List[Dict]) -> Dic
     
     Returns metrics as ratios (0-1), not percentages.
     """
-    correct = 0
-    total = len(ground_truth)
-    entity_types = ['person', 'organizations', 'address']
-    
-    # Initialize per-type counters
-    per_type_metrics = {
-        entity_type: {'tp': 0, 'fp': 0, 'fn': 0, 'correct_samples': 0} 
-        for entity_type in entity_types
-    }
-    
-    # Overall counters
-    overall_tp = overall_fp = overall_fn = 0
-    
-    # Calculate metrics for each prediction
+    accumulator = MetricsAccumulator(normalize=True)
     for pred, gt in zip(predictions, ground_truth):
-        if _exact_match(pred, gt):
-            correct += 1
-
-        for entity_type in entity_types:
-            pred_entities = set(_normalize_entities(pred.get(entity_type, [])))
-            gt_entities = set(_normalize_entities(gt.get(entity_type, [])))
-            
-            # Fuzzy match entities
-            matched = _fuzzy_match_entities(pred_entities, gt_entities)
-            
-            # Check if entity type is completely correct
-            if len(matched) == len(gt_entities) and len(pred_entities) == len(gt_entities):
-                per_type_metrics[entity_type]['correct_samples'] += 1
-            
-            # Calculate TP, FP, FN
-            tp = len(matched)
-            fn = len(gt_entities) - tp
-            fp = len(pred_entities) - tp
-            
-            per_type_metrics[entity_type]['tp'] += tp
-            per_type_metrics[entity_type]['fp'] += fp
-            per_type_metrics[entity_type]['fn'] += fn
-            
-            overall_tp += tp
-            overall_fp += fp
-            overall_fn += fn
-    
-    # Calculate overall accuracy (0-1)
-    accuracy = (correct / total) if total > 0 else 0
-
-    # Calculate per-entity-type metrics (0-1)
-    per_type_results = {}
-    for entity_type in entity_types:
-        metrics = per_type_metrics[entity_type]
-        tp, fp, fn = metrics['tp'], metrics['fp'], metrics['fn']
-
-        precision = (tp / (tp + fp)) if (tp + fp) > 0 else 0
-        recall = (tp / (tp + fn)) if (tp + fn) > 0 else 0
-        f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0
-        accuracy_type = (metrics['correct_samples'] / total) if total > 0 else 0
-
-        per_type_results[entity_type] = {
-            'precision': precision,
-            'recall': recall,
-            'f1': f1,
-            'accuracy': accuracy_type,
-            'tp': tp,
-            'fp': fp,
-            'fn': fn,
-            'correct_samples': metrics['correct_samples'],
-            'total_samples': total,
-            'precision_pct': f"{precision * 100:.1f}%",
-            'recall_pct': f"{recall * 100:.1f}%",
-            'f1_pct': f"{f1 * 100:.1f}%",
-            'accuracy_pct': f"{accuracy_type * 100:.1f}%"
-        }
-
-    # Calculate overall entity-level metrics (0-1)
-    overall_precision = (overall_tp / (overall_tp + overall_fp)) if (overall_tp + overall_fp) > 0 else 0
-    overall_recall = (overall_tp / (overall_tp + overall_fn)) if (overall_tp + overall_fn) > 0 else 0
-    overall_f1 = (2 * overall_precision * overall_recall / (overall_precision + overall_recall)) if (overall_precision + overall_recall) > 0 else 0
-    
-    return {
-        'accuracy': accuracy,
-        'correct': correct,
-        'total': total,
-        'percentage': f"{accuracy * 100:.1f}%",
-        'per_entity_type': per_type_results,
-        'overall_entity_metrics': {
-            'precision': overall_precision,
-            'recall': overall_recall,
-            'f1': overall_f1,
-            'tp': overall_tp,
-            'fp': overall_fp,
-            'fn': overall_fn,
-            'precision_pct': f"{overall_precision * 100:.1f}%",
-            'recall_pct': f"{overall_recall * 100:.1f}%",
-            'f1_pct': f"{overall_f1 * 100:.1f}%"
-        }
-    }
+        accumulator.update(pred, gt)
+    return accumulator.result(scale=1, total=len(ground_truth))
 
 
 def _exact_match(pred: Dict, gt: Dict, similarity_threshold: float = 0.8) -> bool:
@@ -150,13 +60,168 @@ def _normalize_entities(entities: list) -> list:
 
 def _fuzzy_match_entities(pred_set: set, gt_set: set) -> set:
     """Match entities using fuzzy string similarity (threshold=0.8)"""
-    matched = set()
-    for pred_entity in pred_set:
-        for gt_entity in gt_set:
-            if SequenceMatcher(None, pred_entity, gt_entity).ratio() > 0.8:
-                matched.add(gt_entity)
-                break
-    return matched
+    return fuzzy_match_entities(pred_set, gt_set, 0.8)
+
+
+# ============================================================================
+# Streaming Metrics Accumulator
+# ============================================================================
+
+class MetricsAccumulator:
+    """Accumulate NER metrics one document at a time
+
+    Each (document, entity type) pair is fuzzy-matched once; exact match,
+    per-type and micro-averaged metrics are all derived from that single
+    match. ``result()`` can be called at any point, so metrics can be
+    reported live while predictions arrive. Entities are matched in sorted
+    order, so results are reproducible across processes and runs.
+
+    Args:
+        entity_types: Entity types to score (default: person, organizations, address)
+        similarity_threshold: Fuzzy match threshold (ratio must be strictly greater)
+        normalize: Convert dict/non-string entities to strings first
+            (as ``calculate_accuracy`` does)
+
+    Example:
+        >>> accumulator = MetricsAccumulator()
+        >>> for pred, gt in zip(predictions, ground_truths):
+        ...     accumulator.update(pred, gt)
+        >>> accumulator.result(scale=100)['overall_entity_metrics']['f1']
+    """
+
+    def __init__(self,
+                 entity_types: List[str] = None,
+                 similarity_threshold: float = 0.8,
+                 normalize: bool = False):
+        self.entity_types = list(entity_types) if entity_types is not None else ['person', 'organizations', 'address']
+        self.similarity_threshold = similarity_threshold
+        self.normalize = normalize
+        self.reset()
+
+    def reset(self):
+        """Clear all counters"""
+        self.total = 0
+        self.correct = 0
+        self.per_type = {
+            entity_type: {'tp': 0, 'fp': 0, 'fn': 0, 'correct_samples': 0}
+            for entity_type in self.entity_types
+        }
+
+    def _entities(self, result: Dict, entity_type: str) -> List:
+        """Unique entities in sorted order, so matching is independent of set hashing"""
+        entities = result.get(entity_type, [])
+        return sorted(set(_normalize_entities(entities) if self.normalize else entities), key=str)
+
+    def update(self, pred: Dict, gt: Dict) -> bool:
+        """Score one document; returns whether it is an exact match"""
+        exact = True
+        for entity_type in self.entity_types:
+            pred_entities = self._entities(pred, entity_type)
+            gt_entities = self._entities(gt, entity_type)
+            matched = fuzzy_match_entities(pred_entities, gt_entities, self.similarity_threshold)
+
+            tp = len(matched)
+            counts = self.per_type[entity_type]
+            counts['tp'] += tp
+            counts['fp'] += len(pred_entities) - tp
+            counts['fn'] += len(gt_entities) - tp
+
+            if tp != len(gt_entities):
+                exact = False
+            elif len(pred_entities) == len(gt_entities):
+                counts['correct_samples'] += 1
+
+        self.total += 1
+        if exact:
+            self.correct += 1
+        return exact
+
+    def state(self) -> Dict:
+        """Integer counters, e.g. to send back from a worker process"""
+        return {
+            'total': self.total,
+            'correct': self.correct,
+            'per_type': {t: dict(counts) for t, counts in self.per_type.items()},
+        }
+
+    def merge(self, state: Dict):
+        """Add counters from ``state()`` of another accumulator"""
+        self.total += state['total']
+        self.correct += state['correct']
+        for entity_type, counts in state['per_type'].items():
+            for name, value in counts.items():
+                self.per_type[entity_type][name] += value
+
+    def result(self, scale: float = 1, total: int = None) -> Dict:
+        """Build the metrics dict
+
+        Args:
+            scale: 1 for ratios (0-1), 100 for percentages (0-100)
+            total: Number of documents to divide by (defaults to the update count)
+        """
+        total = self.total if total is None else total
+        pct = 100 / scale
+
+        def ratio(numerator, denominator):
+            return (numerator / denominator) * scale if denominator > 0 else 0
+
+        def f1_score(precision, recall):
+            return (2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0
+
+        accuracy = ratio(self.correct, total)
+
+        per_type_results = {}
+        overall_tp = overall_fp = overall_fn = 0
+        for entity_type in self.entity_types:
+            metrics = self.per_type[entity_type]
+            tp, fp, fn = metrics['tp'], metrics['fp'], metrics['fn']
+            overall_tp += tp
+            overall_fp += fp
+            overall_fn += fn
+
+            precision = ratio(tp, tp + fp)
+            recall = ratio(tp, tp + fn)
+            f1 = f1_score(precision, recall)
+            accuracy_type = ratio(metrics['correct_samples'], total)
+
+            per_type_results[entity_type] = {
+                'precision': precision,
+                'recall': recall,
+                'f1': f1,
+                'accuracy': accuracy_type,
+                'tp': tp,
+                'fp': fp,
+                'fn': fn,
+                'correct_samples': metrics['correct_samples'],
+                'total_samples': total,
+                'precision_pct': f"{precision * pct:.1f}%",
+                'recall_pct': f"{recall * pct:.1f}%",
+                'f1_pct': f"{f1 * pct:.1f}%",
+                'accuracy_pct': f"{accuracy_type * pct:.1f}%"
+            }
+
+        overall_precision = ratio(overall_tp, overall_tp + overall_fp)
+        overall_recall = ratio(overall_tp, overall_tp + overall_fn)
+        overall_f1 = f1_score(overall_precision, overall_recall)
+
+        return {
+            'accuracy': accuracy,
+            'correct': self.correct,
+            'total': total,
+            'percentage': f"{accuracy * pct:.1f}%",
+            'per_entity_type': per_type_results,
+            'overall_entity_metrics': {
+                'precision': overall_precision,
+                'recall': overall_recall,
+                'f1': overall_f1,
+                'tp': overall_tp,
+                'fp': overall_fp,
+                'fn': overall_fn,
+                'precision_pct': f"{overall_precision * pct:.1f}%",
+                'recall_pct': f"{overall_recall * pct:.1f}%",
+                'f1_pct': f"{overall_f1 * pct:.1f}%"
+            }
+        }
 
 
 # ============================================================================
@@ -223,34 +288,49 @@ def print_comparison_table(results: Dict, sort_by: str = 'f1'):
     print(f"  Method Comparison (sorted by {sort_by.upper()})")
     print("="*100)
 
+    # CI columns appear once any method has bootstrap intervals attached
+    # (see utils.resampling.attach_confidence_intervals)
+    has_ci = any('accuracy_ci_pct' in result for _, result in sorted_methods)
+
     # Overall metrics
-    print(f"\n{'Method':<20} {'Exact Match':<15} {'Precision':<12} {'Recall':<12} {'F1-Score':<12}")
+    header = f"\n{'Method':<20} {'Exact Match':<15} {'Precision':<12} {'Recall':<12} {'F1-Score':<12}"
+    if has_ci:
+        header += f" {'Exact Match CI':<16} {'F1 CI':<16}"
+    print(header)
     print("-" * 100)
     for method, result in sorted_methods:
         overall = result.get('overall_entity_metrics', {})
-        print(
+        row = (
             f"{method:<20} "
             f"{result.get('percentage', 'N/A'):<15} "
             f"{overall.get('precision_pct', 'N/A'):<12} "
             f"{overall.get('recall_pct', 'N/A'):<12} "
             f"{overall.get('f1_pct', 'N/A'):<12}"
         )
+        if has_ci:
+            row += f" {result.get('accuracy_ci_pct', 'N/A'):<16} {overall.get('f1_ci_pct', 'N/A'):<16}"
+        print(row)
 
     # Per-type F1 comparison
     print("\n" + "="*100)
     print("  Per-Type F1-Score Comparison")
     print("="*100)
-    print(f"\n{'Method':<20} {'Person':<12} {'Organizations':<15} {'Address':<12}")
+    width = 26 if has_ci else 12
+    print(f"\n{'Method':<20} {'Person':<{width}} {'Organizations':<{width + 3}} {'Address':<{width}}")
     print("-" * 100)
 
-    entity_types = ['person', 'organizations', 'address']
+    def type_f1(per_type: Dict, entity_type: str) -> str:
+        metrics = per_type.get(entity_type, {})
+        value = metrics.get('f1_pct', 'N/A')
+        return f"{value} {metrics['f1_ci_pct']}" if has_ci and 'f1_ci_pct' in metrics else value
+
     for method, result in sorted_methods:
         per_type = result.get('per_entity_type', {})
         print(
             f"{method:<20} "
-            f"{per_type.get('person', {}).get('f1_pct', 'N/A'):<12} "
-            f"{per_type.get('organizations', {}).get('f1_pct', 'N/A'):<15} "
-            f"{per_type.get('address', {}).get('f1_pct', 'N/A'):<12}"
+            f"{type_f1(per_type, 'person'):<{width}} "
+            f"{type_f1(per_type, 'organizations'):<{width + 3}} "
+            f"{type_f1(per_type, 'address'):<{width}}"
         )
 
     print("\n" + "="*100)
@@ -267,53 +347,11 @@ def parse_ner_response(response_text: str) -> Dict[str, List[str]]:
     - Markdown code blocks (```json, ```)
     - Extra text before/after JSON
     - Key variations (organizations/organization, address/addresses)
-    """
-    default_result = {
-        "person": [],
-        "organizations": [],
-        "address": []
-    }
-
-    # Remove markdown code blocks
-    cleaned_text = response_text.strip()
-    
-    if cleaned_text.startswith('```'):
-        first_newline = cleaned_text.find('\n')
-        if first_newline != -1:
-            cleaned_text = cleaned_text[first_newline + 1:]
-    
-    if '```' in cleaned_text:
-        last_backticks = cleaned_text.rfind('```')
-        if last_backticks != -1:
-            cleaned_text = cleaned_text[:last_backticks]
-    
-    cleaned_text = cleaned_text.strip()
-
-    # Extract JSON using regex
-    json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', cleaned_text, re.DOTALL)
-
-    if not json_match:
-        return default_result
-
-    try:
-        parsed = json.loads(json_match.group())
-        
-        # Handle key variations
-        result = {
-            "person": parsed.get("person", []),
-            "organizations": parsed.get("organizations", parsed.get("organization", [])),
-            "address": parsed.get("address", parsed.get("addresses", []))
-        }
-
-        # Ensure all values are lists
-        for key in result:
-            if not isinstance(result[key], list):
-                result[key] = [str(result[key])] if result[key] else []
+    - Truncated JSON (complete elements are recovered)
 
-        return result
-
-    except json.JSONDecodeError:
-        return default_result
+    Use ``parse_ner_response_with_status`` to also get a parse-status code.
+    """
+    return parse_ner_response_with_status(response_text).entities
 
 
 def save_json_with_numpy_conversion(data: Any, filepath: str):
@@ -362,7 +400,10 @@ def compute_entity_metrics_with_fuzzy(
         gt_entities = set(gt.get(entity_type, []))
 
         if use_fuzzy_match:
-            matched = _fuzzy_match_entities_with_threshold(pred_entities, gt_entities, similarity_threshold)
+            # Sorted order keeps results independent of set hashing (as in MetricsAccumulator)
+            matched = _fuzzy_match_entities_with_threshold(
+                sorted(pred_entities, key=str), sorted(gt_entities, key=str), similarity_threshold
+            )
             tp = len(matched)
             fn = len(gt_entities) - tp
             fp = len(pred_entities) - tp
@@ -414,13 +455,7 @@ def _fuzzy_match_entities_with_threshold(
     similarity_threshold: float = 0.8
 ) -> set:
     """Match entities using configurable similarity threshold"""
-    matched = set()
-    for pred_entity in pred_set:
-        for gt_entity in gt_set:
-            if SequenceMatcher(None, pred_entity, gt_entity).ratio() > similarity_threshold:
-                matched.add(gt_entity)
-                break
-    return matched
+    return fuzzy_match_entities(pred_set, gt_set, similarity_threshold)
 
 
 def compute_comprehensive_metrics(
@@ -438,112 +473,10 @@ def compute_comprehensive_metrics(
     
     All metrics returned as percentages (0-100).
     """
-    if entity_types is None:
-        entity_types = ['person', 'organizations', 'address']
-    
-    correct = 0
-    total = len(ground_truth)
-
-    # Per-type counters
-    per_type_metrics = {
-        entity_type: {'tp': 0, 'fp': 0, 'fn': 0, 'correct_samples': 0}
-        for entity_type in entity_types
-    }
-
-    # Overall counters
-    overall_tp = overall_fp = overall_fn = 0
-
-    # Process each prediction
+    accumulator = MetricsAccumulator(entity_types, similarity_threshold)
     for pred, gt in zip(predictions, ground_truth):
-        # Check exact match with fuzzy matching
-        exact_match_flag = True
-        for key in entity_types:
-            pred_entities = set(pred.get(key, []))
-            gt_entities = set(gt.get(key, []))
-            
-            matched = _fuzzy_match_entities_with_threshold(pred_entities, gt_entities, similarity_threshold)
-            if len(matched) != len(gt_entities):
-                exact_match_flag = False
-                break
-        
-        if exact_match_flag:
-            correct += 1
-
-        # Per-type metrics
-        for entity_type in entity_types:
-            pred_entities = set(pred.get(entity_type, []))
-            gt_entities = set(gt.get(entity_type, []))
-
-            matched = _fuzzy_match_entities_with_threshold(pred_entities, gt_entities, similarity_threshold)
-
-            if len(matched) == len(gt_entities) and len(pred_entities) == len(gt_entities):
-                per_type_metrics[entity_type]['correct_samples'] += 1
-
-            tp = len(matched)
-            fn = len(gt_entities) - tp
-            fp = len(pred_entities) - tp
-
-            per_type_metrics[entity_type]['tp'] += tp
-            per_type_metrics[entity_type]['fp'] += fp
-            per_type_metrics[entity_type]['fn'] += fn
-
-            overall_tp += tp
-            overall_fp += fp
-            overall_fn += fn
-
-    # Calculate overall accuracy (as percentage)
-    accuracy = (correct / total) * 100 if total > 0 else 0
-
-    # Calculate per-type metrics (as percentages)
-    per_type_results = {}
-    for entity_type in entity_types:
-        metrics = per_type_metrics[entity_type]
-        tp, fp, fn = metrics['tp'], metrics['fp'], metrics['fn']
-
-        precision = (tp / (tp + fp)) * 100 if (tp + fp) > 0 else 0
-        recall = (tp / (tp + fn)) * 100 if (tp + fn) > 0 else 0
-        f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0
-        accuracy_type = (metrics['correct_samples'] / total) * 100 if total > 0 else 0
-
-        per_type_results[entity_type] = {
-            'precision': precision,
-            'recall': recall,
-            'f1': f1,
-            'accuracy': accuracy_type,
-            'tp': tp,
-            'fp': fp,
-            'fn': fn,
-            'correct_samples': metrics['correct_samples'],
-            'total_samples': total,
-            'precision_pct': f"{precision:.1f}%",
-            'recall_pct': f"{recall:.1f}%",
-            'f1_pct': f"{f1:.1f}%",
-            'accuracy_pct': f"{accuracy_type:.1f}%"
-        }
-
-    # Calculate overall metrics (as percentages)
-    overall_precision = (overall_tp / (overall_tp + overall_fp)) * 100 if (overall_tp + overall_fp) > 0 else 0
-    overall_recall = (overall_tp / (overall_tp + overall_fn)) * 100 if (overall_tp + overall_fn) > 0 else 0
-    overall_f1 = (2 * overall_precision * overall_recall / (overall_precision + overall_recall)) if (overall_precision + overall_recall) > 0 else 0
-
-    return {
-        'accuracy': accuracy,
-        'correct': correct,
-        'total': total,
-        'percentage': f"{accuracy:.1f}%",
-        'per_entity_type': per_type_results,
-        'overall_entity_metrics': {
-            'precision': overall_precision,
-            'recall': overall_recall,
-            'f1': overall_f1,
-            'tp': overall_tp,
-            'fp': overall_fp,
-            'fn': overall_fn,
-            'precision_pct': f"{overall_precision:.1f}%",
-            'recall_pct': f"{overall_recall:.1f}%",
-            'f1_pct': f"{overall_f1:.1f}%"
-        }
-    }
+        accumulator.update(pred, gt)
+    return accumulator.result(scale=100, total=len(ground_truth))
 
 
 def print_comprehensive_comparison(
@@ -558,10 +491,18 @@ def print_comprehensive_comparison(
     print("COMPREHENSIVE EVALUATION RESULTS")
     print("="*100)
 
+    # CI columns appear once any method has bootstrap intervals attached
+    # (see utils.resampling.attach_confidence_intervals)
+    has_ci = any('accuracy_ci_pct' in result.get('comprehensive_metrics', result) for result in results.values())
+    ci_header = f" {'CI':<16}" if has_ci else ""
+
+    def ci(metrics: Dict, key: str) -> str:
+        return f" {metrics.get(key, 'N/A'):<16}" if has_ci else ""
+
     # Overall exact match accuracy
     print("\nOVERALL EXACT MATCH ACCURACY:")
     print("-"*100)
-    print(f"{'Method':<25} {'Accuracy':<15} {'Correct/Total':<20}")
+    print(f"{'Method':<25} {'Accuracy':<15}{ci_header} {'Correct/Total':<20}")
     print("-"*100)
     for method, result in results.items():
         accuracy_data = result.get('comprehensive_metrics', result)
@@ -569,33 +510,33 @@ def print_comprehensive_comparison(
             correct = accuracy_data.get('correct', 'N/A')
             total = accuracy_data.get('total', 'N/A')
             percentage = accuracy_data.get('percentage', 'N/A')
-            print(f"{method:<25} {percentage:<15} {correct}/{total:<20}")
+            print(f"{method:<25} {percentage:<15}{ci(accuracy_data, 'accuracy_ci_pct')} {correct}/{total:<20}")
 
     # Overall entity metrics
     print("\nOVERALL ENTITY-LEVEL METRICS:")
     print("-"*100)
-    print(f"{'Method':<25} {'Precision':<15} {'Recall':<15} {'F1-Score':<15}")
+    print(f"{'Method':<25} {'Precision':<15} {'Recall':<15} {'F1-Score':<15}{ci_header}")
     print("-"*100)
     for method, result in results.items():
         overall = result.get('comprehensive_metrics', result).get('overall_entity_metrics', {})
         if overall:
             print(f"{method:<25} {overall.get('precision_pct', 'N/A'):<15} "
                   f"{overall.get('recall_pct', 'N/A'):<15} "
-                  f"{overall.get('f1_pct', 'N/A'):<15}")
+                  f"{overall.get('f1_pct', 'N/A'):<15}{ci(overall, 'f1_ci_pct')}")
 
     # Per-type metrics
     print("\nPER-ENTITY-TYPE METRICS:")
     print("-"*100)
     for entity_type in entity_types:
         print(f"\n  {entity_type.upper()}:")
-        print(f"  {'Method':<25} {'Precision':<15} {'Recall':<15} {'F1-Score':<15} {'Accuracy':<15}")
+        print(f"  {'Method':<25} {'Precision':<15} {'Recall':<15} {'F1-Score':<15}{ci_header} {'Accuracy':<15}")
         print("  " + "-"*98)
         for method, result in results.items():
             per_type = result.get('comprehensive_metrics', result).get('per_entity_type', {}).get(entity_type, {})
             if per_type:
                 print(f"  {method:<25} {per_type.get('precision_pct', 'N/A'):<15} "
                       f"{per_type.get('recall_pct', 'N/A'):<15} "
-                      f"{per_type.get('f1_pct', 'N/A'):<15} "
+                      f"{per_type.get('f1_pct', 'N/A'):<15}{ci(per_type, 'f1_ci_pct')} "
                       f"{per_type.get('accuracy_pct', 'N/A'):<15}")
 
     print("\n" + "="*100)
@@ -0,0 +1,471 @@
+"""Local stand-ins for the Ollama services
+
+These fakes let the rewriting and extraction pipelines be exercised (and
+benchmarked) without a running Ollama server. ``FakeOllamaServer`` serves
+the streaming HTTP API for clients that talk to Ollama directly. They answer after a configurable
+delay so concurrency and throughput behave like the real thing.
+``FakeEmbedder`` gives deterministic embeddings for the RAG pipeline.
+``make_noisy_predictions`` and ``make_fake_responses`` stand in for saved
+model outputs when benchmarking the evaluation and parsing code.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Union
+
+
+class FakeLLM:
+    """Drop-in replacement for ``OllamaLLM`` with a configurable delay
+
+    Args:
+        response: Fixed response text, or a callable mapping prompt -> response.
+            Defaults to echoing the prompt back.
+        delay: Seconds to wait before answering each request
+        failure_rate: Probability (0-1) that a request raises ``RuntimeError``
+        seed: Random seed for the failure injection
+        model: Model name reported to callers (e.g. cache keys)
+    """
+
+    def __init__(self,
+                 response: Union[str, Callable[[str], str], None] = None,
+                 delay: float = 0.0,
+                 failure_rate: float = 0.0,
+                 seed: int = 42,
+                 model: str = "fake-llm"):
+        self.response = response
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.model = model
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Call accounting
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _respond(self, prompt: str) -> str:
+        with self._lock:
+            fail = self._random.random() < self.failure_rate
+        if fail:
+            raise RuntimeError("FakeLLM injected failure")
+        if callable(self.response):
+            return self.response(prompt)
+        if self.response is None:
+            return prompt
+        return self.response
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _delay_for(self, prompt: str) -> float:
+        """Seconds to wait before answering ``prompt``"""
+        return self.delay
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        """Answer a prompt after ``delay`` seconds (blocking)"""
+        self._enter()
+        try:
+            delay = self._delay_for(prompt)
+            if delay > 0:
+                time.sleep(delay)
+            return self._respond(prompt)
+        finally:
+            self._exit()
+
+    async def ainvoke(self, prompt: str, **kwargs) -> str:
+        """Answer a prompt after ``delay`` seconds (non-blocking)"""
+        self._enter()
+        try:
+            delay = self._delay_for(prompt)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return self._respond(prompt)
+        finally:
+            self._exit()
+
+
+class FakeExtractionLLM(FakeLLM):
+    """FakeLLM that answers NER prompts from a gazetteer, with a limited context
+
+    The documents are cut out of the prompt with the template's
+    ``documents``. The answer lists the gazetteer entities found in the part
+    of the document that fits in ``num_ctx``; like Ollama, an over-long prompt
+    loses its beginning. Each entity is also missed with probability
+    ``miss_per_1k`` per 1k document tokens, a stand-in for recall dropping on
+    long inputs. The delay is ``prefill_per_token`` per prompt token plus
+    ``decode_per_token`` per answer token.
+
+    Prompts rendered by ``batch_template`` are answered with a JSON array, one
+    object per document with its ``id``. Every document after the first in a
+    batch adds ``miss_per_batch_doc`` to the miss probability, and with
+    probability ``malformed_rate`` the array is cut off part way through.
+
+    Args:
+        gazetteer: ``{entity_type: [surface, ...]}``
+        template: ``PromptTemplate`` single-document prompts are rendered with
+        num_ctx: Context length in tokens (word/punctuation pieces)
+        miss_per_1k: Miss probability per 1k document tokens (capped at 0.9)
+        prefill_per_token: Seconds per prompt token
+        decode_per_token: Seconds per generated token
+        seed: Random seed for the misses
+        batch_template: ``BatchedPromptTemplate`` for multi-document prompts
+        miss_per_batch_doc: Extra miss probability per additional document
+        malformed_rate: Probability that a batched answer is cut off
+    """
+
+    def __init__(self,
+                 gazetteer: Dict[str, List[str]],
+                 template,
+                 num_ctx: int = 2048,
+                 miss_per_1k: float = 0.05,
+                 prefill_per_token: float = 0.0002,
+                 decode_per_token: float = 0.02,
+                 seed: int = 42,
+                 model: str = "fake-extraction-llm",
+                 batch_template=None,
+                 miss_per_batch_doc: float = 0.01,
+                 malformed_rate: float = 0.0):
+        super().__init__(response=self._answer, seed=seed, model=model)
+        self.gazetteer = {key: sorted(set(values)) for key, values in gazetteer.items()}
+        self.template = template
+        self.num_ctx = num_ctx
+        self.miss_per_1k = miss_per_1k
+        self.prefill_per_token = prefill_per_token
+        self.decode_per_token = decode_per_token
+        self.seed = seed
+        self.batch_template = batch_template
+        self.miss_per_batch_doc = miss_per_batch_doc
+        self.malformed_rate = malformed_rate
+
+    def _find_entities(self, document: str, extra_miss: float = 0.0) -> Dict[str, List[str]]:
+        tokens = split_tokens(document)
+        room = self.num_ctx - self.template.static_tokens
+        if len(tokens) > room:
+            document = ''.join(tokens[len(tokens) - max(room, 0):])
+        miss = min(0.9, self.miss_per_1k * len(tokens) / 1000 + extra_miss)
+
+        answer = {}
+        for key, surfaces in self.gazetteer.items():
+            answer[key] = [
+                surface for surface in surfaces
+                if surface in document
+                and random.Random(f"{self.seed}:{surface}:{len(tokens)}").random() >= miss
+            ]
+        return answer
+
+    def _answer(self, prompt: str) -> str:
+        if self.batch_template is not None and prompt.startswith(self.batch_template.head):
+            documents = self.batch_template.documents(prompt)
+            extra_miss = self.miss_per_batch_doc * (len(documents) - 1)
+            answer = [dict(id=i, **self._find_entities(document, extra_miss))
+                      for i, document in enumerate(documents, 1)]
+            text = json.dumps(answer, ensure_ascii=False, indent=1)
+            rng = random.Random(f"{self.seed}:{prompt}")
+            if rng.random() < self.malformed_rate:
+                text = text[:rng.randint(len(text) // 2, len(text) - 2)]
+            return text
+        try:
+            document = self.template.documents(prompt)[0]
+        except ValueError:
+            document = prompt
+        return json.dumps(self._find_entities(document), ensure_ascii=False)
+
+    def _delay_for(self, prompt: str) -> float:
+        return (len(split_tokens(prompt)) * self.prefill_per_token
+                + len(split_tokens(self._answer(prompt))) * self.decode_per_token)
+
+
+_TOKEN_RE = re.compile(r'\s*\w+|\s*[^\w\s]|\s+')
+
+
+def split_tokens(text: str) -> List[str]:
+    """Split text into word/punctuation pieces that stand in for LLM tokens"""
+    return _TOKEN_RE.findall(text)
+
+
+class FakeOllamaServer:
+    """Local HTTP server speaking Ollama's ``/api/generate`` protocol
+
+    Each response is streamed as NDJSON, one token per message,
+    ``token_delay`` seconds apart (or sent whole with ``"stream": false``).
+    Like Ollama, generation stops when the client disconnects. The server
+    also keeps the previous prompt's tokens as its KV cache, so
+    ``prompt_eval_count`` only counts tokens after the longest common prefix
+    (``keep_alive: 0`` drops the cache). ``requests`` logs ``{"prompt",
+    "prompt_eval_count", "tokens_sent", "tokens_total"}`` per request;
+    ``tokens_sent`` can exceed what the client read by a token or two still
+    in socket buffers.
+
+    Args:
+        response: Fixed response text, or a callable mapping prompt -> response
+        token_delay: Seconds between streamed tokens
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+
+    Example:
+        >>> with FakeOllamaServer(lambda prompt: '{"person": []}') as server:
+        ...     chunks = ollama_generate_stream("...", "fake", host=server.url)
+    """
+
+    def __init__(self,
+                 response: Union[str, Callable[[str], str]],
+                 token_delay: float = 0.0,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.response = response
+        self.token_delay = token_delay
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+        self._cached_tokens: List[str] = []
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body.get("prompt", "")
+                text = server.response(prompt) if callable(server.response) else server.response
+                tokens = split_tokens(text)
+                prompt_tokens = split_tokens(prompt)
+                with server._lock:
+                    prompt_eval_count = len(prompt_tokens) - server._reuse(prompt_tokens)
+                    server._cached_tokens = [] if body.get("keep_alive") == 0 else prompt_tokens
+                    log = {"prompt": prompt, "prompt_eval_count": prompt_eval_count,
+                           "tokens_sent": 0, "tokens_total": len(tokens)}
+                    server.requests.append(log)
+
+                model = body.get("model", "fake")
+                final = {"model": model, "response": "", "done": True,
+                         "prompt_eval_count": prompt_eval_count, "eval_count": len(tokens)}
+                if body.get("stream", True) is False:
+                    payload = json.dumps({**final, "response": text}, ensure_ascii=False).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    if server.token_delay > 0:
+                        time.sleep(server.token_delay * len(tokens))
+                    self.wfile.write(payload)
+                    log["tokens_sent"] = len(tokens)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                messages = [{"model": model, "response": token, "done": False} for token in tokens]
+                messages.append(final)
+                try:
+                    for message in messages:
+                        if server.token_delay > 0:
+                            time.sleep(server.token_delay)
+                        line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                        self.wfile.flush()
+                        if not message["done"]:
+                            log["tokens_sent"] += 1
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+        return Handler
+
+    def _reuse(self, prompt_tokens: List[str]) -> int:
+        """Prompt tokens served from the cache (at least one is re-evaluated)"""
+        common = 0
+        for cached, token in zip(self._cached_tokens, prompt_tokens):
+            if cached != token:
+                break
+            common += 1
+        return min(common, len(prompt_tokens) - 1) if prompt_tokens else 0
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeEmbedder:
+    """Deterministic stand-in for ``OllamaEmbeddings``
+
+    Each text becomes a hashed bag of its lower-cased words, L2-normalized,
+    so texts sharing words are similar and the same text always gets the same
+    vector. Each call sleeps ``delay_per_call`` plus ``delay_per_text`` per
+    text, like a batched ``/api/embed`` request.
+
+    Args:
+        dim: Vector dimension
+        delay_per_call: Seconds per ``embed_documents``/``embed_query`` call
+        delay_per_text: Seconds per embedded text
+    """
+
+    def __init__(self, dim: int = 768, delay_per_call: float = 0.0, delay_per_text: float = 0.0):
+        self.dim = dim
+        self.delay_per_call = delay_per_call
+        self.delay_per_text = delay_per_text
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for word in re.findall(r'\w+', text.lower()):
+            digest = hashlib.md5(word.encode('utf-8')).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            self.texts_embedded += len(texts)
+        delay = self.delay_per_call + self.delay_per_text * len(texts)
+        if delay > 0:
+            time.sleep(delay)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _perturb(entity: str, rng: random.Random) -> str:
+    """Apply one LLM-style surface error to an entity"""
+    words = entity.split()
+    edit = rng.randrange(5)
+    if edit == 0 and len(words) > 1:
+        # Drop a word ("Trần Thị Đ." -> "Thị Đ.")
+        words.pop(rng.randrange(len(words)))
+        return ' '.join(words)
+    if edit == 1:
+        return entity.lower()
+    position = rng.randrange(len(entity) + 1)
+    if edit == 2:
+        return entity[:position] + rng.choice('aeiouđ ') + entity[position:]
+    if edit == 3 and len(entity) > 1:
+        return entity[:position] + entity[position + 1:]
+    # Wrap in extra context ("TP.HCM" -> "tại TP.HCM")
+    return rng.choice(['tại ', 'ông ', 'bà ', 'công ty ']) + entity
+
+
+def make_noisy_predictions(ground_truths: List[Dict[str, List[str]]],
+                           drop_rate: float = 0.15,
+                           perturb_rate: float = 0.3,
+                           spurious_rate: float = 0.2,
+                           seed: int = 42) -> List[Dict[str, List[str]]]:
+    """Derive plausible model outputs from ground truth
+
+    Each entity is dropped with ``drop_rate`` or perturbed with
+    ``perturb_rate``, and each type gains a spurious entity (drawn from other
+    documents) with ``spurious_rate``.
+    """
+    rng = random.Random(seed)
+    pool = {
+        key: [e for gt in ground_truths for e in gt.get(key, [])]
+        for key in ('person', 'organizations', 'address')
+    }
+
+    predictions = []
+    for gt in ground_truths:
+        pred = {}
+        for key, entities in pool.items():
+            values = []
+            for entity in gt.get(key, []):
+                roll = rng.random()
+                if roll < drop_rate:
+                    continue
+                values.append(_perturb(entity, rng) if roll < drop_rate + perturb_rate else entity)
+            if entities and rng.random() < spurious_rate:
+                values.append(rng.choice(entities))
+            pred[key] = values
+        predictions.append(pred)
+    return predictions
+
+
+RESPONSE_STYLES = ("plain", "fenced", "chain_of_thought", "trailing", "aliased", "truncated", "no_json")
+
+
+def make_fake_response(entities: Dict[str, List[str]], style: str, rng: random.Random) -> str:
+    """Format entities the way a chat model might answer"""
+    if style == "aliased":
+        entities = {
+            "person": entities.get("person", []),
+            "organization": entities.get("organizations", []),
+            "addresses": entities.get("address", []),
+        }
+    body = json.dumps(entities, ensure_ascii=False, indent=2)
+
+    if style in ("plain", "aliased"):
+        return body
+    if style == "fenced":
+        return f"```json\n{body}\n```"
+    if style == "chain_of_thought":
+        steps = "\n".join(
+            f"{n}. Consider {{the mention \"{value}\"}}: it looks like a {key} entity."
+            for n, (key, values) in enumerate(entities.items(), 1) for value in values[:3]
+        )
+        return (f"Let me analyze the text step by step.\n{steps}\n"
+                f"Edge cases {{e.g. titles like \"ông\"}} are excluded.\n\n"
+                f"Final answer:\n```json\n{body}\n```\nI hope this helps!")
+    if style == "trailing":
+        return f"{body}\n\nExplanation: persons are named people; organizations are {{companies, agencies}}."
+    if style == "truncated":
+        # Cut somewhere after the first array opens, as num_predict would
+        first = body.find("[") + 1
+        return body[:rng.randint(first, max(first, len(body) - 2))]
+    return "Tôi không tìm thấy thực thể nào trong đoạn văn này."
+
+
+def make_fake_responses(ground_truths: List[Dict[str, List[str]]],
+                        styles=RESPONSE_STYLES,
+                        seed: int = 42) -> List[Dict[str, str]]:
+    """Build ``{"style", "response"}`` records cycling through ``styles``"""
+    rng = random.Random(seed)
+    return [
+        {"style": styles[i % len(styles)],
+         "response": make_fake_response(gt, styles[i % len(styles)], rng)}
+        for i, gt in enumerate(ground_truths)
+    ]
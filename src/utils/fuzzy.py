@@ -0,0 +1,148 @@
+"""Fuzzy entity matching with cheap candidate pruning
+
+Produces exactly the same matches as the original pairwise loop
+
+    for pred in pred_set:
+        for gt in gt_set:
+            if SequenceMatcher(None, pred, gt).ratio() > threshold:
+                matched.add(gt)
+                break
+
+but avoids most ``SequenceMatcher`` calls. ``ratio()`` is ``2 * M / T``, where
+``M`` is the number of matched characters and ``T`` the total length of both
+strings. Two upper bounds on ``M`` rule out pairs before any exact ratio is
+computed:
+
+* length bound: ``M <= min(len(a), len(b))``
+* character signature bound: ``M`` is at most the size of the intersection of
+  the two strings' character multisets (``SequenceMatcher.quick_ratio``)
+
+A pair is skipped only when its bound is already ``<= threshold``, so the
+first gt that passes the threshold is the same one the original loop finds.
+Exact ratios of surviving pairs are memoized across calls.
+"""
+
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+# Pair counts at or above this use the NumPy bound matrix instead of a Python loop
+VECTORIZE_MIN_PAIRS = 64
+
+
+@lru_cache(maxsize=1 << 18)
+def sequence_ratio(a: str, b: str) -> float:
+    """Memoized ``SequenceMatcher(None, a, b).ratio()``"""
+    return SequenceMatcher(None, a, b).ratio()
+
+
+@lru_cache(maxsize=1 << 16)
+def _char_counts(text: str) -> Counter:
+    return Counter(text)
+
+
+def _signature_bound(a: str, b: str) -> float:
+    """Upper bound on ``ratio(a, b)`` from the shared character multiset"""
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    shared = sum((_char_counts(a) & _char_counts(b)).values())
+    return 2.0 * shared / total
+
+
+def _bound_matrix(preds: List[str], gts: List[str]) -> np.ndarray:
+    """Upper bounds on ``ratio`` for every (pred, gt) pair as one array op"""
+    alphabet: Dict[str, int] = {}
+    for text in preds + gts:
+        for char in text:
+            alphabet.setdefault(char, len(alphabet))
+
+    def counts(texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), max(len(alphabet), 1)), dtype=np.int32)
+        for row, text in enumerate(texts):
+            for char, count in _char_counts(text).items():
+                matrix[row, alphabet[char]] = count
+        return matrix
+
+    shared = np.minimum(counts(preds)[:, None, :], counts(gts)[None, :, :]).sum(axis=2)
+    pred_len = np.array([len(p) for p in preds], dtype=np.float64)
+    gt_len = np.array([len(g) for g in gts], dtype=np.float64)
+    total = pred_len[:, None] + gt_len[None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bound = np.where(total > 0, 2.0 * shared / total, 1.0)
+    return bound
+
+
+def similarity_matrix(preds: List[str],
+                      gts: List[str],
+                      min_threshold: float = 0.0) -> np.ndarray:
+    """``ratio`` for every (pred, gt) pair, skipping pairs that cannot exceed ``min_threshold``
+
+    Pairs whose upper bound is ``<= min_threshold`` are stored as 0.0; they
+    fail ``> threshold`` for every threshold ``>= min_threshold``, exactly as
+    their true ratio would.
+    """
+    matrix = np.zeros((len(preds), len(gts)), dtype=np.float64)
+    if not preds or not gts:
+        return matrix
+
+    bounds: Optional[np.ndarray] = None
+    if len(preds) * len(gts) >= VECTORIZE_MIN_PAIRS:
+        bounds = _bound_matrix(preds, gts)
+
+    for i, pred in enumerate(preds):
+        for j, gt in enumerate(gts):
+            if pred == gt:
+                matrix[i, j] = 1.0
+                continue
+            total = len(pred) + len(gt)
+            if 2.0 * min(len(pred), len(gt)) / total <= min_threshold:
+                continue
+            bound = bounds[i, j] if bounds is not None else _signature_bound(pred, gt)
+            if bound > min_threshold:
+                matrix[i, j] = sequence_ratio(pred, gt)
+    return matrix
+
+
+def fuzzy_match_entities(pred_set: Iterable[str],
+                         gt_set: Iterable[str],
+                         similarity_threshold: float = 0.8) -> Set[str]:
+    """Return the gt entities matched by some prediction with ratio > threshold
+
+    Iteration order of both inputs decides which gt a prediction claims, exactly
+    as in the nested loop it replaces.
+    """
+    preds = list(pred_set)
+    gts = list(gt_set)
+    matched = set()
+    if not preds or not gts:
+        return matched
+
+    bounds: Optional[np.ndarray] = None
+    if len(preds) * len(gts) >= VECTORIZE_MIN_PAIRS:
+        bounds = _bound_matrix(preds, gts)
+
+    gt_lens = [len(g) for g in gts]
+    for i, pred in enumerate(preds):
+        pred_len = len(pred)
+        for j, gt in enumerate(gts):
+            if pred == gt:
+                score = 1.0
+            else:
+                # Length bound: 2 * min(la, lb) / (la + lb)
+                total = pred_len + gt_lens[j]
+                if 2.0 * min(pred_len, gt_lens[j]) / total <= similarity_threshold:
+                    continue
+                if bounds is not None:
+                    if bounds[i, j] <= similarity_threshold:
+                        continue
+                elif _signature_bound(pred, gt) <= similarity_threshold:
+                    continue
+                score = sequence_ratio(pred, gt)
+            if score > similarity_threshold:
+                matched.add(gt)
+                break
+    return matched
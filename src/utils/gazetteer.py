@@ -0,0 +1,214 @@
+"""Gazetteer pre-tagger built from training ground truth
+
+Every ``ground_truth`` surface in the train split goes into one Aho-Corasick
+automaton, which finds all of them in a document in a single pass over its
+characters. Matches must start and end at word boundaries. Overlaps resolve
+leftmost-longest, so "Ủy ban nhân dân tỉnh Quảng Nam" wins over "Quảng Nam".
+
+When the gazetteer is built, each surface gets the type it was labeled with
+most often. A surface is dropped when the train articles containing it
+labeled it less than ``min_precision`` of the time, which removes common
+words that were an entity once.
+
+``GazetteerExtractor`` is both a zero-LLM baseline (``extract``) and a
+source of prompt hints (``hints``, for ``build_hinted_prompt``).
+
+Example:
+    >>> gazetteer = Gazetteer.from_records(NERDataLoader().load_split("train"))
+    >>> gazetteer.save("gazetteer.pkl")
+    >>> extractor = GazetteerExtractor(Gazetteer.load("gazetteer.pkl"))
+    >>> extractor.extract(text)
+    {'person': [...], 'organizations': [...], 'address': [...]}
+"""
+
+import pickle
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+ENTITY_TYPES = ('person', 'organizations', 'address')
+
+
+class Match(NamedTuple):
+    start: int
+    end: int
+    entity_type: str
+    surface: str
+
+
+class AhoCorasick:
+    """Character-level Aho-Corasick automaton over a fixed set of strings"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Pattern ids ending at each node, own pattern first, then via fail links
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for pattern in patterns:
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            if not self._out[node]:
+                self._out[node] = (len(self.patterns),)
+                self.patterns.append(pattern)
+
+        # Breadth-first: fail links and merged outputs
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def iter(self, text: str) -> Iterable[Tuple[int, int]]:
+        """``(end, pattern id)`` of every occurrence, overlapping ones included"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                for pattern_id in out[node]:
+                    yield i + 1, pattern_id
+
+
+def _is_boundary(text: str, i: int) -> bool:
+    """True if position ``i`` does not split a word"""
+    return i <= 0 or i >= len(text) or not (text[i - 1].isalnum() and text[i].isalnum())
+
+
+class Gazetteer:
+    """Typed entity surfaces with an Aho-Corasick matcher
+
+    Args:
+        surfaces: ``{surface: entity_type}``
+    """
+
+    def __init__(self, surfaces: Dict[str, str]):
+        self.surfaces = dict(surfaces)
+        self._automaton = AhoCorasick(sorted(self.surfaces))
+        self._types = [self.surfaces[p] for p in self._automaton.patterns]
+
+    @classmethod
+    def from_records(cls,
+                     records: Iterable[Dict],
+                     min_precision: float = 0.5,
+                     min_length: int = 2) -> 'Gazetteer':
+        """Build from records with ``text`` and ``ground_truth``
+
+        Args:
+            records: Train examples
+            min_precision: Minimum share of containing articles that label the surface
+            min_length: Shortest surface kept (characters)
+        """
+        records = list(records)
+        labels: Dict[str, Counter] = defaultdict(Counter)
+        for record in records:
+            for entity_type, values in record['ground_truth'].items():
+                for surface in set(values):
+                    if isinstance(surface, str) and len(surface.strip()) >= min_length:
+                        labels[surface.strip()][entity_type] += 1
+
+        candidates = cls({surface: counts.most_common(1)[0][0] for surface, counts in labels.items()})
+        if min_precision <= 0:
+            return candidates
+
+        # Articles whose text contains each surface (at word boundaries)
+        occurrences: Counter = Counter()
+        for record in records:
+            occurrences.update({m.surface for m in candidates.tag(record['text'], overlapping=True)})
+
+        kept = {}
+        for surface, entity_type in candidates.surfaces.items():
+            labeled = sum(labels[surface].values())
+            if labeled / max(occurrences[surface], labeled) >= min_precision:
+                kept[surface] = entity_type
+        return cls(kept)
+
+    def save(self, path: str):
+        with open(Path(path), 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'Gazetteer':
+        with open(Path(path), 'rb') as f:
+            gazetteer = pickle.load(f)
+        if not isinstance(gazetteer, cls):
+            raise TypeError(f"{path} does not contain a {cls.__name__}")
+        return gazetteer
+
+    def __len__(self) -> int:
+        return len(self.surfaces)
+
+    def tag(self, text: str, overlapping: bool = False) -> List[Match]:
+        """Gazetteer matches in ``text``, sorted by position
+
+        By default overlaps resolve leftmost-longest; ``overlapping=True``
+        returns every boundary-aligned occurrence.
+        """
+        patterns, types = self._automaton.patterns, self._types
+        matches = []
+        for end, pattern_id in self._automaton.iter(text):
+            start = end - len(patterns[pattern_id])
+            if _is_boundary(text, start) and _is_boundary(text, end):
+                matches.append(Match(start, end, types[pattern_id], patterns[pattern_id]))
+        matches.sort(key=lambda m: (m.start, -m.end))
+        if overlapping:
+            return matches
+
+        selected = []
+        covered = 0
+        for match in matches:
+            if match.start >= covered:
+                selected.append(match)
+                covered = match.end
+        return selected
+
+
+class GazetteerExtractor:
+    """Zero-LLM extractor: gazetteer matches as NER output
+
+    Args:
+        gazetteer: Gazetteer to match
+        entity_types: Output keys
+    """
+
+    def __init__(self, gazetteer: Gazetteer, entity_types: Tuple[str, ...] = ENTITY_TYPES):
+        self.gazetteer = gazetteer
+        self.entity_types = entity_types
+
+    def extract_matches(self, text: str, matches: Optional[List[Match]] = None) -> Dict[str, List[str]]:
+        entities = {entity_type: [] for entity_type in self.entity_types}
+        seen = set()
+        for match in matches if matches is not None else self.gazetteer.tag(text):
+            if match.entity_type in entities and match.surface not in seen:
+                seen.add(match.surface)
+                entities[match.entity_type].append(match.surface)
+        return entities
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """Matched surfaces per type, unique, in order of first occurrence"""
+        return self.extract_matches(text)
+
+    def extract_many(self, texts: Iterable[str]) -> List[Dict[str, List[str]]]:
+        return [self.extract(text) for text in texts]
+
+    def hints(self, text: str) -> Dict[str, List[str]]:
+        """Same as ``extract``; pass to ``build_hinted_prompt``"""
+        return self.extract(text)
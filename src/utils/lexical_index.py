@@ -0,0 +1,328 @@
+"""Lexical (BM25) retrieval over train chunks, and hybrid fusion with dense search
+
+``LexicalIndex`` is an inverted index over two kinds of terms:
+
+- lower-cased words and character n-grams of the space-joined text (so
+  multi-syllable names like "hà nội" match across syllables)
+- ``ent:`` terms for the ground-truth entity surfaces found in each chunk
+
+A query has no labels. Its word n-grams that are known entity surfaces
+become ``ent:`` terms, so chunks sharing an address or organization with the
+query rank high even when the rest of the text differs. Scoring is BM25.
+
+On disk the postings are flat NumPy arrays (CSR layout: term offsets, chunk
+rows, term frequencies) plus a term list and the chunk metadata.
+``LexicalIndex.load`` only records the path. Arrays are memory-mapped and
+JSON read on the first search.
+
+``HybridRetriever`` fuses lexical and dense rankings with reciprocal rank
+fusion. Its 'lexical' mode never calls the embedder.
+
+Example:
+    >>> lexical = LexicalIndex.build(ids, texts, metadatas, entities)
+    >>> lexical.save("kb_lexical")
+    >>> retriever = HybridRetriever(LexicalIndex.load("kb_lexical"), dense_index, embedder)
+    >>> docs = retriever.similarity_search(text, k=5, max_per_doc=1)
+"""
+
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .vector_index import RetrievedChunk
+
+ENTITY_PREFIX = "ent:"
+
+_WORD_RE = re.compile(r'\w+')
+# Longest entity surface (in words) looked up in queries
+MAX_ENTITY_WORDS = 8
+# Terms in at most this many chunks are never skipped by ``max_df``
+MIN_DF_LIMIT = 10
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(_WORD_RE.findall(text.lower()))
+
+
+def text_terms(text: str, ngram: int = 4) -> List[str]:
+    """Words plus character n-grams of the normalized text"""
+    normalized = _normalize(text)
+    terms = normalized.split()
+    if ngram > 0:
+        terms.extend(normalized[i:i + ngram] for i in range(len(normalized) - ngram + 1))
+    return terms
+
+
+def chunk_entity_surfaces(text: str, ground_truth: Dict[str, List[str]]) -> List[str]:
+    """Ground-truth entities of an article that occur in one of its chunks"""
+    return [surface for values in ground_truth.values() for surface in values
+            if surface and surface in text]
+
+
+class LexicalIndex:
+    """BM25 inverted index over word/character n-gram and entity-surface terms
+
+    Args:
+        ngram: Character n-gram length (0 for words only)
+        entity_weight: Term frequency given to each entity-surface term
+        k1, b: BM25 parameters
+        max_df: Query terms found in more than this share of chunks are
+            skipped; they carry almost no weight but most of the postings
+    """
+
+    def __init__(self,
+                 ngram: int = 4,
+                 entity_weight: float = 3.0,
+                 k1: float = 1.2,
+                 b: float = 0.75,
+                 max_df: float = 0.2):
+        self.ngram = ngram
+        self.entity_weight = entity_weight
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self.path: Optional[Path] = None
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        self._meta: Optional[Dict[str, Any]] = None
+        self._term_ids: Optional[Dict[str, int]] = None
+        self._surfaces: Optional[set] = None
+
+    # ---- building -------------------------------------------------------
+
+    @classmethod
+    def build(cls,
+              ids: Sequence[str],
+              texts: Sequence[str],
+              metadatas: Sequence[Dict[str, Any]],
+              entities: Optional[Sequence[Sequence[str]]] = None,
+              **options) -> 'LexicalIndex':
+        """Index chunks; ``entities`` holds each chunk's known entity surfaces"""
+        index = cls(**options)
+        entities = entities or [[] for _ in texts]
+
+        postings: Dict[str, Dict[int, float]] = {}
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+        for row, (text, surfaces) in enumerate(zip(texts, entities)):
+            counts = Counter(text_terms(text, index.ngram))
+            for surface in set(_normalize(s) for s in surfaces):
+                if surface:
+                    counts[ENTITY_PREFIX + surface] += index.entity_weight
+            for term, tf in counts.items():
+                postings.setdefault(term, {})[row] = tf
+            doc_len[row] = sum(counts.values())
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        rows, tfs = [], []
+        for i, term in enumerate(terms):
+            entries = postings[term]
+            rows.extend(entries)
+            tfs.extend(entries.values())
+            offsets[i + 1] = len(rows)
+
+        index._arrays = {
+            "offsets": offsets,
+            "rows": np.asarray(rows, dtype=np.int32),
+            "tfs": np.asarray(tfs, dtype=np.float16),
+            "doc_len": doc_len,
+        }
+        index._meta = {
+            "terms": terms,
+            "ids": list(ids),
+            "texts": list(texts),
+            "metadatas": [dict(m) for m in metadatas],
+            "options": {"ngram": index.ngram, "entity_weight": index.entity_weight,
+                        "k1": index.k1, "b": index.b, "max_df": index.max_df},
+        }
+        return index
+
+    # ---- persistence ----------------------------------------------------
+
+    def save(self, path: str):
+        """Write the posting arrays (``.npy``) and ``meta.json`` to ``path``"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(path / f"{name}.npy", np.asarray(array))
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> 'LexicalIndex':
+        """Open a saved index; nothing is read until the first search"""
+        index = cls()
+        index.path = Path(path)
+        return index
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        if self._meta is None:
+            with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+                self._meta = json.load(f)
+            for key, value in self._meta["options"].items():
+                setattr(self, key, value)
+        return self._meta
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        if self._arrays is None:
+            self._arrays = {name: np.load(self.path / f"{name}.npy", mmap_mode="r")
+                            for name in ("offsets", "rows", "tfs", "doc_len")}
+        return self._arrays
+
+    def __len__(self) -> int:
+        return len(self.arrays["doc_len"])
+
+    def _vocabulary(self):
+        if self._term_ids is None:
+            terms = self.meta["terms"]
+            self._term_ids = {term: i for i, term in enumerate(terms)}
+            self._surfaces = {term[len(ENTITY_PREFIX):] for term in terms if term.startswith(ENTITY_PREFIX)}
+        return self._term_ids, self._surfaces
+
+    # ---- search ---------------------------------------------------------
+
+    def query_terms(self, text: str) -> Counter:
+        """Text terms plus ``ent:`` terms for word n-grams that are known surfaces"""
+        _, surfaces = self._vocabulary()
+        counts = Counter(text_terms(text, self.meta["options"]["ngram"]))
+        words = _normalize(text).split()
+        for i in range(len(words)):
+            for n in range(1, min(MAX_ENTITY_WORDS, len(words) - i) + 1):
+                candidate = ' '.join(words[i:i + n])
+                if candidate in surfaces:
+                    counts[ENTITY_PREFIX + candidate] += 1
+        return counts
+
+    def scores(self, text: str) -> np.ndarray:
+        """BM25 score of every chunk for ``text``"""
+        term_ids, _ = self._vocabulary()
+        arrays = self.arrays
+        offsets, doc_len = arrays["offsets"], arrays["doc_len"]
+        n = len(doc_len)
+
+        matched = [(term_ids[term], query_tf) for term, query_tf in self.query_terms(text).items()
+                   if term in term_ids]
+        if not matched:
+            return np.zeros(n, dtype=np.float32)
+        ids = np.fromiter((i for i, _ in matched), dtype=np.int64, count=len(matched))
+        query_tf = np.fromiter((tf for _, tf in matched), dtype=np.float32, count=len(matched))
+
+        # Gather every posting of the matched terms in one go
+        starts, ends = offsets[ids], offsets[ids + 1]
+        # Rare terms are always kept, so small indexes still match
+        keep = (ends - starts) <= max(self.max_df * n, MIN_DF_LIMIT)
+        starts, ends, query_tf = starts[keep], ends[keep], query_tf[keep]
+        df = (ends - starts).astype(np.float32)
+        positions = np.repeat(starts - np.cumsum(df, dtype=np.int64) + df.astype(np.int64), df.astype(np.int64))
+        positions += np.arange(len(positions))
+        rows = arrays["rows"][positions]
+        tf = arrays["tfs"][positions].astype(np.float32)
+
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        weight = np.repeat(query_tf * idf, df.astype(np.int64))
+        norm = self.k1 * (1 - self.b + self.b * doc_len[rows] / max(float(doc_len.mean()), 1e-9))
+        contributions = weight * tf * (self.k1 + 1) / (tf + norm)
+        return np.bincount(rows, weights=contributions, minlength=n).astype(np.float32)
+
+    def ranked_rows(self, text: str, candidates: int) -> List[int]:
+        """Rows of the ``candidates`` best-scoring chunks with a positive score"""
+        scores = self.scores(text)
+        m = min(candidates, len(scores))
+        top = np.argpartition(-scores, m - 1)[:m] if m < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [row for row in top.tolist() if scores[row] > 0]
+
+    def chunk(self, row: int, score: float = 0.0) -> RetrievedChunk:
+        meta = self.meta
+        return RetrievedChunk(meta["texts"][row], meta["metadatas"][row], score)
+
+
+def _dedup(chunks: List[RetrievedChunk], k: int, max_per_doc: Optional[int]) -> List[RetrievedChunk]:
+    if max_per_doc is None:
+        return chunks[:k]
+    kept, counts = [], {}
+    for chunk in chunks:
+        doc_id = chunk.metadata.get("doc_id")
+        if counts.get(doc_id, 0) < max_per_doc:
+            counts[doc_id] = counts.get(doc_id, 0) + 1
+            kept.append(chunk)
+            if len(kept) == k:
+                break
+    return kept
+
+
+class HybridRetriever:
+    """Reciprocal rank fusion of ``LexicalIndex`` and a dense index
+
+    Args:
+        lexical: Lexical index over the same chunk ids as ``dense``
+        dense: ``NumpyVectorIndex`` (not needed in 'lexical' mode)
+        embedder: Embeds text queries for the dense side
+        mode: 'hybrid', 'lexical' (no embedding call) or 'dense'
+        rrf_k: RRF constant; a chunk scores ``sum(1 / (rrf_k + rank))``
+        candidates: Ranked chunks taken from each side before fusion
+    """
+
+    def __init__(self,
+                 lexical: LexicalIndex,
+                 dense: Any = None,
+                 embedder: Any = None,
+                 mode: str = "hybrid",
+                 rrf_k: int = 60,
+                 candidates: int = 50):
+        if mode not in ("hybrid", "lexical", "dense"):
+            raise ValueError(f"Unknown mode: {mode}. Choose 'hybrid', 'lexical' or 'dense'")
+        if mode != "lexical" and dense is None:
+            raise ValueError(f"Mode '{mode}' needs a dense index")
+        self.lexical = lexical
+        self.dense = dense
+        self.embedder = embedder
+        self.mode = mode
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+
+    @property
+    def uses_embeddings(self) -> bool:
+        return self.mode != "lexical"
+
+    def search_batch(self,
+                     queries: Sequence[str],
+                     vectors: Optional[Sequence[Sequence[float]]] = None,
+                     k: int = 5,
+                     max_per_doc: Optional[int] = None) -> List[List[RetrievedChunk]]:
+        """Ranked chunks per query; ``vectors`` are embedded here if not given"""
+        queries = list(queries)
+        dense_hits: List[List[tuple]] = [[] for _ in queries]
+        if self.uses_embeddings:
+            if vectors is None:
+                vectors = self.embedder.embed_documents(queries)
+            dense_hits = self.dense.search_vectors(vectors, self.candidates)
+
+        results = []
+        for query, hits in zip(queries, dense_hits):
+            fused: Dict[str, float] = {}
+            chunks: Dict[str, RetrievedChunk] = {}
+            if self.mode != "dense":
+                for rank, row in enumerate(self.lexical.ranked_rows(query, self.candidates)):
+                    chunk_id = self.lexical.meta["ids"][row]
+                    fused[chunk_id] = fused.get(chunk_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+                    chunks[chunk_id] = self.lexical.chunk(row)
+            dense_meta = self.dense.meta if hits else None
+            for rank, (row, _) in enumerate(hits):
+                chunk_id = dense_meta["ids"][row]
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+                if chunk_id not in chunks:
+                    chunks[chunk_id] = RetrievedChunk(dense_meta["texts"][row], dense_meta["metadatas"][row], 0.0)
+            ranked = sorted(fused, key=fused.get, reverse=True)
+            results.append(_dedup([chunks[c]._replace(score=fused[c]) for c in ranked], k, max_per_doc))
+        return results
+
+    def similarity_search(self, query: str, k: int = 5, max_per_doc: Optional[int] = None) -> List[RetrievedChunk]:
+        """Drop-in for ``Chroma.similarity_search``"""
+        return self.search_batch([query], None, k, max_per_doc)[0]
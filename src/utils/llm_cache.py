@@ -0,0 +1,234 @@
+"""Content-addressed on-disk cache for LLM responses
+
+Responses are keyed by a SHA-256 hash of (model, sampling params, prompt), so
+re-running the same prompt (rewrite retries, repeated evaluation sweeps, RAG
+re-runs) is served from disk instead of the LLM. The cache is bounded in size
+with least-recently-used eviction, and can be opened read-only in "replay" mode
+to guarantee that no LLM call is made.
+
+Example:
+    >>> cache = LLMResponseCache(".llm_cache", max_size_mb=512)
+    >>> llm = CachedLLM(OllamaLLM(model="mistral:7b", temperature=0.1), cache)
+    >>> response = llm.invoke(build_zero_shot_prompt(text))
+    >>> cache.stats()
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .llm_calls import run_in_thread
+
+
+# Generation options that change the response and therefore belong in the key
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "top_k", "num_predict", "num_ctx",
+    "repeat_penalty", "seed", "stop", "format",
+)
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a prompt has no cached response"""
+
+
+class LLMResponseCache:
+    """Size-bounded LRU cache of LLM responses stored as one file per key
+
+    Args:
+        cache_dir: Directory holding the cache entries
+        max_size_mb: Total size budget; least recently used entries are evicted beyond it
+        replay: Read-only mode. Misses raise ``CacheMissError`` and nothing is written.
+    """
+
+    def __init__(self,
+                 cache_dir: str = ".llm_cache",
+                 max_size_mb: float = 1024,
+                 replay: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.replay = replay
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, oldest access first
+        self._size_bytes = 0
+
+        if not replay:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(model: str, params: Optional[Dict[str, Any]], prompt: str) -> str:
+        """Hash (model, sampling params, prompt) into a stable cache key"""
+        payload = json.dumps(
+            [model, params or {}, prompt],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times"""
+        if not self.cache_dir.exists():
+            return
+
+        found = []
+        for path in self.cache_dir.glob("*/*.json"):
+            stat = path.stat()
+            found.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size_bytes += size
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # Entry vanished or is corrupt; treat as a miss
+                self._forget(key)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if not self.replay:
+                self._entries.move_to_end(key)
+                os.utime(path)
+            return entry["response"]
+
+    def put(self, key: str, response: str, metadata: Optional[Dict[str, Any]] = None):
+        """Store a response, evicting least recently used entries if over budget"""
+        if self.replay:
+            return
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"response": response, **(metadata or {})}, ensure_ascii=False)
+
+        # Atomic write so concurrent readers never see a partial entry
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._forget(key)
+            size = path.stat().st_size
+            self._entries[key] = size
+            self._size_bytes += size
+            self._evict()
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._size_bytes -= size
+
+    def _evict(self):
+        while self._size_bytes > self.max_size_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._size_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_or_compute(self,
+                       model: str,
+                       params: Optional[Dict[str, Any]],
+                       prompt: str,
+                       compute: Callable[[], str]) -> str:
+        """Return the cached response, or call ``compute()`` and cache its result
+
+        Works with any client, e.g. ``ollama.Client.generate``:
+
+            cache.get_or_compute(model, options, prompt,
+                                 lambda: client.generate(model=model, prompt=prompt,
+                                                         options=options)['response'])
+        """
+        key = self.make_key(model, params, prompt)
+        response = self.get(key)
+        if response is not None:
+            return response
+        if self.replay:
+            raise CacheMissError(f"No cached response for key {key} (replay mode)")
+
+        response = compute()
+        self.put(key, response, metadata={"model": model, "params": params or {}})
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_mb": self._size_bytes / (1024 * 1024),
+            "replay": self.replay,
+        }
+
+
+class CachedLLM:
+    """Wrap an ``OllamaLLM``-like object so ``invoke``/``ainvoke`` go through the cache
+
+    Args:
+        llm: Object with ``invoke(prompt)`` (and optionally ``ainvoke``)
+        cache: Response cache
+        params: Sampling params for the key; read from the LLM's attributes if omitted
+    """
+
+    def __init__(self, llm: Any, cache: LLMResponseCache, params: Optional[Dict[str, Any]] = None):
+        self.llm = llm
+        self.cache = cache
+        self.model = getattr(llm, "model", type(llm).__name__)
+        if params is None:
+            params = {
+                name: getattr(llm, name)
+                for name in SAMPLING_PARAMS
+                if getattr(llm, name, None) is not None
+            }
+        self.params = params
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        return self.cache.get_or_compute(
+            self.model, self.params, prompt,
+            lambda: self.llm.invoke(prompt, **kwargs)
+        )
+
+    async def ainvoke(self, prompt: str, **kwargs) -> str:
+        key = self.cache.make_key(self.model, self.params, prompt)
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        if self.cache.replay:
+            raise CacheMissError(f"No cached response for key {key} (replay mode)")
+
+        if hasattr(self.llm, "ainvoke"):
+            response = await self.llm.ainvoke(prompt, **kwargs)
+        else:
+            # Off the event loop, and never returning before the thread does:
+            # a timed-out caller keeps its concurrency slot until the call ends
+            response = await run_in_thread(self.llm.invoke, prompt, **kwargs)
+        self.cache.put(key, response, metadata={"model": self.model, "params": self.params})
+        return response
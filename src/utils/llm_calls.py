@@ -0,0 +1,78 @@
+"""Issuing LLM requests from asyncio code
+
+Every concurrent engine (rewriting, chunked/batched/RAG/cascade extraction)
+awaits ``invoke_llm`` while holding its semaphore. A model with
+``ainvoke`` is awaited directly. A sync-only model runs ``invoke`` in a
+worker thread through ``run_in_thread``. Threads cannot be cancelled, so on
+timeout it waits for the thread to return before raising, and the caller
+keeps its semaphore slot until the request has really ended.
+
+The bound on requests at the server (``max_concurrency``) holds for
+sync-only models and for ``CachedLLM``, whose sync fallback also uses
+``run_in_thread``. It does not hold for a third-party ``ainvoke`` that
+hands a blocking call to a bare ``asyncio.to_thread``. Such a call keeps
+running after a timeout. ``tools/bench_llm_concurrency.py`` checks the
+bound.
+
+The synchronous entry points (``extract_many``, ``batch_extract_with_rag``)
+go through ``run_coroutine``, so they also work inside a notebook whose
+event loop is already running.
+
+Example:
+    >>> async with semaphore:
+    ...     response = await invoke_llm(llm, prompt, timeout=300.0)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+async def run_in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """``asyncio.to_thread`` that does not return before the thread does
+
+    If the awaiting task is cancelled (``wait_for`` timing out), the
+    cancellation is delayed until ``func`` has returned, then re-raised.
+    Wrappers that fall back to a sync ``invoke`` (``CachedLLM``) use this so
+    a caller's semaphore slot is held for the whole call.
+    """
+    thread = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+    try:
+        return await asyncio.shield(thread)
+    except asyncio.CancelledError:
+        # Threads cannot be cancelled: wait for this one to return
+        await asyncio.gather(thread, return_exceptions=True)
+        raise
+
+
+async def invoke_llm(llm: Any, prompt: str, timeout: Optional[float] = None) -> str:
+    """Call ``llm`` on ``prompt`` without blocking the event loop
+
+    Args:
+        llm: Object with ``invoke(prompt)`` (and optionally ``ainvoke``)
+        prompt: Prompt text
+        timeout: Seconds before ``asyncio.TimeoutError`` (None for no limit)
+    """
+    if hasattr(llm, "ainvoke"):
+        return await asyncio.wait_for(llm.ainvoke(prompt), timeout=timeout)
+
+    return await asyncio.wait_for(run_in_thread(llm.invoke, prompt), timeout=timeout)
+
+
+def run_coroutine(coro: Coroutine[Any, Any, T]) -> T:
+    """Run ``coro`` to completion from synchronous code
+
+    Uses ``asyncio.run`` when no event loop is running. Under a running loop
+    (a Jupyter kernel) ``asyncio.run`` would raise, so the coroutine runs on
+    its own loop in a worker thread and the caller blocks until it is done.
+    In a notebook, awaiting the ``a``-prefixed method directly avoids the
+    extra thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
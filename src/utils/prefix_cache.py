@@ -0,0 +1,171 @@
+"""Prompt-prefix (KV cache) reuse for static-first prompts
+
+``build_*_parts`` templates return ``PromptParts(prefix, suffix)``. The prefix
+(instructions, examples, schema) is the same for every document, so its
+attention keys/values only need to be computed once:
+
+- ``OllamaPrefixClient`` keeps the model loaded (``keep_alive``) and sends
+  prompts grouped by prefix hash. Ollama's runner reuses the KV cache for the
+  longest common prefix with the previous prompt in the slot, so only the
+  suffix is prefilled. ``prompt_eval_count`` in each reply shows the tokens
+  that were actually evaluated.
+- ``TransformersPrefixCache`` runs the prefix through a local model once per
+  prefix hash and passes a copy of its ``past_key_values`` to ``generate``.
+
+Example:
+    >>> client = OllamaPrefixClient("qwen2.5:7b", options={"temperature": 0.1})
+    >>> replies = client.generate_many([build_zero_shot_parts(t) for t in texts])
+    >>> client.stats()
+"""
+
+import copy
+import json
+import urllib.request
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from .streaming import ollama_generate_stream
+
+if TYPE_CHECKING:
+    from prompt.templates import PromptParts
+
+
+class OllamaPrefixClient:
+    """Ollama ``/api/generate`` client that keeps shared prompt prefixes cached
+
+    Args:
+        model: Model name
+        host: Ollama server URL
+        options: Generation options (``temperature``, ``num_predict``, ...)
+        keep_alive: How long Ollama keeps the model (and its KV cache) loaded
+        timeout: Seconds per request
+    """
+
+    def __init__(self,
+                 model: str,
+                 host: str = "http://127.0.0.1:11434",
+                 options: Optional[Dict[str, Any]] = None,
+                 keep_alive: Union[str, int] = "30m",
+                 timeout: float = 300):
+        self.model = model
+        self.host = host.rstrip("/")
+        self.options = options or {}
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+
+        self.requests = 0
+        self.prompt_eval_tokens = 0
+        self.prefixes = set()
+
+    def generate(self, parts: 'PromptParts') -> Dict[str, Any]:
+        """Generate for one prompt; returns Ollama's final reply plus ``prefix_hash``"""
+        payload = json.dumps({
+            "model": self.model,
+            "prompt": parts.text,
+            "stream": False,
+            "options": self.options,
+            "keep_alive": self.keep_alive,
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.host}/api/generate",
+            data=payload,
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            reply = json.loads(response.read())
+        if "error" in reply:
+            raise RuntimeError(f"Ollama error: {reply['error']}")
+
+        self.requests += 1
+        self.prompt_eval_tokens += reply.get("prompt_eval_count", 0)
+        self.prefixes.add(parts.prefix_hash)
+        reply["prefix_hash"] = parts.prefix_hash
+        return reply
+
+    def generate_many(self, prompts: Sequence['PromptParts']) -> List[Dict[str, Any]]:
+        """Generate for many prompts, sent grouped by prefix; replies in input order"""
+        order = sorted(range(len(prompts)), key=lambda i: prompts[i].prefix_hash)
+        replies: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        for i in order:
+            replies[i] = self.generate(prompts[i])
+        return replies
+
+    def stream(self, parts: 'PromptParts') -> Iterator[str]:
+        """Token stream for ``stream_extract``, with the same keep-alive"""
+        self.requests += 1
+        self.prefixes.add(parts.prefix_hash)
+        return ollama_generate_stream(parts.text, self.model, self.host, self.options,
+                                      self.timeout, keep_alive=self.keep_alive)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prefixes": len(self.prefixes),
+            "prompt_eval_tokens": self.prompt_eval_tokens,
+        }
+
+
+class TransformersPrefixCache:
+    """``past_key_values`` of shared prefixes for a local transformers model
+
+    Args:
+        model: Causal LM (``AutoModelForCausalLM``)
+        tokenizer: Its tokenizer
+        max_prefixes: Prefix caches kept in memory (least recently used evicted)
+    """
+
+    def __init__(self, model: Any, tokenizer: Any, max_prefixes: int = 4):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_prefixes = max_prefixes
+        self._entries = OrderedDict()  # prefix hash -> (prefix ids, past_key_values)
+
+        self.prefill_tokens = 0
+        self.prefill_tokens_avoided = 0
+
+    def _prefix_state(self, parts: 'PromptParts'):
+        import torch
+
+        key = parts.prefix_hash
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        prefix_ids = self.tokenizer(parts.prefix, return_tensors="pt").input_ids.to(self.model.device)
+        with torch.no_grad():
+            past_key_values = self.model(prefix_ids, use_cache=True).past_key_values
+        self.prefill_tokens += prefix_ids.shape[1]
+        self._entries[key] = (prefix_ids, past_key_values)
+        while len(self._entries) > self.max_prefixes:
+            self._entries.popitem(last=False)
+        return prefix_ids, past_key_values
+
+    def generate(self, parts: 'PromptParts', **generate_kwargs) -> str:
+        """Generate the response for ``parts``, prefilling only the suffix"""
+        import torch
+
+        prefix_ids, past_key_values = self._prefix_state(parts)
+        suffix_ids = self.tokenizer(
+            parts.suffix, return_tensors="pt", add_special_tokens=False
+        ).input_ids.to(self.model.device)
+        # The prefix and suffix are tokenized separately so the cached prefix
+        # ids are the same for every document
+        input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+
+        with torch.no_grad():
+            output = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=copy.deepcopy(past_key_values),
+                **generate_kwargs,
+            )
+        self.prefill_tokens += suffix_ids.shape[1]
+        self.prefill_tokens_avoided += prefix_ids.shape[1]
+        return self.tokenizer.decode(output[0, input_ids.shape[1]:], skip_special_tokens=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "prefixes": len(self._entries),
+            "prefill_tokens": self.prefill_tokens,
+            "prefill_tokens_avoided": self.prefill_tokens_avoided,
+        }
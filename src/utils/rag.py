@@ -0,0 +1,376 @@
+"""RAG-enhanced NER extraction (moved from the 03_RAG notebook)
+
+``RAGNERExtractor.extract_with_rag`` handles one document: retrieve similar
+train chunks, build the prompt, call the LLM. ``batch_extract_with_rag``
+does the same for many documents stage by stage. It embeds all queries in
+batches, runs one batched similarity search, dedups per query and builds
+every prompt, then issues the LLM calls concurrently. Stage timings go to a
+``PerformanceMonitor``.
+
+Example:
+    >>> monitor = PerformanceMonitor()
+    >>> extractor = RAGNERExtractor(embedder, NumpyVectorIndex.load("kb_index"), llm=llm, monitor=monitor)
+    >>> results = extractor.batch_extract_with_rag([ex["text"] for ex in validation_examples])
+    >>> monitor.report()
+
+``vector_store`` may also be a ``HybridRetriever`` (lexical + dense fusion).
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .llm_cache import CachedLLM, LLMResponseCache
+from .llm_calls import invoke_llm, run_coroutine
+from .response_parser import parse_ner_response_with_status
+from .vector_index import RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+# Characters of the input used as retrieval query
+MAX_QUERY_CHARS = 1500
+
+
+class PerformanceMonitor:
+    """Monitor RAG pipeline performance"""
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+
+    def record(self, operation: str, duration: float):
+        self.timings[operation].append(duration)
+
+    @contextmanager
+    def measure(self, operation: str) -> Iterator[None]:
+        """Record the duration of the ``with`` block under ``operation``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, time.perf_counter() - start)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row of statistics (milliseconds) per operation"""
+        rows = []
+        for operation, times in self.timings.items():
+            rows.append({
+                "Operation": operation,
+                "Count": len(times),
+                "Mean (ms)": np.mean(times) * 1000,
+                "Median (ms)": np.median(times) * 1000,
+                "Min (ms)": np.min(times) * 1000,
+                "Max (ms)": np.max(times) * 1000,
+                "Std (ms)": np.std(times) * 1000,
+            })
+        return rows
+
+    def report(self):
+        """Generate performance report (pandas DataFrame)"""
+        import pandas as pd
+
+        return pd.DataFrame(self.summary())
+
+
+class RAGPromptBuilder:
+    """Build context-aware RAG prompts for NER"""
+
+    SYSTEM_PROMPT = """You are an expert Vietnamese Named Entity Recognition (NER) system.
+
+Task: Extract named entities from Vietnamese text into three categories.
+
+Entity Categories:
+1. person: Names of people, individuals
+2. organizations: Company names, institutions, government agencies
+3. address: Geographic locations, addresses, place names
+
+Requirements:
+1. Extract ALL entity mentions (even if they appear multiple times)
+2. Preserve exact original Vietnamese text (no normalization)
+3. Include titles and descriptors when they're part of the entity
+4. Return ONLY valid JSON output
+
+Output Format:
+{
+    "person": ["Entity 1", "Entity 2"],
+    "organizations": ["Entity 1", "Entity 2"],
+    "address": ["Entity 1", "Entity 2"]
+}"""
+
+    @staticmethod
+    def build_rag_prompt(input_text: str,
+                         retrieved_docs: Sequence[Any],
+                         top_k: int = 5) -> str:
+        """Build RAG prompt with similar examples (objects with ``page_content``)"""
+        examples_section = "### Similar Examples from Knowledge Base:\n"
+        for i, doc in enumerate(retrieved_docs[:top_k], 1):
+            examples_section += f"\nExample {i}:\n"
+            examples_section += f"Text: {doc.page_content}\n"
+
+        if not retrieved_docs:
+            examples_section = "### Note: No similar examples found in knowledge base.\n"
+
+        return f"""{RAGPromptBuilder.SYSTEM_PROMPT}
+
+{examples_section}
+
+# ## Input Text:
+\"\"\"
+{input_text}
+\"\"\"
+
+# ## Output (JSON only, no explanation):
+"""
+
+
+class RAGNERExtractor:
+    """RAG-enhanced NER extractor
+
+    Args:
+        embedder: Object with ``embed_query``/``embed_documents`` (``OllamaEmbeddings``)
+        vector_store: langchain ``Chroma`` store or ``NumpyVectorIndex``
+        llm_model: Ollama model, used when ``llm`` is not given
+        ollama_host: Ollama server URL
+        temperature: Sampling temperature
+        top_k_retrieval: Chunks retrieved per query
+        llm: Object with ``invoke`` (and optionally ``ainvoke``); defaults to
+            langchain's ``OllamaLLM``
+        monitor: Receives per-stage timings
+        cache: Response cache shared with the other extractors and the
+            rewriter; ``llm`` is wrapped in ``CachedLLM``
+    """
+
+    def __init__(self,
+                 embedder: Any,
+                 vector_store: Any,
+                 llm_model: str = "ministral-3:14b",
+                 ollama_host: str = "http://127.0.0.1:11434",
+                 temperature: float = 0.1,
+                 top_k_retrieval: int = 3,
+                 llm: Any = None,
+                 monitor: Optional[PerformanceMonitor] = None,
+                 cache: Optional[LLMResponseCache] = None):
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.top_k_retrieval = top_k_retrieval
+        self.monitor = monitor or PerformanceMonitor()
+
+        if llm is None:
+            from langchain_ollama import OllamaLLM
+
+            llm = OllamaLLM(
+                base_url=ollama_host,
+                model=llm_model,
+                temperature=temperature,
+                top_p=0.9,
+                top_k=40,
+                num_predict=1024,
+            )
+        if cache is not None:
+            llm = CachedLLM(llm, cache)
+        self.llm = llm
+
+    def _selects_per_doc(self) -> bool:
+        """True if the store applies ``max_per_doc`` while it selects the top k"""
+        return hasattr(self.vector_store, "search_vectors") or hasattr(self.vector_store, "search_batch")
+
+    @staticmethod
+    def _deduplicate_chunks(docs: List[Any], max_per_doc: int = 2) -> List[Any]:
+        """Keep at most ``max_per_doc`` chunks from each document, in rank order"""
+        deduplicated = []
+        counts: Dict[Any, int] = {}
+        for doc in docs:
+            doc_id = doc.metadata.get("doc_id", None)
+            if counts.get(doc_id, 0) < max_per_doc:
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+                deduplicated.append(doc)
+        return deduplicated
+
+    def extract_with_rag(self,
+                         text: str,
+                         use_rag: bool = True,
+                         return_context: bool = False) -> Dict[str, Any]:
+        """Extract entities using RAG"""
+        result = {
+            "text": text,
+            "entities": {"person": [], "organizations": [], "address": []},
+            "retrieval_info": None,
+            "error": None,
+        }
+
+        try:
+            start_time = time.time()
+
+            # Step 1: Retrieve similar chunks
+            retrieved_docs = []
+            retrieval_time = 0
+            if use_rag:
+                ret_start = time.time()
+                try:
+                    if self._selects_per_doc():
+                        # One chunk per article, still k examples
+                        retrieved_docs = self.vector_store.similarity_search(
+                            query=text[:MAX_QUERY_CHARS],
+                            k=self.top_k_retrieval,
+                            max_per_doc=1,
+                        )
+                        retrieval_time = time.time() - ret_start
+                    else:
+                        retrieved_docs = self.vector_store.similarity_search(
+                            query=text[:MAX_QUERY_CHARS],
+                            k=self.top_k_retrieval,
+                        )
+                        retrieval_time = time.time() - ret_start
+                        retrieved_docs = self._deduplicate_chunks(retrieved_docs, max_per_doc=1)
+                    self.monitor.record("retrieval", retrieval_time)
+                except Exception as e:
+                    logger.warning(f"Retrieval failed, proceeding without RAG: {e}")
+                    use_rag = False
+
+            # Step 2: Build prompt
+            prompt = RAGPromptBuilder.build_rag_prompt(
+                input_text=text,
+                retrieved_docs=retrieved_docs,
+                top_k=self.top_k_retrieval,
+            )
+
+            # Step 3: Call LLM
+            llm_start = time.time()
+            response = self.llm.invoke(prompt)
+            llm_time = time.time() - llm_start
+            self.monitor.record("llm_call", llm_time)
+
+            # Step 4: Parse response
+            result["entities"] = self._parse_response(response)
+
+            total_time = time.time() - start_time
+            self.monitor.record("extract_with_rag", total_time)
+            result["retrieval_info"] = {
+                "num_chunks": len(retrieved_docs),
+                "retrieval_time": retrieval_time,
+                "llm_time": llm_time,
+                "total_time": total_time,
+                "used_rag": use_rag,
+            }
+            if not return_context:
+                result.pop("retrieval_info")
+
+        except Exception as e:
+            result["error"] = str(e)
+            logger.error(f"Extraction error: {e}", exc_info=True)
+
+        return result
+
+    def _embed_queries(self, queries: List[str], batch_size: int) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(queries), batch_size):
+            vectors.extend(self.embedder.embed_documents(queries[i:i + batch_size]))
+        return vectors
+
+    def _search_batch(self,
+                      queries: List[str],
+                      vectors: Optional[List[List[float]]],
+                      k: int,
+                      max_per_doc: int = 1) -> List[List[Any]]:
+        """Ranked chunks per query (at most ``max_per_doc`` per document), from one batched store query"""
+        if hasattr(self.vector_store, "search_batch"):
+            return self.vector_store.search_batch(queries, vectors, k, max_per_doc)
+        if hasattr(self.vector_store, "similarity_search_by_vectors"):
+            return self.vector_store.similarity_search_by_vectors(vectors, k, max_per_doc)
+        # langchain Chroma: query the collection with all vectors at once, dedup afterwards
+        reply = self.vector_store._collection.query(
+            query_embeddings=vectors, n_results=k, include=["documents", "metadatas", "distances"]
+        )
+        return [
+            self._deduplicate_chunks([RetrievedChunk(text, metadata or {}, -distance)
+                                      for text, metadata, distance in zip(texts, metadatas, distances)],
+                                     max_per_doc)
+            for texts, metadatas, distances in zip(reply["documents"], reply["metadatas"], reply["distances"])
+        ]
+
+    async def _call_llm(self, prompt: str, semaphore: asyncio.Semaphore) -> Any:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                return await invoke_llm(self.llm, prompt)
+            except Exception as e:
+                return e
+            finally:
+                self.monitor.record("llm_call", time.perf_counter() - start)
+
+    async def _call_all(self, prompts: List[str], max_concurrency: int) -> List[Any]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(*(self._call_llm(prompt, semaphore) for prompt in prompts))
+
+    def batch_extract_with_rag(self,
+                               texts: Sequence[str],
+                               use_rag: bool = True,
+                               embed_batch_size: int = 64,
+                               max_concurrency: int = 4,
+                               return_context: bool = False) -> List[Dict[str, Any]]:
+        """Extract entities for many documents; results in input order
+
+        Same results as ``extract_with_rag`` per document. Stage timings are
+        recorded as 'batch_embed', 'batch_search', 'batch_prompts',
+        'batch_llm' and 'batch_parse' (plus 'llm_call' per request). Inside a
+        running event loop (the notebook) use ``abatch_extract_with_rag``.
+        """
+        return run_coroutine(self.abatch_extract_with_rag(
+            texts, use_rag, embed_batch_size, max_concurrency, return_context))
+
+    async def abatch_extract_with_rag(self,
+                                      texts: Sequence[str],
+                                      use_rag: bool = True,
+                                      embed_batch_size: int = 64,
+                                      max_concurrency: int = 4,
+                                      return_context: bool = False) -> List[Dict[str, Any]]:
+        """Awaitable ``batch_extract_with_rag``"""
+        texts = list(texts)
+        retrieved: List[List[Any]] = [[] for _ in texts]
+
+        if use_rag and texts:
+            queries = [t[:MAX_QUERY_CHARS] for t in texts]
+            try:
+                vectors = None
+                # HybridRetriever in lexical mode needs no embeddings
+                if getattr(self.vector_store, "uses_embeddings", True):
+                    with self.monitor.measure("batch_embed"):
+                        vectors = await asyncio.to_thread(self._embed_queries, queries, embed_batch_size)
+                with self.monitor.measure("batch_search"):
+                    retrieved = self._search_batch(queries, vectors, self.top_k_retrieval, max_per_doc=1)
+            except Exception as e:
+                logger.warning(f"Batch retrieval failed, proceeding without RAG: {e}")
+                use_rag = False
+
+        with self.monitor.measure("batch_prompts"):
+            prompts = [RAGPromptBuilder.build_rag_prompt(text, docs, self.top_k_retrieval)
+                       for text, docs in zip(texts, retrieved)]
+
+        with self.monitor.measure("batch_llm"):
+            responses = await self._call_all(prompts, max_concurrency)
+
+        results = []
+        with self.monitor.measure("batch_parse"):
+            for text, docs, response in zip(texts, retrieved, responses):
+                result = {
+                    "text": text,
+                    "entities": {"person": [], "organizations": [], "address": []},
+                    "error": None,
+                }
+                if isinstance(response, BaseException):
+                    result["error"] = str(response)
+                else:
+                    result["entities"] = self._parse_response(response)
+                if return_context:
+                    result["retrieval_info"] = {"num_chunks": len(docs), "used_rag": use_rag}
+                results.append(result)
+        return results
+
+    @staticmethod
+    def _parse_response(response: str) -> Dict[str, List[str]]:
+        """Parse LLM JSON response"""
+        return parse_ner_response_with_status(response).entities
@@ -0,0 +1,381 @@
+"""Knowledge-base ingestion for the RAG pipeline
+
+Articles are chunked on a process pool (``VietnameseDocumentChunker``, moved
+here from the 03_RAG notebook), embedded in batches of ``batch_size`` texts
+per embedder call with several calls in flight, and written to the vector
+store. Vectors are kept in an ``EmbeddingCache`` keyed by a hash of
+(embedding model, chunk text), so rebuilding a collection only embeds chunks
+that are new or changed. A failed embedder call is retried with backoff, and
+the cache is saved even when a batch fails for good, so a rerun only embeds
+what is still missing. Chunk ids are stable (``doc_id:chunk_index``) and
+written with upsert, so re-ingestion replaces entries instead of duplicating
+them.
+
+Example:
+    >>> cache = EmbeddingCache(".embedding_cache", model="nomic-embed-text")
+    >>> ingestor = KnowledgeBaseIngestor(vector_store, embedder, VietnameseDocumentChunker(), cache)
+    >>> stats = ingestor.ingest(training_articles)
+    >>> stats["embedded"], stats["cached"], stats["chunks_per_second"]
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sentence end for the fallback splitter: punctuation or a blank line
+_SENTENCE_MARKERS_RE = re.compile(r'([.!?]|…|\n\n)')
+
+
+class VietnameseDocumentChunker:
+    """Sentence-based chunker for Vietnamese articles (underthesea when installed)
+
+    Args:
+        chunk_size: Maximum characters per chunk
+        overlap: Kept for compatibility; chunks overlap by their last two sentences
+        min_chunk_size: Chunks shorter than this (characters) are dropped
+    """
+
+    def __init__(self,
+                 chunk_size: int = 1500,
+                 overlap: int = 100,
+                 min_chunk_size: int = 50):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.min_chunk_size = min_chunk_size
+
+    def chunk_by_sentences(self, text: str) -> List[str]:
+        """Split text by Vietnamese sentences using underthesea"""
+        try:
+            from underthesea import sent_tokenize
+
+            sentences = sent_tokenize(text)
+            return [s.strip() for s in sentences if s.strip()]
+        except Exception as e:
+            logger.debug(f"Underthesea unavailable, falling back to regex: {e}")
+            parts = _SENTENCE_MARKERS_RE.split(text)
+            sentences = []
+            for i in range(0, len(parts) - 1, 2):
+                sent = parts[i] + (parts[i + 1] if i + 1 < len(parts) else "")
+                if sent.strip():
+                    sentences.append(sent.strip())
+            return sentences
+
+    def chunk_with_metadata(self,
+                            text: str,
+                            doc_id: str,
+                            metadata: Dict = None) -> List[Dict[str, Any]]:
+        """Chunk text with metadata and context overlap"""
+        sentences = self.chunk_by_sentences(text)
+        chunks = []
+        current_chunk = []
+        current_length = 0
+
+        def emit(sentences_, length):
+            chunks.append({
+                "text": " ".join(sentences_),
+                "doc_id": doc_id,
+                "chunk_index": len(chunks),
+                "char_count": length,
+                "metadata": metadata or {},
+            })
+
+        for sent in sentences:
+            sent_len = len(sent)
+            if current_length + sent_len <= self.chunk_size:
+                current_chunk.append(sent)
+                current_length += sent_len
+            else:
+                if current_length >= self.min_chunk_size:
+                    emit(current_chunk, current_length)
+                # Start the next chunk with the last two sentences as overlap
+                overlap_sents = current_chunk[-2:] if len(current_chunk) >= 2 else current_chunk[-1:]
+                current_chunk = overlap_sents + [sent]
+                current_length = sum(len(s) for s in current_chunk)
+
+        if current_chunk and current_length >= self.min_chunk_size:
+            emit(current_chunk, current_length)
+        return chunks
+
+
+def _prepare_article(chunker: VietnameseDocumentChunker,
+                     article: Dict,
+                     strategy: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Worker: (id, text, metadata) of the documents to index for one article"""
+    base = {"source": article.get("source", ""), "domain": article.get("domain", "general")}
+    if strategy == "full":
+        # Max 1000 chars per article
+        metadata = {"doc_id": article["id"], **base, "full_article": True}
+        return [(f"{article['id']}:0", article["text"][:1000], metadata)]
+
+    documents = []
+    for chunk in chunker.chunk_with_metadata(article["text"], article["id"], base):
+        metadata = {
+            "doc_id": chunk["doc_id"],
+            "chunk_index": chunk["chunk_index"],
+            "char_count": chunk["char_count"],
+            **chunk["metadata"],
+        }
+        documents.append((f"{chunk['doc_id']}:{chunk['chunk_index']}", chunk["text"], metadata))
+    return documents
+
+
+def _prepare_batch(chunker: VietnameseDocumentChunker,
+                   articles: List[Dict],
+                   strategy: str) -> List[List[Tuple[str, str, Dict[str, Any]]]]:
+    return [_prepare_article(chunker, article, strategy) for article in articles]
+
+
+class EmbeddingCache:
+    """Persistent chunk-hash -> vector store for one embedding model
+
+    Vectors live in ``vectors.npy`` (float32, one row per key) and the keys in
+    ``keys.json`` next to it. New vectors are kept in memory until ``save``.
+
+    Args:
+        cache_dir: Directory holding the cache files
+        model: Embedding model name; part of every key
+    """
+
+    def __init__(self, cache_dir: str = ".embedding_cache", model: str = ""):
+        self.cache_dir = Path(cache_dir)
+        self.model = model
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._pending: Dict[str, List[float]] = {}
+
+        keys_path = self.cache_dir / "keys.json"
+        if keys_path.exists():
+            with open(keys_path, "r", encoding="utf-8") as f:
+                keys = json.load(f)
+            self._vectors = np.load(self.cache_dir / "vectors.npy", mmap_mode="r")
+            self._rows = {key: row for row, key in enumerate(keys)}
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        if key in self._pending:
+            return self._pending[key]
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        return self._vectors[row].tolist()
+
+    def put(self, key: str, vector: Sequence[float]):
+        if key not in self._rows:
+            self._pending[key] = list(vector)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pending or key in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._pending)
+
+    def save(self):
+        """Append pending vectors to the files on disk"""
+        if not self._pending:
+            return
+        keys = sorted(self._rows, key=self._rows.get) + list(self._pending)
+        new = np.asarray(list(self._pending.values()), dtype=np.float32)
+        vectors = new if self._vectors is None else np.concatenate([np.asarray(self._vectors), new])
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_vectors = self.cache_dir / "vectors.tmp.npy"
+        tmp_keys = self.cache_dir / "keys.json.tmp"
+        np.save(tmp_vectors, vectors)
+        with open(tmp_keys, "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+        os.replace(tmp_vectors, self.cache_dir / "vectors.npy")
+        os.replace(tmp_keys, self.cache_dir / "keys.json")
+
+        self._vectors = np.load(self.cache_dir / "vectors.npy", mmap_mode="r")
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._pending = {}
+
+
+class KnowledgeBaseIngestor:
+    """Chunk, embed (with caching) and index articles into a vector store
+
+    Args:
+        vector_store: ``add_embeddings(ids, texts, embeddings, metadatas)``, or a
+            langchain ``Chroma`` store (written through its collection's upsert)
+        embedder: Object with ``embed_documents(texts)`` (e.g. ``OllamaEmbeddings``)
+        chunker: Chunker used for the 'chunked' strategy
+        cache: Embedding cache (None embeds everything)
+        batch_size: Texts per embedder call
+        max_concurrency: Embedder calls in flight
+        max_retries: Retries per embedding batch after a failed call
+        retry_delay: Base delay (seconds) for exponential backoff
+        workers: Chunking processes (1 chunks in-process; default: CPU count)
+        progress: Called as ``progress(done, total, chunks_per_second)`` after
+            every embedding batch (default: log every 10%)
+    """
+
+    def __init__(self,
+                 vector_store: Any,
+                 embedder: Any,
+                 chunker: Optional[VietnameseDocumentChunker] = None,
+                 cache: Optional[EmbeddingCache] = None,
+                 batch_size: int = 64,
+                 max_concurrency: int = 4,
+                 max_retries: int = 3,
+                 retry_delay: float = 2.0,
+                 workers: Optional[int] = None,
+                 progress: Optional[Callable[[int, int, float], None]] = None):
+        self.vector_store = vector_store
+        self.embedder = embedder
+        self.chunker = chunker or VietnameseDocumentChunker()
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.workers = workers or os.cpu_count() or 1
+        self.progress = progress or self._log_progress
+        self._last_logged = -1
+
+    def _log_progress(self, done: int, total: int, rate: float):
+        decile = done * 10 // max(total, 1)
+        if decile != self._last_logged:
+            self._last_logged = decile
+            logger.info(f"Embedded {done}/{total} chunks ({rate:.1f} chunks/s)")
+
+    def prepare(self, articles: Sequence[Dict], strategy: str = "chunked") -> List[Tuple[str, str, Dict]]:
+        """(id, text, metadata) of every document to index, in article order"""
+        if strategy not in ("chunked", "full"):
+            raise ValueError(f"Unknown strategy: {strategy}. Choose 'chunked' or 'full'")
+        articles = list(articles)
+        if self.workers <= 1 or len(articles) < 2:
+            per_article = _prepare_batch(self.chunker, articles, strategy)
+        else:
+            # Ship articles in a few large tasks; pickling one at a time costs more than chunking
+            size = -(-len(articles) // (self.workers * 4))
+            shards = [articles[i:i + size] for i in range(0, len(articles), size)]
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = executor.map(_prepare_batch, [self.chunker] * len(shards),
+                                       shards, [strategy] * len(shards))
+                per_article = [docs for shard in results for docs in shard]
+        return [doc for docs in per_article for doc in docs]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """One embedder call, retried with exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embedder.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                wait_time = self.retry_delay * (2.0 ** attempt)
+                logger.warning(f"Embedding batch failed (attempt {attempt + 1}), "
+                               f"retrying in {wait_time:.1f}s: {e}")
+                time.sleep(wait_time)
+
+    def embed(self, texts: Sequence[str]) -> Tuple[List[List[float]], int]:
+        """Vectors for ``texts`` and how many had to be embedded
+
+        Cached vectors are reused, and identical texts are embedded once. If a
+        batch still fails after ``max_retries``, the other batches finish, the
+        cache is saved and the first error is raised.
+        """
+        keys = [self.cache.key(t) if self.cache is not None
+                else hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+        vectors: Dict[str, List[float]] = {}
+        todo: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                todo.setdefault(key, text)
+
+        pending = list(todo.items())
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        start_time = time.time()
+        done = 0
+        error: Optional[BaseException] = None
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                futures = {executor.submit(self._embed_batch, [text for _, text in batch]): batch
+                           for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    try:
+                        embedded = future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    for (key, _), vector in zip(batch, embedded):
+                        vectors[key] = vector
+                        if self.cache is not None:
+                            self.cache.put(key, vector)
+                    done += len(batch)
+                    elapsed = time.time() - start_time
+                    self.progress(done, len(pending), done / elapsed if elapsed > 0 else 0.0)
+        finally:
+            # Keep what was embedded, even on failure or interruption
+            if self.cache is not None:
+                self.cache.save()
+        if error is not None:
+            raise error
+        return [vectors[key] for key in keys], len(pending)
+
+    def _write(self, ids: List[str], texts: List[str], embeddings: List[List[float]], metadatas: List[Dict]):
+        if hasattr(self.vector_store, "add_embeddings"):
+            self.vector_store.add_embeddings(ids, texts, embeddings, metadatas)
+            return
+        # langchain Chroma: upsert precomputed vectors so it does not re-embed
+        collection = self.vector_store._collection
+        for i in range(0, len(ids), self.batch_size * 16):
+            end = i + self.batch_size * 16
+            collection.upsert(ids=ids[i:end], documents=texts[i:end],
+                              embeddings=embeddings[i:end], metadatas=metadatas[i:end])
+
+    def ingest(self, articles: Sequence[Dict], strategy: str = "chunked") -> Dict[str, Any]:
+        """Chunk, embed and index ``articles``
+
+        Returns:
+            Ingestion statistics: 'articles_processed', 'chunks_created',
+            'embedded' (embedder calls needed), 'cached', 'documents_indexed',
+            per-stage seconds, 'elapsed_time' and 'chunks_per_second'
+        """
+        start_time = time.time()
+        documents = self.prepare(articles, strategy)
+        chunk_time = time.time() - start_time
+
+        ids = [doc_id for doc_id, _, _ in documents]
+        texts = [text for _, text, _ in documents]
+        metadatas = [metadata for _, _, metadata in documents]
+
+        embed_start = time.time()
+        embeddings, embedded = self.embed(texts)
+        embed_time = time.time() - embed_start
+
+        index_start = time.time()
+        if documents:
+            self._write(ids, texts, embeddings, metadatas)
+        index_time = time.time() - index_start
+
+        elapsed = time.time() - start_time
+        return {
+            "articles_processed": len(articles),
+            "chunks_created": len(documents),
+            "embedded": embedded,
+            "cached": len(documents) - embedded,
+            "documents_indexed": len(documents),
+            "strategy": strategy,
+            "chunk_time": chunk_time,
+            "embed_time": embed_time,
+            "index_time": index_time,
+            "elapsed_time": elapsed,
+            "chunks_per_second": len(documents) / elapsed if elapsed > 0 else 0.0,
+        }
@@ -0,0 +1,366 @@
+"""Linear-time extraction of the NER JSON object from LLM responses
+
+Each ``{`` that can start an object (followed by a key or ``}``) is tried with
+``JSONDecoder.raw_decode``, in order, until an object holds the NER keys.
+raw_decode is a single linear pass in C. Markdown fences, chain-of-thought
+prose (including stray braces) and trailing commentary therefore need no
+special handling. If that fails, one structural scan (jumping between strings
+and ``{ } [ ] , :`` with a compiled regex) finds where the response stopped. When
+it ended inside an object (``num_predict`` cut it short), the object is cut
+back to its last complete element and closed, so finished entities are still
+recovered, also from inside a wrapper such as ``{"entities": {...``.
+
+Every call reports a ``ParseStatus``, so silent failures show up in
+evaluation logs.
+"""
+
+import json
+import re
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Structural tokens inside an object: a whole string, a bracket, ',' or ':'.
+# A lone '"' only matches when the string is unterminated.
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\],:"]', re.DOTALL)
+# '{' that can start a JSON object (first key or an empty object)
+_OBJECT_START_RE = re.compile(r'\{\s*["}]')
+# '[' that can start an array of objects (or an empty array)
+_ARRAY_START_RE = re.compile(r'\[\s*[{\]]')
+_CLOSERS = {'{': '}', '[': ']'}
+_DECODER = json.JSONDecoder()
+
+# Candidate objects decoded per response before giving up
+MAX_CANDIDATES = 32
+
+# Canonical key -> accepted aliases, in lookup order
+KEY_ALIASES = {
+    "person": ("person", "persons", "people"),
+    "organizations": ("organizations", "organization", "organisations", "organisation"),
+    "address": ("address", "addresses", "location", "locations"),
+}
+
+
+class ParseStatus(str, Enum):
+    """Outcome of parsing one response"""
+    OK = "ok"                      # complete JSON object with NER keys
+    RECOVERED = "recovered"        # truncated object, complete elements kept
+    TRUNCATED = "truncated"        # response ends inside JSON before any entity list
+    MISSING_KEYS = "missing_keys"  # valid JSON object without any NER key
+    INVALID_JSON = "invalid_json"  # braces found but nothing decodes
+    NO_JSON = "no_json"            # no JSON object in the response
+    EMPTY = "empty"                # blank response
+    MISSING = "missing"            # batched response has no entry for this document
+
+
+class ParseResult(NamedTuple):
+    entities: Dict[str, List[Any]]
+    status: ParseStatus
+    span: Optional[Tuple[int, int]]  # character range of the object used
+
+
+class _Truncation(NamedTuple):
+    start: int    # where the unfinished outermost object begins
+    cut: int      # end of its last complete element
+    closing: str  # brackets that close the object at ``cut``
+
+
+def scan_json_objects(text: str) -> Tuple[List[Tuple[int, int]], Optional[_Truncation]]:
+    """Find every complete JSON object (any depth) and a trailing unfinished one
+
+    Returns:
+        (objects, truncation): ``objects`` are (start, end) ranges sorted by
+        start; ``truncation`` describes the outermost object still open at the
+        end of ``text``, or None.
+    """
+    objects: List[Tuple[int, int]] = []
+    stack: List[List] = []  # [bracket, start, expecting_value]
+    # End of the last complete element. Every push/pop records a new one, so
+    # the stack at the end of the text is still the stack at this point.
+    safe: Optional[int] = None
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        if not stack:
+            # Outside JSON only an opening brace matters
+            pos = text.find('{', pos)
+            if pos < 0:
+                break
+            stack.append(['{', pos, False])
+            safe = pos + 1
+            pos += 1
+            continue
+
+        match = _TOKEN_RE.search(text, pos)
+        if match is None:
+            break
+        i = match.start()
+        char = text[i]
+        top = stack[-1]
+
+        if char == '"':
+            pos = match.end()
+            if pos == i + 1:
+                break  # truncated inside a string
+            if top[0] == '[' or top[2]:
+                safe = pos
+            continue
+
+        if char in '{[':
+            stack.append([char, i, False])
+            safe = i + 1
+        elif char in '}]':
+            if _CLOSERS[top[0]] != char:
+                # Mismatched bracket: not JSON, resume scanning after it
+                stack.clear()
+            else:
+                stack.pop()
+                if char == '}':
+                    objects.append((top[1], i + 1))
+                if stack:
+                    safe = i + 1
+        elif char == ':':
+            top[2] = True
+        elif char == ',':
+            safe = i
+            if top[0] == '{':
+                top[2] = False
+        pos = i + 1
+
+    truncation = None
+    if stack and safe is not None:
+        closing = ''.join(_CLOSERS[frame[0]] for frame in reversed(stack))
+        truncation = _Truncation(stack[0][1], safe, closing)
+    objects.sort()
+    return objects, truncation
+
+
+def _is_closed(text: str, start: int) -> bool:
+    """True if the brackets opened at ``start`` are all closed within ``text``"""
+    depth = 0
+    for match in _TOKEN_RE.finditer(text, start):
+        token = match.group()
+        if token == '"':
+            return False  # unterminated string
+        if token in '{[':
+            depth += 1
+        elif token in '}]':
+            depth -= 1
+            if depth == 0:
+                return True
+    return False
+
+
+def _normalize_keys(parsed: Dict) -> Dict[str, List[Any]]:
+    """Map key aliases to canonical keys and coerce values to lists"""
+    result = {}
+    for key, aliases in KEY_ALIASES.items():
+        value = []
+        for alias in aliases:
+            if alias in parsed:
+                value = parsed[alias]
+                break
+        if not isinstance(value, list):
+            value = [str(value)] if value else []
+        result[key] = value
+    return result
+
+
+def _has_ner_keys(parsed: Any) -> bool:
+    return isinstance(parsed, dict) and any(
+        alias in parsed for aliases in KEY_ALIASES.values() for alias in aliases
+    )
+
+
+def _find_ner_object(parsed: Any) -> Optional[Dict]:
+    """First object (pre-order) with NER keys, e.g. inside an ``{"entities": ...}`` wrapper"""
+    if _has_ner_keys(parsed):
+        return parsed
+    children = parsed.values() if isinstance(parsed, dict) else parsed if isinstance(parsed, list) else ()
+    for child in children:
+        found = _find_ner_object(child)
+        if found is not None:
+            return found
+    return None
+
+
+def parse_ner_response_with_status(response_text: str) -> ParseResult:
+    """Extract entities from an LLM response and report how parsing went"""
+    empty = {key: [] for key in KEY_ALIASES}
+    if not response_text or not response_text.strip():
+        return ParseResult(empty, ParseStatus.EMPTY, None)
+
+    if '{' not in response_text:
+        return ParseResult(empty, ParseStatus.NO_JSON, None)
+
+    # Fast path: decode in C at each '{' that can start an object; braces in
+    # prose ("{the mention ...}") are never tried
+    fallback = None
+    for attempt, match in enumerate(_OBJECT_START_RE.finditer(response_text)):
+        if attempt == MAX_CANDIDATES:
+            break
+        pos = match.start()
+        try:
+            parsed, end = _DECODER.raw_decode(response_text, pos)
+        except (ValueError, RecursionError):
+            continue
+        if _has_ner_keys(parsed):
+            return ParseResult(_normalize_keys(parsed), ParseStatus.OK, (pos, end))
+        if isinstance(parsed, dict) and fallback is None:
+            fallback = (pos, end)
+
+    # Slow path: structural scan to recover a truncated object
+    objects, truncation = scan_json_objects(response_text)
+    if truncation is not None:
+        fragment = response_text[truncation.start:truncation.cut] + truncation.closing
+        try:
+            parsed = _find_ner_object(json.loads(fragment))
+        except (ValueError, RecursionError):
+            parsed = None
+        if parsed is not None:
+            return ParseResult(
+                _normalize_keys(parsed), ParseStatus.RECOVERED, (truncation.start, truncation.cut)
+            )
+
+    if fallback is not None:
+        return ParseResult(empty, ParseStatus.MISSING_KEYS, fallback)
+    if truncation is not None:
+        return ParseResult(empty, ParseStatus.TRUNCATED, None)
+    if objects:
+        return ParseResult(empty, ParseStatus.INVALID_JSON, None)
+    return ParseResult(empty, ParseStatus.NO_JSON, None)
+
+
+class StreamingJSONDetector:
+    """Detect the NER object in a response while it is still being generated
+
+    Feed chunks as they arrive; ``feed`` returns the ``ParseResult`` as soon as
+    a complete object with the NER keys has closed, and None until then. The
+    object chosen is the one ``parse_ner_response_with_status`` would pick
+    from the full response: a candidate is only accepted once every earlier
+    candidate is known to be invalid or keyless.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.result: Optional[ParseResult] = None
+        self._candidates: List[int] = []  # undecided object starts, in order
+        self._found = 0
+        self._scan_from = 0
+
+    def feed(self, chunk: str) -> Optional[ParseResult]:
+        if self.result is not None:
+            return self.result
+        self.text += chunk
+        text = self.text
+
+        for match in _OBJECT_START_RE.finditer(text, self._scan_from):
+            if self._found == MAX_CANDIDATES:
+                break
+            self._candidates.append(match.start())
+            self._found += 1
+        # A trailing '{' followed only by whitespace may still start an object
+        last = text.rfind('{', self._scan_from)
+        self._scan_from = last if last >= 0 and not text[last + 1:].strip() else len(text)
+
+        if '}' in chunk:
+            self._resolve()
+        return self.result
+
+    def _resolve(self):
+        text = self.text
+        while self._candidates:
+            start = self._candidates[0]
+            try:
+                parsed, end = _DECODER.raw_decode(text, start)
+            except json.JSONDecodeError as error:
+                # Until its brackets balance, the object may still become valid
+                # ('"ok": tr' is an error now, '"ok": true' a chunk later)
+                if error.pos >= len(text) or not _is_closed(text, start):
+                    return  # still being generated
+                parsed = None
+            except (ValueError, RecursionError):
+                parsed = None
+            if _has_ner_keys(parsed):
+                self.result = ParseResult(_normalize_keys(parsed), ParseStatus.OK, (start, end))
+                return
+            self._candidates.pop(0)
+
+    def finish(self) -> ParseResult:
+        """Result for the text received so far (full parse if nothing closed)"""
+        if self.result is not None:
+            return self.result
+        return parse_ner_response_with_status(self.text)
+
+
+_ID_KEYS = ("id", "index", "doc")
+
+
+def _batch_slot(parsed: Dict, n_docs: int) -> Optional[int]:
+    """0-based document slot from an object's 1-based id, if valid"""
+    for key in _ID_KEYS:
+        value = parsed.get(key)
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if isinstance(value, int) and 1 <= value <= n_docs:
+            return value - 1
+    return None
+
+
+def _assign(results: List[Optional[ParseResult]], parsed: Dict, status: ParseStatus,
+            span: Tuple[int, int], position: int) -> None:
+    """Store ``parsed`` under its id, or by position when it has none"""
+    slot = _batch_slot(parsed, len(results))
+    if slot is None and position < len(results):
+        slot = position
+    if slot is not None and results[slot] is None:
+        results[slot] = ParseResult(_normalize_keys(parsed), status, span)
+
+
+def parse_batched_response(response_text: str, n_docs: int) -> List[ParseResult]:
+    """Map a batched response (JSON array of per-document objects) back to documents
+
+    Objects are matched to documents by their 1-based ``id`` (or by position
+    when they have none). A complete array gives ``OK`` entries. If the array
+    is malformed or cut off, every complete object found elsewhere is used
+    instead (``RECOVERED``). A truncated last object is not: its later entity
+    lists are lost, so its document gets ``MISSING`` like documents without
+    an entry, and callers re-extract them alone.
+    """
+    results: List[Optional[ParseResult]] = [None] * n_docs
+    text = response_text or ''
+
+    # A complete array of NER objects
+    for attempt, match in enumerate(_ARRAY_START_RE.finditer(text)):
+        if attempt == MAX_CANDIDATES:
+            break
+        try:
+            parsed, end = _DECODER.raw_decode(text, match.start())
+        except (ValueError, RecursionError):
+            continue
+        objects = [item for item in parsed if _has_ner_keys(item)]
+        if objects:
+            for position, item in enumerate(objects):
+                _assign(results, item, ParseStatus.OK, (match.start(), end), position)
+            break
+
+    # Malformed array: take the complete objects one by one
+    if all(result is None for result in results):
+        position = 0
+        last_end = 0
+        for match in _OBJECT_START_RE.finditer(text):
+            start = match.start()
+            if start < last_end:
+                continue
+            try:
+                parsed, end = _DECODER.raw_decode(text, start)
+            except (ValueError, RecursionError):
+                continue
+            if _has_ner_keys(parsed):
+                _assign(results, parsed, ParseStatus.RECOVERED, (start, end), position)
+                position += 1
+                last_end = end
+
+    return [result if result is not None
+            else ParseResult({key: [] for key in KEY_ALIASES}, ParseStatus.MISSING, None)
+            for result in results]
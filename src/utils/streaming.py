@@ -0,0 +1,121 @@
+"""Streaming NER extraction that stops generation once the JSON is complete
+
+Models often keep generating commentary after the JSON answer closes, up to
+``num_predict`` tokens. ``stream_extract`` consumes the response token by
+token and parses it as it arrives (``StreamingJSONDetector``). As soon as a
+complete ``{person, organizations, address}`` object has closed, it closes
+the stream. For ``ollama_generate_stream`` that drops the HTTP connection,
+and Ollama stops generating.
+
+Example:
+    >>> chunks = ollama_generate_stream(build_chain_of_thought_prompt(text), "qwen2.5:7b",
+    ...                                 options={"temperature": 0.1, "num_predict": 1024})
+    >>> result = stream_extract(chunks)
+    >>> result.entities, result.tokens, result.elapsed, result.stopped_early
+
+Any iterable of text chunks works, e.g. ``OllamaLLM.stream(prompt)``; it is
+closed on early stop if it has a ``close`` method.
+"""
+
+import json
+import time
+import urllib.request
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from .response_parser import ParseStatus, StreamingJSONDetector
+
+
+@dataclass
+class StreamingResult:
+    """Outcome of one streamed extraction
+
+    Attributes:
+        entities: Parsed entities (``parse_ner_response`` format)
+        status: Parse status
+        text: Response text received
+        tokens: Chunks received from the stream
+        elapsed: Seconds from the first request to the result
+        time_to_first_token: Seconds until the first chunk arrived
+        stopped_early: Generation was cancelled after the JSON closed
+    """
+    entities: Dict[str, List[Any]]
+    status: ParseStatus
+    text: str
+    tokens: int
+    elapsed: float
+    time_to_first_token: Optional[float]
+    stopped_early: bool
+
+
+def ollama_generate_stream(prompt: str,
+                           model: str,
+                           host: str = "http://127.0.0.1:11434",
+                           options: Optional[Dict[str, Any]] = None,
+                           timeout: float = 300,
+                           keep_alive: Optional[Union[str, int]] = None) -> Iterator[str]:
+    """Yield response tokens from Ollama's streaming ``/api/generate`` endpoint
+
+    Closing the generator closes the connection, which makes Ollama stop
+    generating. ``keep_alive`` (e.g. "30m") keeps the model, and with it the
+    KV cache of the prompt, loaded between requests.
+    """
+    body = {"model": model, "prompt": prompt, "stream": True, "options": options or {}}
+    if keep_alive is not None:
+        body["keep_alive"] = keep_alive
+    payload = json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(
+        f"{host.rstrip('/')}/api/generate",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for line in response:
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if "error" in message:
+                raise RuntimeError(f"Ollama error: {message['error']}")
+            if message.get("response"):
+                yield message["response"]
+            if message.get("done"):
+                return
+
+
+def stream_extract(chunks: Iterable[str], early_stop: bool = True) -> StreamingResult:
+    """Parse entities from a token stream, cancelling it once the JSON closes
+
+    Args:
+        chunks: Response text chunks, in order
+        early_stop: Close the stream as soon as the NER object is complete.
+            With False the whole stream is consumed (baseline for comparisons).
+    """
+    start = time.perf_counter()
+    first_token = None
+    tokens = 0
+    stopped_early = False
+    detector = StreamingJSONDetector()
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            tokens += 1
+            if detector.feed(chunk) is not None and early_stop:
+                stopped_early = True
+                break
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+    parsed = detector.finish()
+    return StreamingResult(
+        entities=parsed.entities,
+        status=parsed.status,
+        text=detector.text,
+        tokens=tokens,
+        elapsed=time.perf_counter() - start,
+        time_to_first_token=first_token,
+        stopped_early=stopped_early,
+    )
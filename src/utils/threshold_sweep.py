@@ -0,0 +1,189 @@
+"""Evaluate many fuzzy-match thresholds from one similarity pass
+
+``ThresholdSweep`` computes every document's pred x gt similarity matrix once
+and stores all of them in one flat float64 array. Each threshold is then
+scored with a few array operations over that array instead of re-matching
+strings:
+
+    sweep = ThresholdSweep(predictions, ground_truths)
+    curves = sweep.curves([0.5, 0.6, 0.7, 0.8, 0.9])
+    sweep.result(0.8) == compute_comprehensive_metrics(predictions, ground_truths)
+
+Matching follows ``MetricsAccumulator``: each prediction (in sorted order)
+claims the first gt (in sorted order) whose ratio is strictly above the
+threshold. Similarities are kept in float64 because a float32 copy would flip
+``ratio > threshold`` for ratios close to the threshold.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .evaluation import MetricsAccumulator, _normalize_entities
+from .fuzzy import similarity_matrix
+
+
+class ThresholdSweep:
+    """Pre-computed similarities of a prediction set, scored at any threshold
+
+    Args:
+        predictions: Prediction dicts
+        ground_truths: Ground-truth dicts in the same order
+        entity_types: Entity types to score (default: person, organizations, address)
+        normalize: Stringify dict entities first (``calculate_accuracy`` semantics)
+        min_threshold: Lowest threshold that will be queried. Pairs that cannot
+            exceed it skip the exact ratio computation.
+    """
+
+    def __init__(self,
+                 predictions: List[Dict],
+                 ground_truths: List[Dict],
+                 entity_types: List[str] = None,
+                 normalize: bool = False,
+                 min_threshold: float = 0.0):
+        self.entity_types = list(entity_types) if entity_types is not None else ['person', 'organizations', 'address']
+        self.normalize = normalize
+        self.min_threshold = min_threshold
+        self.total = len(ground_truths)
+
+        n_types = len(self.entity_types)
+        sims, cols, row_starts, row_blocks = [], [], [], []
+        n_pred, n_gt = [], []
+        offset = 0
+
+        # One block per (document, entity type); blocks are doc-major
+        for pred, gt in zip(predictions, ground_truths):
+            for entity_type in self.entity_types:
+                pred_entities = self._entities(pred, entity_type)
+                gt_entities = self._entities(gt, entity_type)
+                block = len(n_pred)
+                n_pred.append(len(pred_entities))
+                n_gt.append(len(gt_entities))
+                if not pred_entities or not gt_entities:
+                    continue
+
+                matrix = similarity_matrix(pred_entities, gt_entities, min_threshold)
+                sims.append(matrix.ravel())
+                cols.append(np.tile(np.arange(len(gt_entities), dtype=np.int32), len(pred_entities)))
+                row_starts.append(offset + np.arange(len(pred_entities), dtype=np.int64) * len(gt_entities))
+                row_blocks.append(np.full(len(pred_entities), block, dtype=np.int64))
+                offset += matrix.size
+
+        self.n_docs = len(n_pred) // n_types if n_types else 0
+        self.n_pred = np.array(n_pred, dtype=np.int64).reshape(self.n_docs, n_types)
+        self.n_gt = np.array(n_gt, dtype=np.int64).reshape(self.n_docs, n_types)
+        self.sims = np.concatenate(sims) if sims else np.zeros(0, dtype=np.float64)
+        self._cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int32)
+        self._row_starts = np.concatenate(row_starts) if row_starts else np.zeros(0, dtype=np.int64)
+        self._row_blocks = np.concatenate(row_blocks) if row_blocks else np.zeros(0, dtype=np.int64)
+        self._col_base = int(self.n_gt.max()) + 1 if self.n_gt.size else 1
+
+    def _entities(self, result: Dict, entity_type: str) -> List:
+        entities = result.get(entity_type, [])
+        return sorted(set(_normalize_entities(entities) if self.normalize else entities), key=str)
+
+    def true_positives(self, threshold: float) -> np.ndarray:
+        """``(n_docs, n_types)`` matched gt counts at ``threshold``"""
+        if threshold < self.min_threshold:
+            raise ValueError(
+                f"Threshold {threshold} is below min_threshold={self.min_threshold} "
+                f"used to build the sweep"
+            )
+        tp = np.zeros(self.n_pred.size, dtype=np.int64)
+        if self.sims.size:
+            # First gt column above the threshold in every prediction row
+            sentinel = np.iinfo(np.int32).max
+            candidates = np.where(self.sims > threshold, self._cols, sentinel)
+            first = np.minimum.reduceat(candidates, self._row_starts)
+            hit = first != sentinel
+            # A gt claimed by several predictions counts once
+            claimed = np.unique(self._row_blocks[hit] * self._col_base + first[hit])
+            tp = np.bincount(claimed // self._col_base, minlength=self.n_pred.size)
+        return tp.reshape(self.n_pred.shape)
+
+    def state(self, threshold: float) -> Dict:
+        """Counters at ``threshold`` in ``MetricsAccumulator.state()`` form"""
+        tp = self.true_positives(threshold)
+        gt_found = tp == self.n_gt
+        type_correct = gt_found & (self.n_pred == self.n_gt)
+        return {
+            'total': self.n_docs,
+            'correct': int(gt_found.all(axis=1).sum()),
+            'per_type': {
+                entity_type: {
+                    'tp': int(tp[:, k].sum()),
+                    'fp': int((self.n_pred[:, k] - tp[:, k]).sum()),
+                    'fn': int((self.n_gt[:, k] - tp[:, k]).sum()),
+                    'correct_samples': int(type_correct[:, k].sum()),
+                }
+                for k, entity_type in enumerate(self.entity_types)
+            },
+        }
+
+    def result(self, threshold: float, scale: float = 100) -> Dict:
+        """Full metrics dict at ``threshold``, as ``compute_comprehensive_metrics`` returns"""
+        accumulator = MetricsAccumulator(self.entity_types, threshold, self.normalize)
+        accumulator.merge(self.state(threshold))
+        return accumulator.result(scale=scale, total=self.total)
+
+    def entity_result(self, entity_type: str, threshold: float) -> Dict:
+        """One type at ``threshold``, as ``compute_entity_metrics_with_fuzzy`` returns"""
+        counts = self.state(threshold)['per_type'][entity_type]
+        tp, fp, fn = counts['tp'], counts['fp'], counts['fn']
+        correct_samples = counts['correct_samples']
+
+        precision = (tp / (tp + fp)) if (tp + fp) > 0 else 0
+        recall = (tp / (tp + fn)) if (tp + fn) > 0 else 0
+        f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0
+        accuracy = (correct_samples / self.total) if self.total > 0 else 0
+
+        return {
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'accuracy': accuracy,
+            'true_positives': tp,
+            'false_positives': fp,
+            'false_negatives': fn,
+            'correct_samples': correct_samples,
+            'total_samples': self.total,
+            'support': tp + fn
+        }
+
+    def curves(self, thresholds: Sequence[float], scale: float = 100) -> Dict:
+        """Precision/recall/F1/accuracy arrays over ``thresholds``
+
+        Returns:
+            ``{'thresholds', 'accuracy', 'overall': {metric: array},
+            'per_entity_type': {type: {metric: array}}}``
+        """
+        metrics = ('precision', 'recall', 'f1')
+        results = [self.result(t, scale) for t in thresholds]
+        return {
+            'thresholds': np.asarray(thresholds, dtype=np.float64),
+            'accuracy': np.array([r['accuracy'] for r in results], dtype=np.float64),
+            'overall': {
+                m: np.array([r['overall_entity_metrics'][m] for r in results], dtype=np.float64)
+                for m in metrics
+            },
+            'per_entity_type': {
+                entity_type: {
+                    m: np.array([r['per_entity_type'][entity_type][m] for r in results], dtype=np.float64)
+                    for m in metrics + ('accuracy',)
+                }
+                for entity_type in self.entity_types
+            },
+        }
+
+
+def sweep_thresholds(predictions: List[Dict],
+                     ground_truths: List[Dict],
+                     thresholds: Sequence[float],
+                     entity_types: List[str] = None,
+                     scale: float = 100,
+                     min_threshold: Optional[float] = None) -> Dict:
+    """One-call threshold sweep; see ``ThresholdSweep.curves``"""
+    if min_threshold is None:
+        min_threshold = min(thresholds)
+    sweep = ThresholdSweep(predictions, ground_truths, entity_types, min_threshold=min_threshold)
+    return sweep.curves(thresholds, scale)
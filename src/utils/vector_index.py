@@ -0,0 +1,246 @@
+"""In-process vector index for RAG few-shot retrieval
+
+The knowledge base (VLSP train chunks, 768-d) is small enough to search
+exhaustively. ``NumpyVectorIndex`` keeps L2-normalized embeddings in a float16
+``vectors.npy`` that is memory-mapped on load. Each chunk's document number is
+kept in ``doc_ids.npy``, and ids, texts and metadata in ``meta.json``, which is
+read on first use. A batch of queries is scored with one matrix multiply.
+float16 has no BLAS kernel, so scoring needs float32 rows. An index up to
+``MAX_SCORING_CACHE_MB`` (as float32) keeps a float32 copy, made on the
+first search; the VLSP train KB needs about 6 MB. A larger index is scored
+in blocks of ``SCORE_BLOCK_ROWS`` rows converted straight from the mmap,
+so it is never copied whole.
+Top-k selection applies the notebook's ``_deduplicate_chunks`` rule (at most
+``max_per_doc`` chunks per document) while it selects, so each query still
+gets k results.
+
+Scores are cosine similarities. For normalized embeddings (nomic-embed-text)
+the ranking is the same as Chroma's L2 distance.
+
+Example:
+    >>> index = NumpyVectorIndex.from_chroma(vector_store, embedder)
+    >>> index.save("kb_index")
+    >>> index = NumpyVectorIndex.load("kb_index", embedder)
+    >>> docs = index.similarity_search(text, k=5, max_per_doc=1)
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Largest float32 scoring copy kept in memory; bigger indexes score in blocks
+MAX_SCORING_CACHE_MB = 256
+# Rows converted to float32 per matrix multiply (24 MB at 768-d)
+SCORE_BLOCK_ROWS = 8192
+
+
+class RetrievedChunk(NamedTuple):
+    """Search result; duck-types langchain's ``Document`` for prompt builders"""
+    page_content: str
+    metadata: Dict[str, Any]
+    score: float
+
+
+class NumpyVectorIndex:
+    """Exhaustive cosine-similarity index over a memory-mapped matrix
+
+    Args:
+        embedder: Object with ``embed_query``/``embed_documents`` for text
+            queries (not needed to search with vectors)
+    """
+
+    def __init__(self, embedder: Any = None):
+        self.embedder = embedder
+        self.path: Optional[Path] = None
+        self._vectors: Optional[np.ndarray] = None   # float16 (n, dim), normalized
+        self._doc_ids: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._meta: Optional[Dict[str, List]] = {"ids": [], "texts": [], "metadatas": []}
+        self._rows: Optional[Dict[str, int]] = {}
+        self._matrix: Optional[np.ndarray] = None    # float32 scoring copy (small indexes)
+
+    # ---- building -------------------------------------------------------
+
+    def add_embeddings(self,
+                       ids: Sequence[str],
+                       texts: Sequence[str],
+                       embeddings: Sequence[Sequence[float]],
+                       metadatas: Sequence[Dict[str, Any]]):
+        """Upsert chunks (the ``KnowledgeBaseIngestor`` store interface)"""
+        meta = self.meta
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = (vectors / np.where(norms == 0, 1, norms)).astype(np.float16)
+        if self._vectors is None:
+            self._vectors = np.zeros((0, vectors.shape[1]), dtype=np.float16)
+        elif self._vectors.shape[1] != vectors.shape[1]:
+            raise ValueError(f"Expected {self._vectors.shape[1]}-d embeddings, got {vectors.shape[1]}-d")
+
+        rows = self._row_map()
+        all_vectors = np.array(self._vectors)  # writable copy (the loaded one is mmap'd)
+        new_vectors = []
+        for chunk_id, text, vector, metadata in zip(ids, texts, vectors, metadatas):
+            row = rows.get(chunk_id)
+            if row is None:
+                rows[chunk_id] = len(meta["ids"])
+                meta["ids"].append(chunk_id)
+                meta["texts"].append(text)
+                meta["metadatas"].append(dict(metadata))
+                new_vectors.append(vector)
+            else:
+                meta["texts"][row] = text
+                meta["metadatas"][row] = dict(metadata)
+                all_vectors[row] = vector
+        if new_vectors:
+            all_vectors = np.concatenate([all_vectors, np.stack(new_vectors)])
+        self._vectors = all_vectors
+        self._matrix = None
+        self._doc_ids = self._number_documents(meta["metadatas"])
+
+    @staticmethod
+    def _number_documents(metadatas: List[Dict[str, Any]]) -> np.ndarray:
+        """Row -> document number; chunks without a doc_id are their own document"""
+        numbers: Dict[Any, int] = {}
+        doc_ids = np.empty(len(metadatas), dtype=np.int32)
+        for row, metadata in enumerate(metadatas):
+            key = metadata.get("doc_id", ("row", row))
+            doc_ids[row] = numbers.setdefault(key, len(numbers))
+        return doc_ids
+
+    @classmethod
+    def from_chroma(cls, vector_store: Any, embedder: Any = None, batch_size: int = 5000) -> 'NumpyVectorIndex':
+        """Copy every chunk of a langchain ``Chroma`` store (no re-embedding)"""
+        collection = vector_store._collection
+        index = cls(embedder)
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(include=["embeddings", "documents", "metadatas"],
+                                   limit=batch_size, offset=offset)
+            index.add_embeddings(batch["ids"], batch["documents"], batch["embeddings"],
+                                 [m or {} for m in batch["metadatas"]])
+        return index
+
+    # ---- persistence ----------------------------------------------------
+
+    def save(self, path: str):
+        """Write ``vectors.npy``, ``doc_ids.npy`` and ``meta.json`` to ``path``"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "vectors.npy", np.asarray(self._vectors, dtype=np.float16))
+        np.save(path / "doc_ids.npy", self._doc_ids)
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str, embedder: Any = None) -> 'NumpyVectorIndex':
+        """Memory-map a saved index; metadata is read when first needed"""
+        path = Path(path)
+        index = cls(embedder)
+        index.path = path
+        index._vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        index._doc_ids = np.load(path / "doc_ids.npy", mmap_mode="r")
+        index._meta = None
+        index._rows = None
+        return index
+
+    @property
+    def meta(self) -> Dict[str, List]:
+        if self._meta is None:
+            with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+                self._meta = json.load(f)
+        return self._meta
+
+    def _row_map(self) -> Dict[str, int]:
+        if self._rows is None:
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(self.meta["ids"])}
+        return self._rows
+
+    def __len__(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    # ---- search ---------------------------------------------------------
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Query x row cosine scores"""
+        n, dim = self._vectors.shape
+        if self._matrix is None and n * dim * 4 <= MAX_SCORING_CACHE_MB * 2 ** 20:
+            self._matrix = np.asarray(self._vectors, dtype=np.float32)
+        if self._matrix is not None:
+            return queries @ self._matrix.T
+
+        scores = np.empty((queries.shape[0], n), dtype=np.float32)
+        for start in range(0, n, SCORE_BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + block.shape[0]] = queries @ block.T
+        return scores
+
+    def _select(self, scores: np.ndarray, k: int, max_per_doc: Optional[int]) -> List[int]:
+        """Rows of the k best scores, at most ``max_per_doc`` per document"""
+        n = scores.shape[0]
+        if max_per_doc is None:
+            m = min(k, n)
+            top = np.argpartition(-scores, m - 1)[:m] if m < n else np.arange(n)
+            return top[np.argsort(-scores[top], kind="stable")].tolist()
+
+        # Take the best candidates, widening the pool until k distinct-enough rows fill it
+        m = min(n, k * 4)
+        while True:
+            top = np.argpartition(-scores, m - 1)[:m] if m < n else np.arange(n)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            selected = []
+            counts: Dict[int, int] = {}
+            for row, doc in zip(top.tolist(), self._doc_ids[top].tolist()):
+                if counts.get(doc, 0) < max_per_doc:
+                    counts[doc] = counts.get(doc, 0) + 1
+                    selected.append(row)
+                    if len(selected) == k:
+                        return selected
+            if m == n:
+                return selected
+            m = min(n, m * 4)
+
+    def search_vectors(self,
+                       queries: Any,
+                       k: int = 5,
+                       max_per_doc: Optional[int] = None) -> List[List[tuple]]:
+        """``(row, score)`` lists, best first, for a batch of query vectors"""
+        if len(self) == 0:
+            return [[] for _ in range(len(queries))]
+        queries = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        scores = self._scores(queries)
+        results = []
+        for query_scores in scores:
+            rows = self._select(query_scores, k, max_per_doc)
+            results.append([(row, float(query_scores[row])) for row in rows])
+        return results
+
+    def _chunks(self, hits: List[tuple]) -> List[RetrievedChunk]:
+        meta = self.meta
+        return [RetrievedChunk(meta["texts"][row], meta["metadatas"][row], score) for row, score in hits]
+
+    def similarity_search_by_vectors(self,
+                                     queries: Any,
+                                     k: int = 5,
+                                     max_per_doc: Optional[int] = None) -> List[List[RetrievedChunk]]:
+        """Retrieved chunks for a batch of query vectors"""
+        return [self._chunks(hits) for hits in self.search_vectors(queries, k, max_per_doc)]
+
+    def similarity_search_batch(self,
+                                queries: Sequence[str],
+                                k: int = 5,
+                                max_per_doc: Optional[int] = None) -> List[List[RetrievedChunk]]:
+        """Embed all ``queries`` in one call and search them together"""
+        if self.embedder is None:
+            raise ValueError("An embedder is needed to search with text queries")
+        vectors = self.embedder.embed_documents(list(queries))
+        return self.similarity_search_by_vectors(vectors, k, max_per_doc)
+
+    def similarity_search(self, query: str, k: int = 5, max_per_doc: Optional[int] = None) -> List[RetrievedChunk]:
+        """Drop-in for ``Chroma.similarity_search`` (plus optional per-document dedup)"""
+        if self.embedder is None:
+            raise ValueError("An embedder is needed to search with text queries")
+        return self.similarity_search_by_vectors([self.embedder.embed_query(query)], k, max_per_doc)[0]